@@ -5,13 +5,21 @@ import sys
 import glob
 import json
 
-from PySide6.QtCore import Qt, QPoint
+from utils import startup_profiler
+
+# Uppstartsprofilering slås på innan Qt importeras så att importtiderna kommer med
+profile_enabled, profile_report_path = startup_profiler.requested_report_path()
+if profile_enabled:
+    startup_profiler.enable(profile_report_path)
+startup_profiler.begin_phase("importer")
+
+from PySide6.QtCore import Qt, QPoint, QTimer, QObject, QEvent
 from PySide6.QtGui import QPalette, QColor, QLinearGradient, QFont, QAction, QKeySequence
-from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTabWidget, QApplication
+from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTabWidget, QApplication, QLabel
 
 from utils.theme_utils import apply_dark_theme
-from ui.search_tab import SearchTabWrapper
-from ui.code_module_tab import CodeModuleTabWrapper
+
+startup_profiler.end_phase("importer")
 
 class TitleBar(QWidget):
     """
@@ -80,6 +88,55 @@ class TitleBar(QWidget):
             self.parent.move(event.globalPosition().toPoint() - self.drag_position)
             event.accept()
 
+class LazyTab(QWidget):
+    """
+    Platshållare för en flik som byggs först när den visas.
+    Fabriken anropas en gång och resultatet läggs in i platshållaren.
+    """
+    def __init__(self, factory, name, parent=None):
+        super().__init__(parent)
+        self.factory = factory
+        self.name = name
+        self.content = None
+        self.content_layout = QVBoxLayout(self)
+        self.content_layout.setContentsMargins(0, 0, 0, 0)
+        self.placeholder = QLabel("Laddar...")
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        self.content_layout.addWidget(self.placeholder)
+    
+    def ensure_built(self):
+        """Bygg flikens innehåll om det inte redan är byggt."""
+        if self.content is None:
+            with startup_profiler.profile_phase(f"flik: {self.name}"):
+                self.content = self.factory()
+            self.content_layout.removeWidget(self.placeholder)
+            self.placeholder.deleteLater()
+            self.content_layout.addWidget(self.content)
+        return self.content
+
+class FirstPaintWatcher(QObject):
+    """
+    Händelsefilter som anropar callback när den bevakade widgeten ritas
+    för första gången.
+    """
+    def __init__(self, callback, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+    
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            self.callback()
+        return False
+
+def create_search_tab():
+    from ui.search_tab import SearchTabWrapper
+    return SearchTabWrapper()
+
+def create_code_module_tab():
+    from ui.code_module_tab import CodeModuleTabWrapper
+    return CodeModuleTabWrapper()
+
 class Dashboard(QMainWindow):
     """
     Huvuddashboardfönster med flera flikar.
@@ -108,18 +165,37 @@ class Dashboard(QMainWindow):
             QTabWidget::pane { border: 1px solid #555555; }
         """)
         
-        # Befintlig sökflik
-        self.search_tab = SearchTabWrapper()
+        # Flikarna byggs först när de väljs, så att fönstret visas direkt
+        self.search_tab = LazyTab(create_search_tab, "Sökfält Dashboard")
         tabs.addTab(self.search_tab, "Sökfält Dashboard")
         
-        # Ny kodmodulflik
-        self.code_module_tab = CodeModuleTabWrapper()
+        self.code_module_tab = LazyTab(create_code_module_tab, "Kodmodul Manager")
         tabs.addTab(self.code_module_tab, "Kodmodul Manager")
         
+        self.tabs = tabs
+        tabs.currentChanged.connect(lambda index: self.schedule_tab_build(index))
         main_layout.addWidget(tabs)
         
         # Applicera mörkt tema
         apply_dark_theme(main_widget)
+        
+        # Den första fliken byggs efter att fönstret ritats första gången
+        self.first_paint_watcher = FirstPaintWatcher(
+            lambda: self.schedule_tab_build(self.tabs.currentIndex()), self
+        )
+        self.title_bar.installEventFilter(self.first_paint_watcher)
+    
+    def schedule_tab_build(self, index):
+        """Bygg fliken på nästa varv i händelseloopen så att platshållaren hinner ritas."""
+        QTimer.singleShot(0, lambda: self.build_tab(index))
+    
+    def build_tab(self, index):
+        """Bygg fliken med givet index om den fortfarande är vald."""
+        if index != self.tabs.currentIndex():
+            return
+        tab = self.tabs.widget(index)
+        if isinstance(tab, LazyTab):
+            tab.ensure_built()
     
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -131,8 +207,39 @@ class Dashboard(QMainWindow):
             self.move(event.globalPosition().toPoint() - self.drag_position)
             event.accept()
 
+def run_startup_profile(app, dashboard, profiler, timeout_ms=60000):
+    """
+    Driv uppstarten i profileringsläge: efter första ritningen byggs alla
+    flikar, och när deras stegvisa laddning är klar skrivs rapporten och
+    programmet avslutas.
+    """
+    started = profiler.elapsed_ms()
+    
+    def build_all_tabs():
+        for index in range(dashboard.tabs.count()):
+            dashboard.tabs.setCurrentIndex(index)
+            dashboard.build_tab(index)
+        dashboard.tabs.setCurrentIndex(0)
+        QTimer.singleShot(0, lambda: finish_when_idle())
+    
+    def finish_when_idle():
+        if profiler.has_open_phases() and profiler.elapsed_ms() - started < timeout_ms:
+            QTimer.singleShot(20, lambda: finish_when_idle())
+            return
+        profiler.finish()
+        app.quit()
+    
+    def on_first_paint():
+        profiler.mark("första ritning")
+        QTimer.singleShot(0, lambda: build_all_tabs())
+    
+    # Huvudfönstret har genomskinlig bakgrund och ritar inte själv, så titelraden bevakas
+    watcher = FirstPaintWatcher(on_first_paint, dashboard)
+    dashboard.title_bar.installEventFilter(watcher)
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    with startup_profiler.profile_phase("QApplication"):
+        app = QApplication(sys.argv)
     app.setStyle("Fusion")
     
     # Konfigurera mörkläge för hela applikationen
@@ -151,6 +258,9 @@ if __name__ == "__main__":
     app.setPalette(palette)
     
     # Starta dashboarden
-    dashboard = Dashboard()
+    with startup_profiler.profile_phase("Dashboard"):
+        dashboard = Dashboard()
+    if startup_profiler.active():
+        run_startup_profile(app, dashboard, startup_profiler.active())
     dashboard.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,55 @@
+from PySide6.QtWidgets import QWidget
+
+from ui.code_module_pool import CodeModuleWidgetPool
+from ui.code_module_widget import LARGE_FILE_CHARS
+
+
+def _module(name, code):
+    return {"name": name, "extension": ".py", "code": code, "tags": [], "category": "other"}
+
+
+def test_release_mid_load_then_acquire_small_module(qapp, tmp_path):
+    host = QWidget()
+    pool = CodeModuleWidgetPool(host, str(tmp_path))
+    big_code = "x = 1\n" * (LARGE_FILE_CHARS // 6 + 1)
+    widget = pool.acquire("big", _module("big", big_code))
+    assert widget.code_editor.is_loading()
+
+    pool.release(widget)
+    assert not widget.code_editor.is_loading()
+
+    small_code = "def f():\n    return 1\n"
+    reused = pool.acquire("small", _module("small", small_code))
+    assert reused is widget
+    # Kvarvarande bitar från den stora filen får inte läsas in senare
+    qapp.processEvents()
+    assert not reused.code_editor.is_loading()
+    assert not reused.code_editor.large_file_mode
+    assert reused.code_editor.toPlainText() == small_code
+
+
+def _tree_names(tree):
+    names = []
+    stack = [tree.invisibleRootItem()]
+    while stack:
+        item = stack.pop()
+        for i in range(item.childCount()):
+            names.append(item.child(i).text(0))
+            stack.append(item.child(i))
+    return names
+
+
+def test_rebind_clears_structure_of_previous_module(qapp, tmp_path):
+    host = QWidget()
+    pool = CodeModuleWidgetPool(host, str(tmp_path))
+    widget = pool.acquire("first", _module("first", "def old_function():\n    pass\n"))
+    widget.update_code_structure_cache()
+    widget.update_structure_tree()
+    assert "old_function" in _tree_names(widget.structure_tree)
+
+    pool.release(widget)
+    reused = pool.acquire("second", _module("second", "value = 1\n"))
+    assert reused is widget
+    # Trädet töms direkt, innan bakgrundsparsningen av den nya modulen är klar
+    assert "old_function" not in _tree_names(reused.structure_tree)
+    reused.structure_parser.shared_pool().waitForDone()
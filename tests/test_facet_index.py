@@ -0,0 +1,20 @@
+from utils.facet_index import FacetIndex
+
+
+def test_tag_filter_matches_substrings_even_with_exact_tag():
+    index = FacetIndex([
+        {"id": "a", "extension": ".py", "tags": ["ui"]},
+        {"id": "b", "extension": ".py", "tags": ["gui"]},
+        {"id": "c", "extension": ".py", "tags": ["core"]},
+    ])
+    assert index.ids_for("tag", "ui") == {"a", "b"}
+    assert index.match({"tag": "UI "}) == {"a", "b"}
+
+
+def test_tag_matches_follow_added_and_removed_modules():
+    index = FacetIndex([{"id": "a", "extension": ".py", "tags": ["ui"]}])
+    assert index.ids_for("tag", "ui") == {"a"}
+    index.add({"id": "b", "extension": ".py", "tags": ["gui"]})
+    assert index.ids_for("tag", "ui") == {"a", "b"}
+    index.remove("a")
+    assert index.ids_for("tag", "ui") == {"b"}
@@ -0,0 +1,64 @@
+# ./tests/test_ignore_rules.py
+from utils.module_importer import IgnoreRules
+
+
+def test_double_star_matches_zero_or_more_directories():
+    rules = IgnoreRules(["docs/**/*.py"])
+    assert rules.path_ignored("docs/z.py")
+    assert rules.path_ignored("docs/x/z.py")
+    assert rules.path_ignored("docs/x/y/z.py")
+    assert not rules.path_ignored("src/docs/z.py")
+    assert not rules.path_ignored("docs/z.js")
+
+
+def test_leading_double_star_matches_at_any_depth():
+    rules = IgnoreRules(["**/gen/"])
+    assert rules.path_ignored("gen/a.py")
+    assert rules.path_ignored("src/gen/a.py")
+    assert rules.path_ignored("src/x/gen/a.py")
+    assert not rules.path_ignored("src/generated/a.py")
+
+
+def test_trailing_double_star_matches_everything_inside():
+    rules = IgnoreRules(["build/**"])
+    assert rules.path_ignored("build/a.py")
+    assert rules.path_ignored("build/x/y/a.py")
+    assert not rules.path_ignored("build.py")
+
+
+def test_star_and_question_mark_do_not_cross_directories():
+    rules = IgnoreRules(["docs/*.py", "src/?.js"])
+    assert rules.path_ignored("docs/z.py")
+    assert not rules.path_ignored("docs/x/z.py")
+    assert rules.path_ignored("src/a.js")
+    assert not rules.path_ignored("src/ab.js")
+    assert not rules.path_ignored("src/a/b.js")
+
+
+def test_unanchored_names_negation_and_base():
+    rules = IgnoreRules(["*.min.js", "node_modules/", "!keep.min.js"])
+    rules.add_patterns(["/local.py"], "pkg")
+    assert rules.path_ignored("a/b/app.min.js")
+    assert not rules.path_ignored("a/keep.min.js")
+    assert rules.path_ignored("web/node_modules/x.js")
+    assert rules.path_ignored("pkg/local.py")
+    assert not rules.path_ignored("local.py")
+    assert not rules.path_ignored("pkg/sub/local.py")
+
+
+def test_leading_slash_anchors_directory_rules():
+    rules = IgnoreRules(["/build/"])
+    assert rules.path_ignored("build/a.py")
+    assert not rules.path_ignored("src/build/a.py")
+
+
+def test_nested_gitignore_does_not_leak_into_siblings(tmp_path):
+    gitignore = tmp_path / ".gitignore"
+    gitignore.write_text("*.py\n", encoding="utf-8")
+    rules = IgnoreRules()
+    rules.add_file(str(gitignore), "a")
+    assert rules.path_ignored("a/x.py")
+    assert rules.path_ignored("a/sub/x.py")
+    assert not rules.path_ignored("b/y.py")
+    assert not rules.path_ignored("z.py")
+    assert not rules.path_ignored("ab/y.py")
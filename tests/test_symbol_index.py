@@ -0,0 +1,30 @@
+# ./tests/test_symbol_index.py
+from utils.symbol_index import MAX_CANDIDATES, SymbolIndex
+
+
+def _document(symbols):
+    return {
+        "kind": "page", "module_id": "lib", "source": "page",
+        "fields": {"name": "lib"}, "symbols": symbols,
+    }
+
+
+def test_exact_name_after_many_substring_matches():
+    symbols = [["function", f"my_parse_{i}", i + 1] for i in range(MAX_CANDIDATES + 500)]
+    symbols.append(["function", "parse", len(symbols) + 1])
+    index = SymbolIndex()
+    index.set_document("lib", _document(symbols))
+    index.publish()
+
+    results = index.query("parse")
+
+    assert results[0][1] == "parse"
+
+
+def test_prefix_match_on_first_row():
+    index = SymbolIndex()
+    index.set_document("lib", _document([["class", "Parser", 1]]))
+    index.publish()
+
+    assert [entry[1] for entry in index.query("li")] == ["lib"]
+    assert [entry[1] for entry in index.query("pars")] == ["Parser"]
@@ -0,0 +1,35 @@
+# ./tests/test_tree_reconciler.py
+from PySide6.QtWidgets import QTreeWidget
+
+from ui.tree_reconciler import node, reconcile_tree
+
+
+def _rows(tree):
+    root = tree.invisibleRootItem()
+    return [(root.child(i).text(0), root.child(i).text(2)) for i in range(root.childCount())]
+
+
+def test_reorder_updates_texts_of_moved_items(qapp):
+    tree = QTreeWidget()
+    tree.setColumnCount(3)
+    reconcile_tree(tree, [node(["a", "Funktion", "1"]), node(["b", "Funktion", "5"])])
+    b_item = tree.invisibleRootItem().child(1)
+
+    reconcile_tree(tree, [node(["b", "Funktion", "1"]), node(["a", "Funktion", "9"])])
+
+    assert _rows(tree) == [("b", "1"), ("a", "9")]
+    # Objektet flyttades, det byggdes inte om
+    assert tree.invisibleRootItem().child(0) is b_item
+
+
+def test_unchanged_specs_keep_items(qapp):
+    tree = QTreeWidget()
+    tree.setColumnCount(3)
+    specs = [node(["a", "Klass", "1"], [node(["m", "Metod", "2"])])]
+    reconcile_tree(tree, specs)
+    item = tree.invisibleRootItem().child(0)
+
+    reconcile_tree(tree, [node(["a", "Klass", "3"], [node(["m", "Metod", "4"])])])
+
+    assert tree.invisibleRootItem().child(0) is item
+    assert (item.text(2), item.child(0).text(2)) == ("3", "4")
@@ -0,0 +1,54 @@
+# ./ui/change_scheduler.py
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtWidgets import QApplication
+
+
+class ChangeScheduler(QObject):
+    """
+    Gemensam schemaläggare för ändringsdetektering i hela applikationen.
+    Editorer anmäler sig när deras dokument ändrats; en enda engångstimer
+    anropar sedan flush_pending_changes() på just dem. Utan ändringar
+    står timern still.
+    """
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Hämta den delade schemaläggaren, skapa den vid behov."""
+        if cls._instance is None:
+            cls._instance = cls(parent=QApplication.instance())
+        return cls._instance
+
+    def __init__(self, interval=1500, parent=None):
+        super().__init__(parent)
+        self._pending = set()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+
+    def schedule(self, target):
+        """Anmäl att target har ändringar som ska hanteras."""
+        self._pending.add(target)
+        # Timern startas inte om vid varje tangenttryck, så kontinuerligt
+        # skrivande hanteras ändå minst en gång per intervall
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def cancel(self, target):
+        """Glöm väntande ändringar för target."""
+        self._pending.discard(target)
+        if not self._pending:
+            self.timer.stop()
+
+    def flush(self):
+        """Hantera alla väntande ändringar direkt."""
+        self.timer.stop()
+        pending, self._pending = self._pending, set()
+        for target in pending:
+            try:
+                target.flush_pending_changes()
+            except RuntimeError:
+                # Widgeten har redan raderats
+                pass
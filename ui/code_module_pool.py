@@ -0,0 +1,62 @@
+# ./ui/code_module_pool.py
+from PySide6.QtCore import QObject, QTimer
+
+from ui.code_module_widget import CodeModuleWidget
+
+
+class CodeModuleWidgetPool(QObject):
+    """
+    Pool av färdigbyggda CodeModuleWidget. Widgets som lämnas tillbaka
+    binds om till nya moduler via bind_module i stället för att byggas om,
+    så kostnaden för initUI betalas bara ett begränsat antal gånger.
+    """
+
+    def __init__(self, host, modules_directory, configure=None, max_idle=4):
+        super().__init__(host)
+        # Lediga widgets hålls dolda under värdwidgeten så att Qt äger dem
+        self.host = host
+        self.modules_directory = modules_directory
+        self.configure = configure
+        self.max_idle = max_idle
+        self.idle = []
+        self.created_count = 0
+
+    def acquire(self, module_id, module_data):
+        """Hämta en widget bunden till modulen, återanvänd om möjligt."""
+        if self.idle:
+            widget = self.idle.pop()
+            widget.bind_module(module_id, module_data)
+            return widget
+        return self._create(module_id, module_data)
+
+    def release(self, widget):
+        """Lämna tillbaka en widget till poolen."""
+        # Släpp modulens kod medan widgeten väntar
+        widget.blockSignals(True)
+        widget.code_editor.clear()
+        widget.mark_changes_handled()
+        widget.blockSignals(False)
+        widget.module_data = {}
+
+        if len(self.idle) >= self.max_idle:
+            widget.deleteLater()
+            return
+
+        widget.hide()
+        widget.setParent(self.host)
+        self.idle.append(widget)
+
+    def prewarm(self, count):
+        """Bygg lediga widgets i förväg, en per varv i händelseloopen."""
+        if count <= 0 or len(self.idle) >= self.max_idle:
+            return
+        widget = self._create("", None)
+        self.release(widget)
+        QTimer.singleShot(0, lambda: self.prewarm(count - 1))
+
+    def _create(self, module_id, module_data):
+        widget = CodeModuleWidget(module_id, module_data, self.modules_directory)
+        if self.configure:
+            self.configure(widget)
+        self.created_count += 1
+        return widget
@@ -6,20 +6,41 @@ import json
 import re
 from pathlib import Path
 from datetime import datetime
+from collections import OrderedDict
 
 from PySide6.QtCore import Qt, Signal, QMimeData, QSize, QPoint, QTimer
-from PySide6.QtGui import QFont, QAction, QKeySequence, QDrag, QIcon, QColor
+from PySide6.QtGui import QFont, QAction, QKeySequence, QShortcut, QDrag, QIcon, QColor, QStandardItem, QStandardItemModel
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit,
     QListWidget, QListWidgetItem, QMessageBox, QLabel, QFrame, QScrollArea,
     QCheckBox, QInputDialog, QGridLayout, QGroupBox, QComboBox, QFileDialog,
-    QSplitter, QTabWidget, QToolBar, QMenu, QStatusBar, QProgressBar
+    QSplitter, QTabWidget, QToolBar, QMenu, QStatusBar, QProgressBar, QCompleter,
+    QTreeWidget, QTreeWidgetItem
 )
 
 from utils.theme_utils import apply_dark_theme
 from utils.card_utils import create_card
 from utils.code_utils import CodeAnalyzer, CodeModuleManager
+from utils.history_utils import PageHistory
+from utils.snapshot_writer import SnapshotWriter, capture_snapshot
+from utils.page_cache import PageCache, PagePrefetcher
+from utils.module_search import ModuleSearcher
+from utils.trigram_index import LibraryIndexer, FIELD_LABELS
+from utils.module_watcher import ModuleWatcher
+from utils.module_importer import ModuleImporter, is_archive
+from utils.import_manifest import ImportManifest, DELETED_TAG
+from utils.module_exporter import ModuleExporter, export_records
+from utils import startup_profiler
 from ui.code_module_widget import CodeModuleWidget
+from ui.module_list_model import ModuleListModel, ModuleListView
+from ui.code_module_pool import CodeModuleWidgetPool
+from ui.change_scheduler import ChangeScheduler
+from ui.quick_open import QuickOpenPalette
+
+# Standardvärden som alltid visas i facettlistorna, även utan träffar
+CATEGORY_FACETS = ["ui", "utils", "data", "network", "db", "ai", "algorithms", "other"]
+LANGUAGE_FACETS = ["python", "javascript", "html", "css", "java", "cpp"]
+
 
 class CodeModuleTab(QWidget):
     """
@@ -46,26 +67,120 @@ class CodeModuleTab(QWidget):
         
         self.current_file_index = 0
         self.code_modules = []
-        self.history = []
-        self.history_index = -1
+        
+        # Öppna editorer (modul-id -> CodeModuleWidget) för aktuell sida, senast använd sist
+        self.open_editors = OrderedDict()
+        self.max_open_editors = 6
+        
+        # Aktiva filter: valda facettvärden besvaras av sidans facettindex,
+        # sökträffar är en mängd id:n (None när ingen sökning är aktiv)
+        self.active_facets = {}
+        self.search_ids = None
+        self.search_term = ""
+        self.search_generation = 0
+        self.search_reset_pending = False
+        
+        # Ångra/gör om-historik per sida, sparad på disk och laddad vid behov
+        self.page_history = PageHistory(self.json_files[self.current_file_index])
         
         # Statusflaggor
         self.is_loading = False
         self.is_saving = False
         
-        # Autoscan-timer för att upptäcka nya moduler på disk
-        self.auto_scan_timer = QTimer(self)
-        self.auto_scan_timer.setInterval(10000)  # 10 sekunder
-        self.auto_scan_timer.timeout.connect(self.auto_scan_for_modules)
+        # Sparningar serialiseras och skrivs på en arbetstråd
+        self.snapshot_writer = SnapshotWriter(self)
+        self.snapshot_writer.saveFinished.connect(self.on_save_finished)
+        self.snapshot_writer.saveFailed.connect(self.on_save_failed)
+        QApplication.instance().aboutToQuit.connect(lambda: self.on_about_to_quit())
+        self.last_save_generation = 0
+        
+        # Senast använda sidor hålls i minnet med sina färdiga vyer
+        self.page_cache = PageCache(capacity=4, on_evict=self.on_page_evicted)
+        self.page_prefetcher = PagePrefetcher(self)
+        self.page_prefetcher.pageLoaded.connect(self.on_page_prefetched)
+        
+        # Sökning medan man skriver: fördröjd start, matchning på arbetstråd
+        self.module_searcher = ModuleSearcher(self)
+        self.module_searcher.resultsReady.connect(self.on_search_results)
+        self.module_searcher.searchFinished.connect(self.on_search_finished)
+        self.search_debounce_timer = QTimer(self)
+        self.search_debounce_timer.setSingleShot(True)
+        self.search_debounce_timer.setInterval(250)
+        self.search_debounce_timer.timeout.connect(self.search_modules)
+        
+        # Trigramindex över alla sidor och modulfiler för sökning i hela biblioteket
+        self.library_indexer = LibraryIndexer(self.json_directory, self.modules_directory, self)
+        self.library_indexer.searchFinished.connect(self.on_library_search_finished)
+        self.library_indexer.indexUpdated.connect(self.on_library_index_updated)
+        self.library_indexer.rankingReady.connect(self.on_ranking_ready)
+        self.library_search_generation = 0
+        self.ranking_generation = 0
+        
+        # Snabbval (Ctrl+P) byggs första gången det öppnas
+        self.quick_open = None
+        
+        # Antal per facettvärde räknas om på nästa varv i händelseloopen, en gång per omgång ändringar
+        self.facet_counts_timer = QTimer(self)
+        self.facet_counts_timer.setSingleShot(True)
+        self.facet_counts_timer.setInterval(0)
+        self.facet_counts_timer.timeout.connect(self.update_facet_counts)
+        
+        # Nya moduler på disk upptäcks via filsystemhändelser i standardkatalogerna
+        self.module_watcher = ModuleWatcher(
+            list(self.module_manager.language_dirs.values()) + list(self.module_manager.category_dirs.values()), self
+        )
+        self.module_watcher.pathsChanged.connect(self.auto_scan_for_modules)
+        # Sökvägar som kom medan sidan laddades eller sparades
+        self.pending_scan_paths = set()
+        
+        # Import av kataloger: filerna läses på arbetstrådar och läggs in i omgångar
+        self.module_importer = ModuleImporter(self)
+        self.module_importer.filesFound.connect(self.on_import_files_found)
+        self.module_importer.walkFinished.connect(self.on_import_walk_finished)
+        self.module_importer.modulesRead.connect(self.on_import_modules_read)
+        self.module_importer.errorOccurred.connect(self.on_import_error)
+        self.import_generation = 0
+        self.import_pending = []
+        self.import_flush_timer = QTimer(self)
+        self.import_flush_timer.setSingleShot(True)
+        self.import_flush_timer.setInterval(100)
+        self.import_flush_timer.timeout.connect(self.flush_imported_modules)
+        
+        # Export till katalog eller zip-arkiv sker också på arbetstrådar
+        self.module_exporter = ModuleExporter(self)
+        self.module_exporter.progress.connect(self.on_export_progress)
+        self.module_exporter.exportFinished.connect(self.on_export_finished)
+        self.module_exporter.errorOccurred.connect(self.on_export_error)
+        self.export_generation = 0
         
         # Initiera UI
         self.initUI()
         
-        # Ladda moduldata
-        self.load_data(self.json_files[self.current_file_index])
-        
-        # Starta autoscanning
-        self.auto_scan_timer.start()
+        # Tung laddning sker stegvis efter första ritningen; autoscanning startar först när sidan är laddad
+        self.startup_steps = [
+            ("load_data", lambda: self.load_data(self.json_files[self.current_file_index])),
+            ("sökindex", lambda: self.library_indexer.refresh()),
+            ("förladda sidor", lambda: self.prefetch_adjacent_pages()),
+            ("starta autoscanning", lambda: self.module_watcher.start()),
+            # Filer som lagts till medan programmet var stängt; därefter läses bara ändrade sökvägar
+            ("första scanning", lambda: self.auto_scan_for_modules(self.module_watcher.known_paths())),
+            ("förbygg editor", lambda: self.editor_pool.prewarm(1)),
+        ]
+        self.status_bar.showMessage("Laddar moduler...")
+        startup_profiler.begin_phase("kodmoduler: stegvis laddning")
+        QTimer.singleShot(0, lambda: self.run_startup_step())
+    
+    def run_startup_step(self):
+        """Kör nästa uppstartssteg och lämna tillbaka kontrollen till händelseloopen emellan."""
+        if not self.startup_steps:
+            return
+        name, step = self.startup_steps.pop(0)
+        with startup_profiler.profile_phase(f"kodmoduler: {name}"):
+            step()
+        if self.startup_steps:
+            QTimer.singleShot(0, lambda: self.run_startup_step())
+        else:
+            startup_profiler.end_phase("kodmoduler: stegvis laddning")
     
     def ensure_directory_exists(self):
         """Säkerställ att huvudkatalogen för moduler finns."""
@@ -101,6 +216,11 @@ class CodeModuleTab(QWidget):
         
         apply_dark_theme(self)
         
+        # Ctrl+P öppnar snabbvalet var fokus än är i fliken
+        quick_open_shortcut = QShortcut(QKeySequence("Ctrl+P"), self)
+        quick_open_shortcut.setContext(Qt.WidgetWithChildrenShortcut)
+        quick_open_shortcut.activated.connect(self.show_quick_open)
+        
         # Övre området: Moduler och kontroller
         upper_container = QWidget()
         upper_layout = QHBoxLayout(upper_container)
@@ -116,18 +236,38 @@ class CodeModuleTab(QWidget):
         right_layout = QVBoxLayout(right_panel)
         right_layout.setContentsMargins(0, 0, 0, 0)
         
-        # Scrollbart område för moduler
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_content = QWidget()
-        
-        # Använd rutnät för att visa moduler 2x2
-        self.modules_layout = QGridLayout(self.scroll_content)
-        self.modules_layout.setSpacing(15)
-        self.modules_layout.setContentsMargins(5, 5, 5, 5)
-        
-        self.scroll_area.setWidget(self.scroll_content)
-        right_layout.addWidget(self.scroll_area)
+        # Modullista överst, öppnade editorer under
+        self.modules_splitter = QSplitter(Qt.Vertical)
+        
+        # Virtualiserad kortlista; en modell per sida
+        self.module_list = ModuleListView()
+        self.module_list.setMinimumHeight(180)
+        self.module_list.activated.connect(self.on_module_activated)
+        self.module_list.doubleClicked.connect(self.on_module_activated)
+        self.module_model = ModuleListModel(self.code_modules, self)
+        self.module_list.setModel(self.module_model)
+        self.modules_splitter.addWidget(self.module_list)
+        
+        # Träffar från sökning i hela biblioteket visas i stället för kortlistan
+        self.library_results = QTreeWidget()
+        self.library_results.setHeaderHidden(True)
+        self.library_results.setMinimumHeight(180)
+        self.library_results.itemActivated.connect(self.on_library_result_activated)
+        self.library_results.itemDoubleClicked.connect(self.on_library_result_activated)
+        self.library_results.setVisible(False)
+        self.modules_splitter.addWidget(self.library_results)
+        
+        # Fullständiga editorer skapas bara för öppnade moduler och återanvänds via poolen
+        self.editor_pool = CodeModuleWidgetPool(self, self.modules_directory, self.configure_code_module_widget)
+        self.editor_tabs = QTabWidget()
+        self.editor_tabs.setTabsClosable(True)
+        self.editor_tabs.setMovable(True)
+        self.editor_tabs.tabCloseRequested.connect(self.close_module_editor)
+        self.editor_tabs.currentChanged.connect(self.on_editor_tab_changed)
+        self.editor_tabs.setVisible(False)
+        self.modules_splitter.addWidget(self.editor_tabs)
+        
+        right_layout.addWidget(self.modules_splitter)
         
         # Global sökruta
         search_container = QWidget()
@@ -144,6 +284,7 @@ class CodeModuleTab(QWidget):
             }
         """)
         self.global_search_input.returnPressed.connect(self.search_modules)
+        self.global_search_input.textChanged.connect(lambda _text: self.search_debounce_timer.start())
         
         search_layout.addWidget(self.global_search_input)
         
@@ -165,6 +306,17 @@ class CodeModuleTab(QWidget):
         search_btn.clicked.connect(self.search_modules)
         search_layout.addWidget(search_btn)
         
+        # Sökomfång: aktuell sida eller alla sidor och modulfiler
+        self.library_search_check = QCheckBox("Hela biblioteket")
+        self.library_search_check.setToolTip("Sök i alla sidor och modulfiler på disk")
+        self.library_search_check.toggled.connect(self.on_search_scope_changed)
+        search_layout.addWidget(self.library_search_check)
+        
+        self.regex_search_check = QCheckBox("Regex")
+        self.regex_search_check.setToolTip("Tolka söktermen som ett reguljärt uttryck (hela biblioteket)")
+        self.regex_search_check.toggled.connect(lambda _checked: self.search_debounce_timer.start())
+        search_layout.addWidget(self.regex_search_check)
+        
         # Lägg till sökpanelen
         right_layout.addWidget(search_container)
         
@@ -204,17 +356,15 @@ class CodeModuleTab(QWidget):
         # Kategorifiltreringsdropdown
         filter_section.addWidget(QLabel("Kategori:"))
         self.category_filter = QComboBox()
-        self.category_filter.addItems(["Alla", "ui", "utils", "data", "network", "db", "ai", "algorithms", "other"])
-        self.category_filter.setMinimumWidth(120)
-        self.category_filter.currentTextChanged.connect(self.apply_filters)
+        self.category_filter.setMinimumWidth(140)
+        self.category_filter.currentIndexChanged.connect(self.apply_filters)
         filter_section.addWidget(self.category_filter)
         
         # Språkfiltreringsdropdown
         filter_section.addWidget(QLabel("Språk:"))
         self.language_filter = QComboBox()
-        self.language_filter.addItems(["Alla", "python", "javascript", "html", "css", "java", "cpp"])
-        self.language_filter.setMinimumWidth(120)
-        self.language_filter.currentTextChanged.connect(self.apply_filters)
+        self.language_filter.setMinimumWidth(140)
+        self.language_filter.currentIndexChanged.connect(self.apply_filters)
         filter_section.addWidget(self.language_filter)
         
         # Taggfilter
@@ -222,8 +372,18 @@ class CodeModuleTab(QWidget):
         self.tag_filter = QLineEdit()
         self.tag_filter.setPlaceholderText("Filtrera med tagg...")
         self.tag_filter.returnPressed.connect(self.apply_filters)
+        # Kompletteringslistan visar antal per tagg men infogar bara taggen
+        self.tag_model = QStandardItemModel(self)
+        tag_completer = QCompleter(self.tag_model, self)
+        tag_completer.setCompletionRole(Qt.UserRole)
+        tag_completer.setCaseSensitivity(Qt.CaseInsensitive)
+        tag_completer.setFilterMode(Qt.MatchContains)
+        tag_completer.activated.connect(lambda _text: self.apply_filters())
+        self.tag_filter.setCompleter(tag_completer)
         filter_section.addWidget(self.tag_filter)
         
+        self.update_facet_counts()
+        
         toolbox_layout.addLayout(filter_section)
         
         # Knappar för filtrering
@@ -287,6 +447,18 @@ class CodeModuleTab(QWidget):
         self.progress_bar.setVisible(False)
         self.status_bar.addPermanentWidget(self.progress_bar)
         
+        self.cancel_import_btn = QPushButton("Avbryt import")
+        self.cancel_import_btn.setMaximumHeight(20)
+        self.cancel_import_btn.setVisible(False)
+        self.cancel_import_btn.clicked.connect(self.cancel_import)
+        self.status_bar.addPermanentWidget(self.cancel_import_btn)
+        
+        self.cancel_export_btn = QPushButton("Avbryt export")
+        self.cancel_export_btn.setMaximumHeight(20)
+        self.cancel_export_btn.setVisible(False)
+        self.cancel_export_btn.clicked.connect(self.cancel_export)
+        self.status_bar.addPermanentWidget(self.cancel_export_btn)
+        
         main_layout.addWidget(self.status_bar)
     
     def create_left_panel(self):
@@ -364,6 +536,23 @@ class CodeModuleTab(QWidget):
         save_btn.clicked.connect(lambda: self.save_data())
         json_layout.addWidget(save_btn)
         
+        # Sidnavigering
+        nav_layout = QHBoxLayout()
+        
+        prev_page_btn = QPushButton("◀")
+        prev_page_btn.setStyleSheet("background-color: #569CD6; border: 1px solid #3D7FB8;")
+        prev_page_btn.setToolTip("Föregående sida")
+        prev_page_btn.clicked.connect(lambda: self.switch_to_page(self.current_file_index - 1))
+        nav_layout.addWidget(prev_page_btn)
+        
+        next_page_btn = QPushButton("▶")
+        next_page_btn.setStyleSheet("background-color: #569CD6; border: 1px solid #3D7FB8;")
+        next_page_btn.setToolTip("Nästa sida")
+        next_page_btn.clicked.connect(lambda: self.switch_to_page(self.current_file_index + 1))
+        nav_layout.addWidget(next_page_btn)
+        
+        json_layout.addLayout(nav_layout)
+        
         # Sidhantering
         page_layout = QHBoxLayout()
         
@@ -428,12 +617,30 @@ class CodeModuleTab(QWidget):
         import_all_btn.clicked.connect(self.import_all_modules)
         io_layout.addWidget(import_all_btn)
         
+        import_archive_btn = QPushButton("🗜️ Importera arkiv")
+        import_archive_btn.setStyleSheet("background-color: #CE9178; border: 1px solid #A5735E;")
+        import_archive_btn.setToolTip("Importera moduler från ett zip- eller tar-arkiv utan att packa upp det")
+        import_archive_btn.clicked.connect(self.import_archive)
+        io_layout.addWidget(import_archive_btn)
+        
+        import_git_btn = QPushButton("🌿 Importera från git")
+        import_git_btn.setStyleSheet("background-color: #CE9178; border: 1px solid #A5735E;")
+        import_git_btn.setToolTip("Importera moduler från en gren, tagg eller commit i ett lokalt git-förråd")
+        import_git_btn.clicked.connect(self.import_from_git)
+        io_layout.addWidget(import_git_btn)
+        
         export_all_btn = QPushButton("📤 Exportera alla moduler")
         export_all_btn.setStyleSheet("background-color: #CE9178; border: 1px solid #A5735E;")
         export_all_btn.setToolTip("Exportera alla moduler till katalog")
         export_all_btn.clicked.connect(self.export_all_modules)
         io_layout.addWidget(export_all_btn)
         
+        export_zip_btn = QPushButton("🗜️ Exportera som zip")
+        export_zip_btn.setStyleSheet("background-color: #CE9178; border: 1px solid #A5735E;")
+        export_zip_btn.setToolTip("Exportera alla moduler till ett zip-arkiv")
+        export_zip_btn.clicked.connect(self.export_modules_to_zip)
+        io_layout.addWidget(export_zip_btn)
+        
         left_layout.addWidget(io_group)
         
         left_layout.addStretch()
@@ -442,7 +649,7 @@ class CodeModuleTab(QWidget):
     
     def add_code_module(self):
         """Lägg till en ny kodmodul."""
-        module_id = str(len(self.code_modules))
+        module_id = self.next_module_id()
         current_timestamp = datetime.now().isoformat()
         
         # Grundläggande moduldata
@@ -460,16 +667,11 @@ class CodeModuleTab(QWidget):
             "auto_save": True
         }
         
-        # Skapa och konfigurera widget
-        widget = CodeModuleWidget(module_id, module_data, self.modules_directory)
-        self.configure_code_module_widget(widget)
-        
-        # Lägg till i grid-layout
-        row, col = divmod(len(self.code_modules), 2)
-        self.modules_layout.addWidget(widget, row, col)
-        
-        # Lägg till i moduldata
+        # Lägg till i moduldata och öppna en editor för den nya modulen
         self.code_modules.append(module_data)
+        self.module_model.module_added(module_data)
+        self.facet_counts_timer.start()
+        self.open_module_editor(module_id)
         
         self.update_history()
         self.save_data()
@@ -478,6 +680,116 @@ class CodeModuleTab(QWidget):
         # Visa statusmeddelande
         self.status_bar.showMessage(f"Ny modul '{module_data['name']}' skapad", 3000)
     
+    def next_module_id(self):
+        """Returnera nästa lediga modul-id på aktuell sida."""
+        ids = [int(m["id"]) for m in self.code_modules if str(m.get("id", "")).isdigit()]
+        return str(max(ids + [-1]) + 1)
+    
+    def find_module(self, module_id):
+        """Hitta en modul på aktuell sida via dess id."""
+        for module in self.code_modules:
+            if module["id"] == module_id:
+                return module
+        return None
+    
+    def on_module_activated(self, index):
+        """Öppna editorn för kortet som aktiverades i listan."""
+        module_id = index.data(ModuleListModel.ModuleIdRole)
+        if module_id is not None:
+            self.open_module_editor(module_id)
+    
+    def open_module_editor(self, module_id):
+        """Öppna en modul i en fullständig editor, eller visa den om den redan är öppen."""
+        widget = self.open_editors.get(module_id)
+        if widget is None:
+            module = self.find_module(module_id)
+            if module is None:
+                return None
+            # Håll antalet editorer begränsat; den minst nyligen använda stängs
+            while len(self.open_editors) >= self.max_open_editors:
+                oldest = self.open_editors[next(iter(self.open_editors))]
+                self.close_module_editor(self.editor_tabs.indexOf(oldest))
+            
+            # Att fylla editorn räknas inte som en ändring
+            was_loading = self.is_loading
+            self.is_loading = True
+            try:
+                widget = self.editor_pool.acquire(module_id, module)
+            finally:
+                self.is_loading = was_loading
+            self.open_editors[module_id] = widget
+            self.editor_tabs.addTab(widget, module.get("name", module_id))
+            widget.show()
+        
+        if not self.editor_tabs.isVisible():
+            # Dela ytan mellan kortlistan och editorerna
+            total = sum(self.modules_splitter.sizes())
+            self.modules_splitter.setSizes([total * 2 // 5, total - total * 2 // 5])
+        self.editor_tabs.setCurrentWidget(widget)
+        self.editor_tabs.setVisible(True)
+        self.open_editors.move_to_end(module_id)
+        return widget
+    
+    def on_editor_tab_changed(self, index):
+        """Markera den visade editorn som senast använd."""
+        widget = self.editor_tabs.widget(index)
+        if isinstance(widget, CodeModuleWidget) and widget.module_id in self.open_editors:
+            self.open_editors.move_to_end(widget.module_id)
+    
+    def close_module_editor(self, index):
+        """Stäng editorn i en flik och spara eventuella ändringar."""
+        widget = self.editor_tabs.widget(index)
+        if not isinstance(widget, CodeModuleWidget):
+            return
+        
+        if self.sync_editor_to_module(widget):
+            self.update_history()
+            self.save_data()
+        self.discard_module_editor(widget.module_id)
+    
+    def discard_module_editor(self, module_id, recycle=True):
+        """Ta bort en öppen editor utan att synka den och lämna tillbaka den till poolen."""
+        widget = self.open_editors.pop(module_id, None)
+        if widget is None:
+            return
+        index = self.editor_tabs.indexOf(widget)
+        if index >= 0:
+            self.editor_tabs.removeTab(index)
+        if recycle:
+            self.editor_pool.release(widget)
+        self.editor_tabs.setVisible(self.editor_tabs.count() > 0)
+    
+    def close_all_editors(self):
+        """Stäng alla öppna editorer utan att synka dem."""
+        for module_id in list(self.open_editors):
+            self.discard_module_editor(module_id)
+    
+    def sync_editor_to_module(self, widget):
+        """Kopiera en editors fält till dess modul. Returnerar True om något ändrades."""
+        module = self.find_module(widget.module_id)
+        if module is None:
+            return False
+        
+        # Uppdatera kod och andra fält
+        synced = {
+            "code": widget.code_editor.toPlainText(),
+            "name": widget.name_label.text(),
+            "extension": widget.extension_input.text(),
+            "tags": widget.module_data.get("tags", []),
+            "file_path": str(widget.module_data.get("file_path", ""))
+        }
+        # Stämpla bara om moduler som faktiskt ändrats
+        if all(module.get(key) == value for key, value in synced.items()):
+            return False
+        
+        facets_changed = module.get("extension") != synced["extension"] or module.get("tags") != synced["tags"]
+        module.update(synced)
+        module["modified"] = datetime.now().isoformat()
+        self.module_model.module_changed(widget.module_id)
+        if facets_changed:
+            self.facet_counts_timer.start()
+        return True
+    
     def configure_code_module_widget(self, widget):
         """Konfigurera signaler och inställningar för en kodmodulwidget."""
         # Koppla widgetsignaler till hanteringsfunktioner
@@ -504,19 +816,36 @@ class CodeModuleTab(QWidget):
                 del self.code_modules[i]
                 break
         
-        self.refresh_ui()
+        # Widgeten raderar sig själv och får inte återanvändas
+        self.discard_module_editor(module_id, recycle=False)
+        
+        self.module_model.module_removed(module_id)
+        self.facet_counts_timer.start()
         self.update_history()
         self.save_data()
         self.update_modules_status()
     
     def on_module_updated(self, module_id, update_type, module_data):
         """När en modul uppdateras."""
+        # Editorer som redan stängts får inte skriva över aktuell sida
+        sender = self.sender()
+        if isinstance(sender, CodeModuleWidget) and self.open_editors.get(module_id) is not sender:
+            return
+        
         # Uppdatera moduldata i listan
         for i, module in enumerate(self.code_modules):
             if module["id"] == module_id:
                 self.code_modules[i] = module_data
                 break
         
+        # Namn, taggar m.m. syns på kortet och i fliken
+        if update_type != "content":
+            self.module_model.module_changed(module_id)
+            self.facet_counts_timer.start()
+            widget = self.open_editors.get(module_id)
+            if widget is not None:
+                self.editor_tabs.setTabText(self.editor_tabs.indexOf(widget), module_data.get("name", module_id))
+        
         # Om vi inte redan håller på att ladda eller spara
         if not self.is_loading and not self.is_saving:
             self.update_history()
@@ -524,19 +853,14 @@ class CodeModuleTab(QWidget):
     
     def update_history(self):
         """Uppdatera historiken för ångra/gör om."""
-        # Trimma historiken om vi är någonstans i mitten
-        self.history = self.history[:self.history_index + 1]
-        
-        # Lägg till den nuvarande tillståndet till historiken
-        self.history.append(json.loads(json.dumps(self.code_modules)))
-        self.history_index += 1
+        # Historiken skriver bara en diff om något faktiskt ändrats
+        self.page_history.record(self.code_modules)
     
     def undo(self):
         """Ångra senaste åtgärd."""
-        if self.history_index > 0:
-            self.history_index -= 1
-            # Djupkopiera historikdata till nuvarande tillstånd
-            self.code_modules = json.loads(json.dumps(self.history[self.history_index]))
+        state = self.page_history.undo()
+        if state is not None:
+            self.code_modules = state
             self.refresh_ui()
             self.save_data()
             
@@ -546,10 +870,9 @@ class CodeModuleTab(QWidget):
     
     def redo(self):
         """Gör om åtgärd."""
-        if self.history_index < len(self.history) - 1:
-            self.history_index += 1
-            # Djupkopiera historikdata till nuvarande tillstånd
-            self.code_modules = json.loads(json.dumps(self.history[self.history_index]))
+        state = self.page_history.redo()
+        if state is not None:
+            self.code_modules = state
             self.refresh_ui()
             self.save_data()
             
@@ -559,22 +882,24 @@ class CodeModuleTab(QWidget):
     
     def refresh_ui(self):
         """Uppdatera användargränssnittet med aktuella moduler."""
-        # Rensa alla moduler från layout
-        for i in reversed(range(self.modules_layout.count())):
-            widget = self.modules_layout.itemAt(i).widget()
-            if widget:
-                self.modules_layout.removeWidget(widget)
-                widget.deleteLater()
-        
-        # Återskapa moduler från data
-        for idx, module in enumerate(self.code_modules):
-            # Skapa ny widget för modulen
-            widget = CodeModuleWidget(module["id"], module, self.modules_directory)
-            self.configure_code_module_widget(widget)
-            
-            # Lägg till i grid
-            row, col = divmod(idx, 2)
-            self.modules_layout.addWidget(widget, row, col)
+        # Modellen delar postlistan; inga widgets byggs om
+        self.module_model.set_modules(self.code_modules)
+        self.restart_search()
+        self.apply_model_filter()
+        
+        # Öppna editorer binds om till de nya posterna eller stängs
+        was_loading = self.is_loading
+        self.is_loading = True
+        try:
+            for module_id, widget in list(self.open_editors.items()):
+                module = self.find_module(module_id)
+                if module is None:
+                    self.discard_module_editor(module_id)
+                elif widget.module_data is not module:
+                    widget.bind_module(module_id, module)
+                    self.editor_tabs.setTabText(self.editor_tabs.indexOf(widget), module.get("name", module_id))
+        finally:
+            self.is_loading = was_loading
         
         # Uppdatera statusfältet
         self.update_modules_status()
@@ -585,7 +910,11 @@ class CodeModuleTab(QWidget):
     def update_modules_status(self):
         """Uppdatera statusmeddelandet för antal moduler."""
         count = len(self.code_modules)
-        self.modules_status.setText(f"{count} {'moduler' if count != 1 else 'modul'}")
+        visible = self.module_model.visible_count()
+        if visible != count:
+            self.modules_status.setText(f"{visible} av {count} moduler")
+        else:
+            self.modules_status.setText(f"{count} {'moduler' if count != 1 else 'modul'}")
     
     def update_page_indicator(self):
         """Uppdatera sidindikator."""
@@ -597,47 +926,68 @@ class CodeModuleTab(QWidget):
             self.page_indicator.setText("Sida 0/0")
     
     def save_data(self):
-        """Spara alla moduldata till JSON."""
+        """Spara alla moduldata till JSON i bakgrunden."""
         if self.is_saving:
             return
         
         self.is_saving = True
         
         try:
-            # Visa progress
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-            self.status_bar.showMessage("Sparar moduler...")
-            
-            # Säkerställ att alla widgets har uppdaterat sina moduldata
-            for i in range(self.modules_layout.count()):
-                widget_item = self.modules_layout.itemAt(i)
-                if widget_item and isinstance(widget_item.widget(), CodeModuleWidget):
-                    widget = widget_item.widget()
-                    
-                    # Hitta motsvarande modul i listan
-                    for module in self.code_modules:
-                        if module["id"] == widget.module_id:
-                            # Uppdatera kod och andra fält
-                            module["code"] = widget.code_editor.toPlainText()
-                            module["name"] = widget.name_label.text()
-                            module["extension"] = widget.extension_input.text()
-                            module["tags"] = widget.module_data.get("tags", [])
-                            module["file_path"] = str(widget.module_data.get("file_path", ""))
-                            module["modified"] = datetime.now().isoformat()
+            # Säkerställ att öppna editorer har uppdaterat sina moduldata
+            for widget in self.open_editors.values():
+                self.sync_editor_to_module(widget)
             
+            # Ögonblicksbilden tas här; serialisering och skrivning sker på arbetstråden
             file_name = self.json_files[self.current_file_index]
-            with open(file_name, "w", encoding='utf-8') as f:
-                json.dump(self.code_modules, f, indent=4, ensure_ascii=False)
+            snapshot = capture_snapshot(self.code_modules)
+            self.last_save_generation = self.snapshot_writer.submit(file_name, snapshot)
+            self.library_indexer.update_page(file_name, snapshot)
             
-            self.progress_bar.setValue(100)
-            self.status_bar.showMessage(f"Sparad till {file_name}", 3000)
+            # Obestämd progress så länge skrivningen pågår
+            self.progress_bar.setRange(0, 0)
+            self.progress_bar.setVisible(True)
+            self.status_bar.showMessage("Sparar moduler...")
         except Exception as e:
             QMessageBox.critical(self, "Fel vid sparande", str(e))
         finally:
             self.is_saving = False
-            # Dölj progressbar efter en liten fördröjning
-            QTimer.singleShot(1000, lambda: self.progress_bar.setVisible(False))
+    
+    def on_save_finished(self, file_name, generation):
+        """Hantera en avslutad bakgrundssparning."""
+        if not self.snapshot_writer.is_busy(file_name):
+            self.library_indexer.page_saved(file_name)
+        
+        # Äldre sparningar kan bli klara medan en nyare fortfarande väntar
+        if generation != self.last_save_generation or self.snapshot_writer.is_busy():
+            return
+        
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(100)
+        self.status_bar.showMessage(f"Sparad till {file_name}", 3000)
+        # Dölj progressbar efter en liten fördröjning
+        QTimer.singleShot(1000, lambda: self.hide_idle_progress_bar())
+    
+    def on_save_failed(self, file_name, message):
+        """Visa fel från en bakgrundssparning."""
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+        QMessageBox.critical(self, "Fel vid sparande", f"{file_name}: {message}")
+    
+    def on_about_to_quit(self):
+        """Hantera väntande editorändringar och vänta in köade sparningar."""
+        if self.import_generation:
+            self.cancel_import()
+        if self.export_generation:
+            self.cancel_export()
+            self.module_exporter.wait()
+        ChangeScheduler.instance().flush()
+        self.snapshot_writer.wait()
+        self.library_indexer.flush()
+    
+    def hide_idle_progress_bar(self):
+        """Dölj progressbaren om ingen sparning, import eller export längre pågår."""
+        if not self.snapshot_writer.is_busy() and not self.import_generation and not self.export_generation:
+            self.progress_bar.setVisible(False)
     
     def load_data(self, file_name=None):
         """Ladda moduldata från JSON."""
@@ -652,9 +1002,13 @@ class CodeModuleTab(QWidget):
         try:
             # Visa progress
             self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, 100)
             self.progress_bar.setValue(0)
             self.status_bar.showMessage("Laddar moduler...")
             
+            # Vänta in köade sparningar så att sidan inte läses halvskriven
+            self.snapshot_writer.wait()
+            
             with open(file_name, "r", encoding='utf-8') as f:
                 self.code_modules = json.load(f)
             
@@ -663,9 +1017,11 @@ class CodeModuleTab(QWidget):
             # Uppdatera UI
             self.refresh_ui()
             
-            # Uppdatera historik om det inte finns någon
-            if not self.history:
-                self.update_history()
+            # Byt till sidans historik; filen läses först vid ångra/gör om
+            if self.page_history.page_file != file_name:
+                self.page_history = PageHistory(file_name)
+            self.page_history.reset_baseline(self.code_modules)
+            self.cache_current_page()
             
             self.progress_bar.setValue(100)
             self.status_bar.showMessage(f"Laddad från {file_name}", 3000)
@@ -674,58 +1030,161 @@ class CodeModuleTab(QWidget):
         finally:
             self.is_loading = False
             # Dölj progressbar efter en liten fördröjning
-            QTimer.singleShot(1000, lambda: self.progress_bar.setVisible(False))
+            QTimer.singleShot(1000, lambda: self.hide_idle_progress_bar())
+    
+    def show_page_model(self, model):
+        """Visa en sidas listmodell med aktuella filter."""
+        previous = self.module_model
+        self.module_model = model
+        # Rankning från en tidigare sökning på sidan gäller inte längre
+        model.set_ranking(None)
+        self.restart_search()
+        self.apply_model_filter()
+        self.module_list.setModel(model)
+        
+        # Modeller som inte längre ligger i sidcachen behövs inte
+        if previous is not model and not any(entry.get("model") is previous for entry in self.page_cache.values()):
+            previous.deleteLater()
+    
+    def cache_current_page(self):
+        """Lägg aktuell sida med modell och historik i sidcachen."""
+        file_name = self.json_files[self.current_file_index]
+        self.page_cache.put(file_name, {
+            "records": self.code_modules,
+            "model": self.module_model,
+            "history": self.page_history
+        })
+    
+    def discard_current_page(self):
+        """Släpp aktuell sidas editorer och modell utan att cacha dem."""
+        self.close_all_editors()
+        self.page_cache.pop(self.json_files[self.current_file_index])
+        self.show_page_model(ModuleListModel(parent=self))
+    
+    def switch_to_page(self, index, stash_current=True):
+        """Byt sida, från sidcachen om möjligt annars från disk."""
+        if not 0 <= index < len(self.json_files):
+            return
+        if stash_current and index == self.current_file_index:
+            return
+        
+        if stash_current:
+            # En pågående import hör till sidan som lämnas
+            if self.import_generation:
+                self.cancel_import()
+            # Editorerna synkas av save_data och stängs sedan; kortlistan cachas
+            self.save_data()
+            self.close_all_editors()
+            self.cache_current_page()
+        
+        self.current_file_index = index
+        file_name = self.json_files[index]
+        entry = self.page_cache.get(file_name)
+        
+        if entry is not None and entry.get("model") is not None:
+            # Cachad sida: inget behöver läsas eller tolkas om
+            self.code_modules = entry["records"]
+            self.page_history = entry["history"]
+            self.show_page_model(entry["model"])
+            self.update_modules_status()
+            self.update_page_indicator()
+            self.status_bar.showMessage(f"Visar {file_name}", 3000)
+        elif entry is not None and entry.get("records") is not None:
+            # Förladdad sida: posterna finns, bara modellen behöver skapas
+            self.code_modules = entry["records"]
+            self.page_history = PageHistory(file_name)
+            self.page_history.reset_baseline(self.code_modules)
+            self.show_page_model(ModuleListModel(self.code_modules, self))
+            self.refresh_ui()
+            self.cache_current_page()
+            self.status_bar.showMessage(f"Visar {file_name}", 3000)
+        else:
+            self.show_page_model(ModuleListModel(parent=self))
+            self.load_data(file_name)
+        
+        self.prefetch_adjacent_pages()
+    
+    def prefetch_adjacent_pages(self):
+        """Förladda sidorna före och efter aktuell sida i bakgrunden."""
+        for index in (self.current_file_index - 1, self.current_file_index + 1):
+            if 0 <= index < len(self.json_files):
+                file_name = self.json_files[index]
+                # Sidor med köade skrivningar läses hellre när de öppnas
+                if file_name not in self.page_cache and not self.snapshot_writer.is_busy(file_name):
+                    self.page_prefetcher.prefetch(file_name)
+    
+    def on_page_prefetched(self, file_name, records):
+        """Lägg en förladdad sida i cachen."""
+        if file_name not in self.json_files or file_name in self.page_cache:
+            return
+        self.page_cache.put(file_name, {"records": records, "model": None})
+        # Aktuell sida ska alltid vara senast använd
+        self.page_cache.touch(self.json_files[self.current_file_index])
+    
+    def on_page_evicted(self, file_name, entry):
+        """Släpp modell och moduldata för en utträngd sida."""
+        self.module_searcher.forget_page(file_name)
+        model = entry.get("model")
+        if model is not None and model is not self.module_model:
+            model.deleteLater()
+        entry.clear()
+    
+    def apply_model_filter(self):
+        """Sätt aktuella facett- och sökfilter på listmodellen och uppdatera antalen."""
+        allowed_ids = self.module_model.facets.match(self.active_facets, within=self.search_ids)
+        self.module_model.set_filter(None, allowed_ids)
+        self.facet_counts_timer.start()
+    
+    def update_facet_counts(self):
+        """Visa antal träffar per facettvärde givet övriga valda filter."""
+        self.fill_facet_combo(self.category_filter, "category", CATEGORY_FACETS)
+        self.fill_facet_combo(self.language_filter, "language", LANGUAGE_FACETS)
+        
+        # Taggar sorteras efter antal så att de vanligaste föreslås först
+        _, counts = self.module_model.facets.counts("tag", self.active_facets, self.search_ids)
+        self.tag_model.clear()
+        for tag, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+            item = QStandardItem(f"{tag} ({count})")
+            item.setData(tag, Qt.UserRole)
+            self.tag_model.appendRow(item)
+    
+    def fill_facet_combo(self, combo, facet, defaults):
+        """Fyll en facettlista med värden och antal, utan att ändra valet."""
+        total, counts = self.module_model.facets.counts(facet, self.active_facets, self.search_ids)
+        selected = combo.currentData()
+        values = list(defaults) + sorted(value for value in counts if value not in defaults)
+        
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem(f"Alla ({total})", None)
+        for value in values:
+            combo.addItem(f"{value} ({counts.get(value, 0)})", value)
+        combo.setCurrentIndex(max(0, combo.findData(selected)) if selected is not None else 0)
+        combo.blockSignals(False)
     
     def apply_filters(self):
         """Filtrera moduler baserat på kategori, språk och taggar."""
-        selected_category = self.category_filter.currentText()
-        selected_language = self.language_filter.currentText()
+        selected_category = self.category_filter.currentData()
+        selected_language = self.language_filter.currentData()
         tag_filter = self.tag_filter.text().strip().lower()
-
-
-        # Hämta original data om vi har filtrerat
-        if hasattr(self, 'original_modules'):
-            self.code_modules = self.original_modules.copy()
-        else:
-            # Spara originalet första gången vi filtrerar
-            self.original_modules = self.code_modules.copy()
-        
-        # Filtrera baserat på kategori
-        if selected_category != "Alla":
-            self.code_modules = [m for m in self.code_modules if m.get("category", "other") == selected_category]
-        
-        # Filtrera baserat på språk (extrapolerat från filändelse)
-        if selected_language != "Alla":
-            if selected_language == "python":
-                self.code_modules = [m for m in self.code_modules if m.get("extension", "").lower() == ".py"]
-            elif selected_language == "javascript":
-                self.code_modules = [m for m in self.code_modules if m.get("extension", "").lower() in [".js", ".jsx"]]
-            elif selected_language == "html":
-                self.code_modules = [m for m in self.code_modules if m.get("extension", "").lower() in [".html", ".htm"]]
-            elif selected_language == "css":
-                self.code_modules = [m for m in self.code_modules if m.get("extension", "").lower() == ".css"]
-            elif selected_language == "java":
-                self.code_modules = [m for m in self.code_modules if m.get("extension", "").lower() == ".java"]
-            elif selected_language == "cpp":
-                self.code_modules = [m for m in self.code_modules if m.get("extension", "").lower() in [".cpp", ".h", ".c", ".hpp"]]
-        
-        # Filtrera baserat på taggar
-        if tag_filter:
-            self.code_modules = [
-                m for m in self.code_modules 
-                if "tags" in m and any(tag_filter in tag.lower() for tag in m["tags"])
-            ]
         
-        # Uppdatera användargränssnittet
-        self.refresh_ui()
+        self.active_facets = {
+            "category": selected_category,
+            "language": selected_language,
+            "tag": tag_filter or None
+        }
+        
+        # Filtret sätts på modellen som en mängd id:n; postlistan lämnas orörd
+        self.apply_model_filter()
+        self.update_modules_status()
         
         # Visa statusmeddelande
         filter_text = []
         
-        if selected_category != "Alla":
+        if selected_category:
             filter_text.append(f"kategori: {selected_category}")
         
-        if selected_language != "Alla":
+        if selected_language:
             filter_text.append(f"språk: {selected_language}")
         
         if tag_filter:
@@ -737,18 +1196,22 @@ class CodeModuleTab(QWidget):
     
     def clear_filters(self):
         """Rensa alla filter och visa alla moduler."""
-        # Återställ UI-element
-        self.category_filter.setCurrentText("Alla")
-        self.language_filter.setCurrentText("Alla")
+        # Återställ UI-element utan att filtrera en gång per ändring
+        for widget in (self.category_filter, self.language_filter, self.tag_filter, self.global_search_input):
+            widget.blockSignals(True)
+        self.category_filter.setCurrentIndex(0)
+        self.language_filter.setCurrentIndex(0)
         self.tag_filter.clear()
+        self.global_search_input.clear()
+        for widget in (self.category_filter, self.language_filter, self.tag_filter, self.global_search_input):
+            widget.blockSignals(False)
         
-        # Återställ moduldata från originalet om det finns
-        if hasattr(self, 'original_modules'):
-            self.code_modules = self.original_modules.copy()
-            delattr(self, 'original_modules')  # Ta bort originalreferensen
+        self.active_facets = {}
+        self.stop_search()
         
         # Uppdatera UI
-        self.refresh_ui()
+        self.apply_model_filter()
+        self.update_modules_status()
         
         # Visa statusmeddelande
         self.status_bar.showMessage("Filter rensade", 3000)
@@ -763,8 +1226,7 @@ class CodeModuleTab(QWidget):
                 json.dump([], f, indent=4)
             
             self.json_files.append(new_file)
-            self.current_file_index = new_index
-            self.load_data(new_file)
+            self.switch_to_page(new_index)
             
             # Uppdatera sidindikator
             self.update_page_indicator()
@@ -788,13 +1250,17 @@ class CodeModuleTab(QWidget):
         
         if reply == QMessageBox.Yes:
             try:
+                self.snapshot_writer.wait()
                 os.remove(current)
-                self.json_files.pop(self.current_file_index)
+                PageHistory(current).delete()
+                ImportManifest(current).delete()
+                self.library_indexer.remove_page(current)
                 
-                if self.current_file_index >= len(self.json_files):
-                    self.current_file_index = len(self.json_files) - 1
+                # Släpp sidans editorer och cachade modell direkt
+                self.discard_current_page()
+                self.json_files.pop(self.current_file_index)
                 
-                self.load_data(self.json_files[self.current_file_index])
+                self.switch_to_page(min(self.current_file_index, len(self.json_files) - 1), stash_current=False)
                 
                 # Uppdatera sidindikator
                 self.update_page_indicator()
@@ -804,213 +1270,570 @@ class CodeModuleTab(QWidget):
                 QMessageBox.critical(self, "Fel", f"Kunde inte ta bort sidan: {str(e)}")
     
     def search_modules(self):
-        """Sök i modulkod och namn."""
+        """Sök i modulkod och namn; träffarna strömmar in från en arbetstråd."""
+        self.search_debounce_timer.stop()
         term = self.global_search_input.text().strip()
+        if self.library_search_check.isChecked():
+            self.search_library(term)
+            return
         if not term:
-            QMessageBox.warning(self, "Tom Sökning", "Ange en sökterm.")
+            if self.search_ids is not None:
+                self.stop_search()
+                self.apply_model_filter()
+                self.update_modules_status()
             return
         
-        # Spara originalet om det inte redan är sparat
-        if not hasattr(self, 'original_modules'):
-            self.original_modules = self.code_modules.copy()
-        
-        # Sök genom alla moduler
-        matching_modules = []
-        
-        for module in self.original_modules:
-            # Sök i olika fält
-            if (
-                term.lower() in module.get("name", "").lower() or
-                term.lower() in module.get("code", "").lower() or
-                term.lower() in module.get("description", "").lower() or
-                any(term.lower() in tag.lower() for tag in module.get("tags", []))
-            ):
-                matching_modules.append(module)
-        
-        if matching_modules:
-            # Uppdatera listan med matchande moduler
-            self.code_modules = matching_modules
-            self.refresh_ui()
-            self.status_bar.showMessage(f"Hittade {len(matching_modules)} moduler som matchade '{term}'", 3000)
+        self.search_term = term
+        if self.search_ids is None:
+            self.search_ids = set()
+        # Föregående träffar visas tills den nya sökningens första träffar kommer
+        self.search_reset_pending = True
+        self.search_generation = self.module_searcher.search(
+            self.json_files[self.current_file_index], self.code_modules, term
+        )
+        self.status_bar.showMessage(f"Söker efter '{term}'...")
+    
+    def search_library(self, term):
+        """Sök i alla sidor och modulfiler via trigramindexet."""
+        if not term:
+            self.library_indexer.cancel()
+            self.library_results.clear()
+            return
+        self.search_term = term
+        self.library_search_generation = self.library_indexer.search(
+            term, regex=self.regex_search_check.isChecked()
+        )
+    
+    def on_search_scope_changed(self, library):
+        """Växla mellan sökning på aktuell sida och i hela biblioteket."""
+        self.module_list.setVisible(not library)
+        self.library_results.setVisible(library)
+        if library:
+            # Sidans sökfilter gäller inte längre
+            if self.search_ids is not None:
+                self.stop_search()
+                self.apply_model_filter()
+                self.update_modules_status()
+        else:
+            self.library_results.clear()
+        self.search_modules()
+    
+    def on_library_search_finished(self, generation, results):
+        """Visa träffar från sökning i hela biblioteket."""
+        if generation != self.library_search_generation:
+            return
+        
+        self.library_results.clear()
+        if isinstance(results, dict):
+            self.status_bar.showMessage(f"Ogiltigt reguljärt uttryck: {results['error']}", 5000)
+            return
+        
+        line_count = 0
+        for result in results:
+            if result["kind"] == "page":
+                location = f"sida {self.json_files.index(result['source']) + 1}" if result["source"] in self.json_files else result["source"]
+            else:
+                location = result["file_path"]
+            module_item = QTreeWidgetItem([f"{result['name']}  ·  {location}"])
+            module_item.setData(0, Qt.UserRole, (result, None))
+            for match in result["matches"]:
+                if match["line"] is None:
+                    text = f"{FIELD_LABELS.get(match['field'], match['field'])}: {match['text'].strip()}"
+                else:
+                    text = f"{match['line']}: {match['text'].strip()}"
+                    line_count += 1
+                line_item = QTreeWidgetItem([text])
+                line_item.setData(0, Qt.UserRole, (result, match["line"]))
+                # Omgivande rader visas som verktygstips
+                line_item.setToolTip(0, "\n".join(match["before"] + [match["text"]] + match["after"]))
+                module_item.addChild(line_item)
+            self.library_results.addTopLevelItem(module_item)
+            module_item.setExpanded(True)
+        
+        self.status_bar.showMessage(
+            f"Hittade {len(results)} moduler ({line_count} rader) som matchade '{self.search_term}' i hela biblioteket", 3000
+        )
+    
+    def on_library_index_updated(self, count):
+        """Kör om en aktiv bibliotekssökning när indexet uppdaterats."""
+        if self.library_search_check.isChecked() and self.global_search_input.text().strip():
+            self.search_modules()
+    
+    def on_library_result_activated(self, item, column=0):
+        """Öppna modulen för en träff och gå till raden."""
+        result, line = item.data(0, Qt.UserRole)
+        self.open_library_location(result["kind"], result["source"], result["module_id"], result["file_path"], line)
+    
+    def show_quick_open(self):
+        """Visa snabbvalet för moduler, filer och symboler (Ctrl+P)."""
+        if self.quick_open is None:
+            self.quick_open = QuickOpenPalette(self.library_indexer.find_symbols, self)
+            self.quick_open.locationSelected.connect(self.on_quick_open_selected)
+        self.quick_open.popup(self)
+    
+    def on_quick_open_selected(self, entry):
+        kind, name, line, module_name, source, module_id, doc_kind, file_path = entry
+        self.open_library_location(doc_kind, source, module_id, file_path, line)
+    
+    def open_library_location(self, kind, source, module_id, file_path, line=None):
+        """Byt till rätt sida, öppna modulen och gå till raden."""
+        if kind != "page" or source not in self.json_files:
+            self.status_bar.showMessage(f"Filen finns på disk men inte som modul: {file_path}", 5000)
+            return
+        
+        page_index = self.json_files.index(source)
+        if page_index != self.current_file_index:
+            self.switch_to_page(page_index)
+        widget = self.open_module_editor(module_id)
+        if widget is None:
+            self.status_bar.showMessage("Modulen finns inte längre på sidan", 3000)
+            return
+        if line is not None:
+            widget._navigate_to_line(line - 1)
+    
+    def stop_search(self):
+        """Avbryt sökningen och visa alla moduler igen."""
+        self.module_searcher.cancel()
+        self.search_debounce_timer.stop()
+        self.search_ids = None
+        self.search_term = ""
+        self.search_reset_pending = False
+        self.ranking_generation = 0
+        self.module_model.set_ranking(None)
+    
+    def restart_search(self):
+        """Kör om aktiv sökning, t.ex. på en ny sida."""
+        if self.search_ids is not None:
+            # Träffar från förra sidan gäller inte här
+            self.search_ids = set()
+            self.search_modules()
+    
+    def on_search_results(self, generation, module_ids):
+        """Ta emot en omgång sökträffar."""
+        if generation != self.search_generation or self.search_ids is None:
+            return
+        
+        if self.search_reset_pending:
+            self.search_reset_pending = False
+            self.search_ids = set(module_ids)
+            # Nya träffar visas i sidordning tills de rankats
+            self.ranking_generation = 0
+            self.module_model.set_ranking(None)
+            self.apply_model_filter()
         else:
-            QMessageBox.information(self, "Inga resultat", f"Inga moduler matchade söktermen '{term}'.")
+            self.search_ids.update(module_ids)
+            facet_ids = self.module_model.facets.match(self.active_facets)
+            self.module_model.extend_filter(module_ids if facet_ids is None else facet_ids.intersection(module_ids))
+        self.update_modules_status()
+    
+    def on_search_finished(self, generation, match_count):
+        """Avsluta en sökning och visa resultatet."""
+        if generation != self.search_generation or self.search_ids is None:
+            return
+        
+        if self.search_reset_pending:
+            # Inga träffar alls
+            self.search_reset_pending = False
+            self.search_ids = set()
+            self.apply_model_filter()
+        self.facet_counts_timer.start()
+        self.update_modules_status()
+        
+        if match_count:
+            # Träffarna sorteras efter relevans (BM25) när rankningen är klar
+            self.ranking_generation = self.library_indexer.rank_page(
+                self.json_files[self.current_file_index], self.search_term, self.search_ids
+            )
+            self.status_bar.showMessage(f"Hittade {match_count} moduler som matchade '{self.search_term}'", 3000)
+        else:
+            self.status_bar.showMessage(f"Inga moduler matchade söktermen '{self.search_term}'", 3000)
+    
+    def on_ranking_ready(self, generation, scores):
+        """Sortera sidans sökträffar efter relevans."""
+        if generation != self.ranking_generation or self.search_ids is None or self.search_reset_pending:
+            return
+        self.module_model.set_ranking(scores)
     
     def import_all_modules(self):
-        """Importera alla moduler från en katalog."""
+        """
+        Importera alla moduler från en katalog; filerna läses i bakgrunden.
+        En katalog som importerats till sidan tidigare kan synkroniseras:
+        bara nya och ändrade filer läses, befintliga moduler uppdateras och
+        moduler vars fil försvunnit flaggas.
+        """
         directory = QFileDialog.getExistingDirectory(self, "Välj Katalog med Kodmoduler")
         if not directory:
             return
-        
+        self.import_from_source(directory)
+    
+    def import_archive(self):
+        """Importera moduler direkt från ett zip- eller tar-arkiv, utan att packa upp det."""
+        archive_path, _ = QFileDialog.getOpenFileName(
+            self, "Välj Arkiv med Kodmoduler", "",
+            "Arkiv (*.zip *.tar *.tar.gz *.tgz *.tar.xz *.txz *.tar.bz2)"
+        )
+        if not archive_path:
+            return
+        self.import_from_source(archive_path)
+    
+    def import_from_source(self, source):
+        """Importera från en katalog eller ett arkiv."""
+        if os.path.isfile(source) and is_archive(source):
+            self.begin_import(source, lambda manifest: self.module_importer.start_archive(source, manifest=manifest))
+        else:
+            self.begin_import(source, lambda manifest: self.module_importer.start(source, manifest=manifest))
+    
+    def import_from_git(self):
+        """
+        Importera moduler från en revision i ett lokalt git-förråd. Trädet
+        läses direkt ur förrådet, så arbetskatalogen och dess skräp rörs inte.
+        """
+        repository = QFileDialog.getExistingDirectory(self, "Välj Git-förråd")
+        if not repository:
+            return
+        revision, ok = QInputDialog.getText(self, "Revision", "Gren, tagg eller commit att importera:", text="HEAD")
+        revision = revision.strip()
+        if not ok or not revision:
+            return
+        # Blob-id:n används som hash, så git-importer har ett eget manifest skilt från katalogens
+        self.begin_import(
+            os.path.join(repository, ".git"),
+            lambda manifest: self.module_importer.start_git(repository, revision, manifest=manifest)
+        )
+    
+    def begin_import(self, source, start):
+        """
+        Fråga om synkronisering eller rensning och starta importen.
+        start(manifest) startar importören och returnerar generationen.
+        """
         try:
-            # Visa progress
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-            self.status_bar.showMessage("Importerar moduler...")
+            manifest = ImportManifest(self.json_files[self.current_file_index])
+            previous = manifest.entries(source)
+            sync = False
+            if previous:
+                reply = QMessageBox.question(
+                    self, "Synkronisera?",
+                    "Källan har importerats till sidan tidigare. Vill du synkronisera "
+                    "och bara läsa in nya och ändrade filer?\n\nNej importerar allt på nytt.",
+                    QMessageBox.Yes | QMessageBox.No
+                )
+                sync = reply == QMessageBox.Yes
             
-            # Scanna genom alla filer i katalogen
-            file_count = 0
-            imported_count = 0
-            
-            # Rensa nuvarande moduler om användaren vill det
-            reply = QMessageBox.question(
-                self, "Rensa befintliga?", 
-                "Vill du rensa befintliga moduler före import?",
-                QMessageBox.Yes | QMessageBox.No
-            )
+            clear = False
+            if not sync:
+                # Rensa nuvarande moduler om användaren vill det
+                reply = QMessageBox.question(
+                    self, "Rensa befintliga?", 
+                    "Vill du rensa befintliga moduler före import?",
+                    QMessageBox.Yes | QMessageBox.No
+                )
+                clear = reply == QMessageBox.Yes
             
-            if reply == QMessageBox.Yes:
+            if self.import_generation:
+                self.cancel_import()
+            if clear:
                 self.code_modules = []
+                self.refresh_ui()
+                manifest.clear()
+            if sync:
+                # Öppna editorer får inte skriva tillbaka gammal kod över uppdaterade moduler
+                ChangeScheduler.instance().flush()
+                for widget in self.open_editors.values():
+                    self.sync_editor_to_module(widget)
             
-            next_id = max([int(m["id"]) for m in self.code_modules] + [-1]) + 1
+            self.import_manifest = manifest
+            self.import_directory = source
+            # Posterna kopieras; manifestet jämför med dem när importen är klar
+            self.import_entries = {rel_path: dict(entry) for rel_path, entry in previous.items()} if sync else {}
+            self.import_sync = sync
+            self.import_deleted = []
+            self.import_found = 0
+            self.import_done = 0
+            self.import_failed = 0
+            self.import_skipped = 0
+            self.import_unchanged = 0
+            self.import_imported = 0
+            self.import_updated = 0
+            self.import_flagged = 0
+            self.import_total = None
+            self.import_cleared = clear
             
-            # Rekursiv traversering av mappstruktur
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    file_count += 1
-                    file_path = os.path.join(root, file)
-                    
-                    # Kontrollera filändelse för att hitta kodfiler
-                    _, ext = os.path.splitext(file)
-                    if ext.lower() in ['.py', '.js', '.html', '.css', '.cpp', '.h', '.java', '.jsx']:
-                        try:
-                            # Läs filen
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                code = f.read()
-                            
-                            # Bestäm kategori baserat på katalogstruktur
-                            rel_path = os.path.relpath(root, directory)
-                            category_name = rel_path.split(os.sep)[0] if rel_path != '.' else "other"
-                            if category_name not in ["ui", "utils", "data", "network", "db", "ai", "algorithms", "other"]:
-                                category_name = "other"
-                            
-                            # Bestäm namn baserat på filnamn
-                            module_name = os.path.splitext(file)[0]
-                            
-                            # Skapa moduldata
-                            module_data = {
-                                "id": str(next_id),
-                                "name": module_name,
-                                "extension": ext,
-                                "code": code,
-                                "tags": [],
-                                "category": category_name,
-                                "created": datetime.now().isoformat(),
-                                "modified": datetime.now().isoformat(),
-                                "description": f"Importerad från {file_path}",
-                                "file_path": file_path,
-                                "auto_save": True
-                            }
-                            
-                            # Lägg till modulen
-                            self.code_modules.append(module_data)
-                            imported_count += 1
-                            next_id += 1
-                            
-                            # Uppdatera progress
-                            if file_count % 10 == 0:
-                                self.progress_bar.setValue(min(90, int(file_count / (file_count + 10) * 100)))
-                                QApplication.processEvents()
-                            
-                        except Exception as e:
-                            print(f"Kunde inte importera {file_path}: {e}")
+            # Visa progress; totalen är okänd tills de första filerna hittats
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, 0)
+            self.cancel_import_btn.setVisible(True)
+            self.status_bar.showMessage("Synkroniserar moduler..." if sync else "Importerar moduler...")
             
-            # Uppdatera UI och spara
-            self.refresh_ui()
+            self.import_generation = start(previous if sync else None)
+        except Exception as e:
+            QMessageBox.critical(self, "Fel vid import", str(e))
+    
+    def on_import_files_found(self, generation, count):
+        if generation != self.import_generation:
+            return
+        self.import_found = count
+        self.update_import_progress()
+    
+    def on_import_walk_finished(self, generation, total, skipped, unchanged, deleted):
+        if generation != self.import_generation:
+            return
+        self.import_found = total
+        self.import_total = total
+        self.import_skipped = skipped
+        self.import_unchanged += unchanged
+        self.import_deleted = deleted
+        self.update_import_progress()
+        self.check_import_finished()
+    
+    def on_import_modules_read(self, generation, modules, failed):
+        """Ta emot lästa filer; de läggs in i listan samlat."""
+        if generation != self.import_generation:
+            return
+        self.import_pending.extend(modules)
+        self.import_done += len(modules) + failed
+        self.import_failed += failed
+        if not self.import_flush_timer.isActive():
+            self.import_flush_timer.start()
+        self.check_import_finished()
+    
+    def on_import_error(self, generation, message):
+        if generation != self.import_generation:
+            return
+        self.finish_import(cancelled=True)
+        QMessageBox.critical(self, "Fel vid import", message)
+    
+    def update_import_progress(self):
+        """Visa hur många av de hittade filerna som lästs."""
+        total = self.import_total if self.import_total is not None else self.import_found
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(self.import_done)
+        suffix = "" if self.import_total is not None else " (söker fler...)"
+        self.status_bar.showMessage(f"Importerar: {self.import_done} av {total} filer{suffix}")
+    
+    def flush_imported_modules(self):
+        """Lägg in lästa moduler i listan i en enda insättning och uppdatera befintliga."""
+        self.import_flush_timer.stop()
+        if not self.import_pending:
+            return
+        
+        next_id = int(self.next_module_id())
+        now = datetime.now().isoformat()
+        modules_by_id = None
+        batch = []
+        for imported in self.import_pending:
+            rel_path = imported["rel_path"]
+            known = self.import_entries.get(rel_path)
+            entry = {"size": imported["size"], "mtime_ns": imported["mtime_ns"], "hash": imported["hash"]}
+            
+            if imported.get("unchanged"):
+                # Bara mtime skiljer; modulen behöver inte röras
+                known.update(entry)
+                self.import_unchanged += 1
+                continue
+            
+            module = None
+            if known is not None:
+                if modules_by_id is None:
+                    modules_by_id = {m["id"]: m for m in self.code_modules}
+                module = modules_by_id.get(known.get("id"))
+            
+            if module is not None:
+                self.update_imported_module(module, imported, now)
+                entry["id"] = module["id"]
+            else:
+                entry["id"] = str(next_id)
+                batch.append({
+                    "id": str(next_id),
+                    "name": imported["name"],
+                    "extension": imported["extension"],
+                    "code": imported["code"],
+                    "tags": [],
+                    "category": imported["category"],
+                    "created": now,
+                    "modified": now,
+                    "description": f"Importerad från {imported['origin']}",
+                    "file_path": imported["file_path"],
+                    "auto_save": True
+                })
+                next_id += 1
+            self.import_entries[rel_path] = entry
+        self.import_pending = []
+        
+        if batch:
+            self.code_modules.extend(batch)
+            self.module_model.modules_added(batch)
+            self.import_imported += len(batch)
+        self.facet_counts_timer.start()
+        self.update_import_progress()
+        self.update_modules_status()
+    
+    def update_imported_module(self, module, imported, now):
+        """Skriv in ny kod från källan i en befintlig modul."""
+        module["code"] = imported["code"]
+        module["file_path"] = imported["file_path"]
+        module["modified"] = now
+        if DELETED_TAG in module.get("tags", []):
+            module["tags"] = [tag for tag in module["tags"] if tag != DELETED_TAG]
+        self.module_model.module_changed(module["id"])
+        self.import_updated += 1
+        
+        widget = self.open_editors.get(module["id"])
+        if widget is not None:
+            was_loading = self.is_loading
+            self.is_loading = True
+            try:
+                widget.bind_module(module["id"], module)
+            finally:
+                self.is_loading = was_loading
+    
+    def flag_deleted_sources(self):
+        """Tagga moduler vars källfil inte längre finns kvar i katalogen."""
+        modules_by_id = {m["id"]: m for m in self.code_modules}
+        for rel_path in self.import_deleted:
+            known = self.import_entries.get(rel_path)
+            if known is None:
+                continue
+            known["deleted"] = True
+            module = modules_by_id.get(known.get("id"))
+            if module is None or DELETED_TAG in module.get("tags", []):
+                continue
+            module["tags"] = module.get("tags", []) + [DELETED_TAG]
+            self.module_model.module_changed(module["id"])
+            self.import_flagged += 1
+    
+    def check_import_finished(self):
+        if self.import_total is not None and self.import_done >= self.import_total:
+            self.finish_import()
+    
+    def cancel_import(self):
+        """Avbryt importen; redan lästa moduler behålls."""
+        if not self.import_generation:
+            return
+        self.module_importer.cancel()
+        self.finish_import(cancelled=True)
+    
+    def finish_import(self, cancelled=False):
+        """Lägg in sista omgången, spara manifestet och återställ förloppet."""
+        self.flush_imported_modules()
+        if not cancelled:
+            self.flag_deleted_sources()
+        self.import_generation = 0
+        self.cancel_import_btn.setVisible(False)
+        
+        # Även en avbruten import sparar det som hann läsas, så nästa synkronisering fortsätter där
+        if self.import_sync or self.import_entries:
+            self.import_manifest.set_entries(self.import_directory, self.import_entries)
+        
+        if self.import_imported or self.import_updated or self.import_flagged or self.import_cleared:
+            self.facet_counts_timer.start()
             self.update_history()
             self.save_data()
-            
-            self.progress_bar.setValue(100)
-            self.status_bar.showMessage(
-                f"Import klar. Importerade {imported_count} av {file_count} filer.", 5000
+        
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(100)
+        total = self.import_total if self.import_total is not None else self.import_found
+        if self.import_sync:
+            message = "Synkronisering avbruten" if cancelled else "Synkronisering klar"
+            message += (
+                f": {self.import_imported} nya, {self.import_updated} uppdaterade, "
+                f"{self.import_flagged} borttagna i källan, {self.import_unchanged} oförändrade."
             )
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Fel vid import", str(e))
-        finally:
-            # Dölj progressbar efter en liten fördröjning
-            QTimer.singleShot(1000, lambda: self.progress_bar.setVisible(False))
+        elif cancelled:
+            message = f"Import avbruten. Importerade {self.import_imported} av {total} filer."
+        else:
+            message = f"Import klar. Importerade {self.import_imported} av {total} filer."
+        if self.import_skipped:
+            message += f" {self.import_skipped} för stora filer hoppades över."
+        self.status_bar.showMessage(message, 5000)
+        # Dölj progressbar efter en liten fördröjning
+        QTimer.singleShot(1000, lambda: self.hide_idle_progress_bar())
     
     def export_all_modules(self):
-        """Exportera alla moduler till en katalog."""
+        """Exportera alla moduler till en katalog; oförändrade filer skrivs inte om."""
         directory = QFileDialog.getExistingDirectory(self, "Välj Katalog för Export")
         if not directory:
             return
-        
+        self.start_export(lambda records: self.module_exporter.export_directory(records, directory))
+    
+    def export_modules_to_zip(self):
+        """Exportera alla moduler direkt till ett zip-arkiv."""
+        archive_path, _ = QFileDialog.getSaveFileName(
+            self, "Exportera som zip", "code_modules.zip", "Zip-arkiv (*.zip)"
+        )
+        if not archive_path:
+            return
+        if not archive_path.lower().endswith(".zip"):
+            archive_path += ".zip"
+        self.start_export(lambda records: self.module_exporter.export_zip(records, archive_path))
+    
+    def start_export(self, start):
+        """Ta en ögonblicksbild av modulerna och låt exportören skriva dem i bakgrunden."""
         try:
-            # Visa progress
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-            self.status_bar.showMessage("Exporterar moduler...")
+            if self.export_generation:
+                self.cancel_export()
             
-            # Uppdatera moduldata från widgets
-            for i in range(self.modules_layout.count()):
-                widget_item = self.modules_layout.itemAt(i)
-                if widget_item and isinstance(widget_item.widget(), CodeModuleWidget):
-                    widget = widget_item.widget()
-                    for module in self.code_modules:
-                        if module["id"] == widget.module_id:
-                            module["code"] = widget.code_editor.toPlainText()
-                            module["name"] = widget.name_label.text()
-                            module["extension"] = widget.extension_input.text()
-                            module["tags"] = widget.tags
+            # Uppdatera moduldata från öppna editorer
+            for widget in self.open_editors.values():
+                self.sync_editor_to_module(widget)
             
-            # Exportera alla moduler
-            module_count = len(self.code_modules)
-            exported_count = 0
+            self.export_module_count = len(self.code_modules)
             
-            for i, module in enumerate(self.code_modules):
-                # Uppdatera progress
-                self.progress_bar.setValue(int((i / module_count) * 100))
-                QApplication.processEvents()
-                
-                # Hoppa över tomma moduler
-                if not module.get("code", "").strip():
-                    continue
-                
-                # Skapa underkatalog baserat på kategori
-                category_dir = os.path.join(directory, module.get("category", "other"))
-                os.makedirs(category_dir, exist_ok=True)
-                
-                # Generera filnamn
-                extension = module.get("extension", ".py")
-                if not extension.startswith('.'):
-                    extension = '.' + extension
-                
-                filename = module.get("name", f"module_{module['id']}") + extension
-                file_path = os.path.join(category_dir, filename)
-                
-                # Kontrollera om filen redan finns
-                if os.path.exists(file_path):
-                    # Lägg till ett suffix för att undvika konflikter
-                    base_name = os.path.splitext(filename)[0]
-                    counter = 1
-                    while os.path.exists(file_path):
-                        new_name = f"{base_name}_{counter}{extension}"
-                        file_path = os.path.join(category_dir, new_name)
-                        counter += 1
-                
-                # Spara filen
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(module["code"])
-                
-                exported_count += 1
-            
-            self.progress_bar.setValue(100)
-            self.status_bar.showMessage(
-                f"Export klar. Exporterade {exported_count} av {module_count} moduler.", 5000
-            )
+            # Visa progress
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, 0)
+            self.cancel_export_btn.setVisible(True)
+            self.status_bar.showMessage("Exporterar moduler...")
             
+            self.export_generation = start(export_records(self.code_modules))
         except Exception as e:
             QMessageBox.critical(self, "Fel vid export", str(e))
-        finally:
-            # Dölj progressbar efter en liten fördröjning
-            QTimer.singleShot(1000, lambda: self.progress_bar.setVisible(False))
+    
+    def on_export_progress(self, generation, done, total):
+        if generation != self.export_generation:
+            return
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+        self.status_bar.showMessage(f"Exporterar: {done} av {total} moduler")
+    
+    def on_export_finished(self, generation, written, unchanged, failed):
+        if generation != self.export_generation:
+            return
+        exported = written + unchanged
+        message = f"Export klar. Exporterade {exported} av {self.export_module_count} moduler."
+        if unchanged:
+            message += f" {unchanged} var oförändrade och skrevs inte om."
+        if failed:
+            message += f" {failed} kunde inte skrivas."
+        self.end_export(message)
+    
+    def on_export_error(self, generation, message):
+        if generation != self.export_generation:
+            return
+        self.end_export("Export misslyckades.")
+        QMessageBox.critical(self, "Fel vid export", message)
+    
+    def cancel_export(self):
+        """Avbryt exporten; filer som redan skrivits ligger kvar."""
+        if not self.export_generation:
+            return
+        self.module_exporter.cancel()
+        self.end_export("Export avbruten.")
+    
+    def end_export(self, message):
+        self.export_generation = 0
+        self.cancel_export_btn.setVisible(False)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(100)
+        self.status_bar.showMessage(message, 5000)
+        # Dölj progressbar efter en liten fördröjning
+        QTimer.singleShot(1000, lambda: self.hide_idle_progress_bar())
     
     def scan_for_modules(self):
         """Scanna efter kodfiler i modulkatalogen och lägg till dem."""
         try:
             # Visa progress
             self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, 100)
             self.progress_bar.setValue(0)
             self.status_bar.showMessage("Scannar efter moduler...")
             
@@ -1027,7 +1850,7 @@ class CodeModuleTab(QWidget):
             
             # Lägg till nya moduler
             new_count = 0
-            next_id = max([int(m["id"]) for m in self.code_modules] + [-1]) + 1
+            next_id = int(self.next_module_id())
             
             for discovered in discovered_modules:
                 if discovered["path"] not in existing_paths:
@@ -1067,48 +1890,58 @@ class CodeModuleTab(QWidget):
             QMessageBox.critical(self, "Fel vid scanning", str(e))
         finally:
             # Dölj progressbar efter en liten fördröjning
-            QTimer.singleShot(1000, lambda: self.progress_bar.setVisible(False))
+            QTimer.singleShot(1000, lambda: self.hide_idle_progress_bar())
     
-    def auto_scan_for_modules(self):
-        """Autoscan för nya moduler i bakgrunden."""
-        # Hoppa över om vi håller på att ladda eller spara
+    def auto_scan_for_modules(self, created=(), changed=(), deleted=()):
+        """Lägg till moduler för filer som dykt upp på disk; bara de ändrade sökvägarna läses."""
+        if created or changed or deleted:
+            self.library_indexer.files_changed(list(created) + list(changed), deleted)
+        
+        self.pending_scan_paths.update(created)
+        self.pending_scan_paths.update(changed)
+        self.pending_scan_paths.difference_update(deleted)
+        # Vänta tills sidan laddats eller sparats klart
         if self.is_loading or self.is_saving:
+            QTimer.singleShot(500, lambda: self.auto_scan_for_modules())
+            return
+        if not self.pending_scan_paths:
             return
         
         try:
-            # Hämta befintliga filsökvägar för att undvika dubbletter
-            existing_paths = [
-                module.get("file_path", "") for module in self.code_modules
-            ]
-            
-            # Hämta alla moduler via modulhanteraren
-            discovered_modules = self.module_manager.list_modules()
+            # Befintliga filsökvägar på sidan för att undvika dubbletter
+            existing_paths = {
+                os.path.normpath(module["file_path"]) for module in self.code_modules if module.get("file_path")
+            }
+            paths = sorted(path for path in self.pending_scan_paths if path not in existing_paths)
+            self.pending_scan_paths.clear()
             
             # Lägg till nya moduler
             new_count = 0
-            next_id = max([int(m["id"]) for m in self.code_modules] + [-1]) + 1
+            next_id = int(self.next_module_id())
             
-            for discovered in discovered_modules:
-                if discovered["path"] and discovered["path"] not in existing_paths:
-                    # Skapa en ny modul
-                    module_data = {
-                        "id": str(next_id),
-                        "name": discovered["name"],
-                        "extension": discovered["extension"],
-                        "code": discovered["code"],
-                        "tags": [],
-                        "category": "other",  # Standard-kategori
-                        "created": datetime.now().isoformat(),
-                        "modified": datetime.now().isoformat(),
-                        "description": f"Automatiskt upptäckt: {discovered['path']}",
-                        "file_path": discovered["path"],
-                        "auto_save": True
-                    }
-                    
-                    # Lägg till modulen i listan
-                    self.code_modules.append(module_data)
-                    new_count += 1
-                    next_id += 1
+            for path in paths:
+                discovered = self.module_manager.load_module(path)
+                if not discovered:
+                    continue
+                # Skapa en ny modul
+                module_data = {
+                    "id": str(next_id),
+                    "name": discovered["name"],
+                    "extension": discovered["extension"],
+                    "code": discovered["code"],
+                    "tags": [],
+                    "category": "other",  # Standard-kategori
+                    "created": datetime.now().isoformat(),
+                    "modified": datetime.now().isoformat(),
+                    "description": f"Automatiskt upptäckt: {discovered['path']}",
+                    "file_path": discovered["path"],
+                    "auto_save": True
+                }
+                
+                # Lägg till modulen i listan
+                self.code_modules.append(module_data)
+                new_count += 1
+                next_id += 1
             
             # Uppdatera UI om vi hittade några nya moduler
             if new_count > 0:
@@ -10,11 +10,11 @@ import hashlib
 from datetime import datetime
 from pathlib import Path
 
-from PySide6.QtCore import Qt, Signal, QMimeData, QPoint, QTimer, QUrl, QSize
+from PySide6.QtCore import Qt, Signal, QObject, QMimeData, QPoint, QTimer, QUrl, QSize
 from PySide6.QtGui import (
     QFont, QAction, QKeySequence, QDrag, QIcon, QColor, QSyntaxHighlighter, 
     QTextCharFormat, QTextCursor, QPalette, QTextDocument, QKeyEvent, QPainter,
-    QTextFormat
+    QTextFormat, QTextLayout
 )
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit,
@@ -25,26 +25,191 @@ from PySide6.QtWidgets import (
     QWidgetAction
 )
 
+from ui.change_scheduler import ChangeScheduler
+from ui.tree_reconciler import node, reconcile_tree
+from utils.structure_parser import StructureParser, line_offsets, parse_structure, shift_structure
+
+# Dokument över någon av gränserna öppnas i läget för stora filer
+LARGE_FILE_CHARS = 2 * 1024 * 1024
+LARGE_FILE_LINES = 50000
+# Ungefär så många tecken läses in per händelseloopvarv i läget för stora filer
+LOAD_CHUNK_CHARS = 256 * 1024
+
+def is_large_text(text):
+    """Om texten är så stor att editorn ska öppna den i läget för stora filer"""
+    return len(text) > LARGE_FILE_CHARS or text.count("\n") >= LARGE_FILE_LINES
+
+def document_position(text, index):
+    """Dokumentposition för ett index i text; Qt räknar tecken utanför BMP som två"""
+    if text.isascii():
+        return index
+    return len(text[:index].encode("utf-16-le")) // 2
+
+def compile_tokens(patterns, first_chars):
+    """
+    Slå ihop tokenmönster till ett uttryck. Ordningen avgör när flera
+    tokentyper börjar på samma position; lookahead på möjliga första tecken
+    låter re hoppa förbi mellanrum och skiljetecken utan att pröva varje mönster.
+    """
+    return re.compile("(?=[" + first_chars + "])(?:" + "|".join(patterns) + ")")
+
+def scan_block(rules, text, state, set_format):
+    """
+    Markera ett textblock med ett språks regler via set_format(start,
+    längd, format). state är föregående blocks tillstånd; returnerar
+    blockets eget, som är skilt från 0 om en flerradig sträng eller
+    kommentar fortsätter på nästa rad.
+    """
+    multiline_states = rules["multiline_states"]
+    position = 0
+    if state in multiline_states:
+        position = _continue_multiline(multiline_states[state], text, 0, 0, set_format)
+        if position < 0:
+            return state
+    token_pattern = rules["token_pattern"]
+    if token_pattern is None:
+        return 0
+    
+    search = token_pattern.search
+    formats = rules["formats"]
+    multiline = rules["multiline"]
+    while True:
+        match = search(text, position)
+        if match is None:
+            return 0
+        kind = match.lastgroup
+        start, position = match.span()
+        if kind in multiline:
+            state = multiline[kind]
+            position = _continue_multiline(multiline_states[state], text, start, position, set_format)
+            if position < 0:
+                return state
+        elif kind == "define":
+            deftype = match.group("deftype")
+            set_format(start, len(deftype), formats["keyword"])
+            name_start = match.start("defname")
+            set_format(name_start, position - name_start, rules["define_formats"][deftype])
+        else:
+            set_format(start, position - start, formats[kind])
+
+def _continue_multiline(end_rule, text, start, position, set_format):
+    """
+    Markera en flerradig sträng eller kommentar från start. Returnerar
+    positionen efter slutet, eller -1 om den fortsätter på nästa rad.
+    """
+    end_pattern, format = end_rule
+    match = end_pattern.match(text, position)
+    if match is None:
+        set_format(start, len(text) - start, format)
+        return -1
+    set_format(start, match.end() - start, format)
+    return match.end()
+
 class SyntaxHighlighter(QSyntaxHighlighter):
-    """Basklassen för syntaxmarkering"""
+    """
+    Basklassen för syntaxmarkering. Underklasser beskriver språket med ett
+    enda sammanslaget reguljärt uttryck där varje namngiven grupp är en
+    tokentyp, så varje block gås igenom en gång från vänster till höger.
+    Strängar och kommentarer som fortsätter på nästa rad sparas som
+    blocktillstånd; Qt markerar då bara om följande block när tillståndet ändras.
+    Reglerna kompileras en gång per språk och delas av alla instanser.
+    """
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.highlight_rules = []
-        self.setup_rules()
-    
-    def setup_rules(self):
+        self.rules = self.shared_rules()
+    
+    @classmethod
+    def shared_rules(cls):
+        """Språkets kompilerade regler; byggs först när språket används"""
+        rules = cls.__dict__.get("_rules")
+        if rules is None:
+            rules = cls.setup_rules()
+            cls._rules = rules
+        return rules
+    
+    @classmethod
+    def setup_rules(cls):
         """Överskuggas i underklasser för att definiera språkspecifika regler"""
-        pass
+        return {"token_pattern": None, "formats": {}, "define_formats": {}, "multiline": {}, "multiline_states": {}}
     
     def highlightBlock(self, text):
         """Applicera markeringsregler på textblocket"""
-        for pattern, format in self.highlight_rules:
-            for match in pattern.finditer(text):
-                self.setFormat(match.start(), match.end() - match.start(), format)
+        self.setCurrentBlockState(scan_block(self.rules, text, self.previousBlockState(), self.setFormat))
+
+class ViewportHighlighter(QObject):
+    """
+    Syntaxmarkering för stora dokument: ett block markeras först när det
+    syns. Markerade block och deras tillstånd sparas per blocknummer och
+    glöms från den position där dokumentet ändras. Ett block vars
+    föregångare aldrig markerats antas börja utanför flerradiga strängar
+    och kommentarer.
+    """
+    def __init__(self, editor, highlighter_class):
+        super().__init__(editor)
+        self.editor = editor
+        self.highlighter_class = highlighter_class
+        self.rules = highlighter_class.shared_rules()
+        self.states = {}   # blocknummer -> tillstånd
+        
+        # Samlar ihop rullningar till en markering per händelseloopvarv
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.highlight_visible)
+        editor.updateRequest.connect(self.schedule)
+        editor.document().contentsChange.connect(self.forget_from)
+        self.schedule()
+    
+    def schedule(self, *args):
+        if not self.timer.isActive():
+            self.timer.start()
+    
+    def stop(self):
+        """Sluta markera, t.ex. när editorn lämnar läget för stora filer"""
+        self.timer.stop()
+        self.editor.updateRequest.disconnect(self.schedule)
+        self.editor.document().contentsChange.disconnect(self.forget_from)
+    
+    def forget_from(self, position, removed, added):
+        """Block från en ändrad position och framåt måste markeras om"""
+        if not removed and not added:
+            # Formatändringar, t.ex. från markeringen själv
+            return
+        first = self.editor.document().findBlock(position).blockNumber()
+        self.states = {number: state for number, state in self.states.items() if number < first}
+        self.schedule()
+    
+    def highlight_visible(self):
+        """Markera de synliga block som inte markerats tidigare"""
+        editor = self.editor
+        document = editor.document()
+        block = editor.firstVisibleBlock()
+        top = editor.blockBoundingGeometry(block).translated(editor.contentOffset()).top()
+        height = editor.viewport().height()
+        
+        while block.isValid() and top <= height:
+            number = block.blockNumber()
+            if number not in self.states:
+                ranges = []
+                
+                def set_format(start, length, format):
+                    format_range = QTextLayout.FormatRange()
+                    format_range.start = start
+                    format_range.length = length
+                    format_range.format = format
+                    ranges.append(format_range)
+                
+                state = scan_block(self.rules, block.text(), self.states.get(number - 1, 0), set_format)
+                block.layout().setFormats(ranges)
+                document.markContentsDirty(block.position(), block.length())
+                self.states[number] = state
+            top += editor.blockBoundingRect(block).height()
+            block = block.next()
 
 class PythonSyntaxHighlighter(SyntaxHighlighter):
     """Syntaxmarkering för Python-kod"""
-    def setup_rules(self):
+    @classmethod
+    def setup_rules(cls):
         # Keyword format
         keyword_format = QTextCharFormat()
         keyword_format.setForeground(QColor("#569CD6"))
@@ -56,47 +221,32 @@ class PythonSyntaxHighlighter(SyntaxHighlighter):
             "nonlocal", "not", "or", "pass", "raise", "return", "True",
             "try", "while", "with", "yield", "async", "await", "self"
         ]
-        for word in keywords:
-            pattern = r'\b' + word + r'\b'
-            self.highlight_rules.append((re.compile(pattern), keyword_format))
         
         # String format
         string_format = QTextCharFormat()
         string_format.setForeground(QColor("#CE9178"))
-        self.highlight_rules.append((re.compile(r'"[^"\\]*(\\.[^"\\]*)*"'), string_format))
-        self.highlight_rules.append((re.compile(r"'[^'\\]*(\\.[^'\\]*)*'"), string_format))
-        self.highlight_rules.append((re.compile(r'""".*?"""', re.DOTALL), string_format))
-        self.highlight_rules.append((re.compile(r"'''.*?'''", re.DOTALL), string_format))
         
         # Comment format
         comment_format = QTextCharFormat()
         comment_format.setForeground(QColor("#6A9955"))
-        self.highlight_rules.append((re.compile(r'#[^\n]*'), comment_format))
         
         # Function format
         function_format = QTextCharFormat()
         function_format.setForeground(QColor("#DCDCAA"))
         function_format.setFontWeight(QFont.Bold)
-        self.highlight_rules.append((re.compile(r'\bdef\s+([a-zA-Z_][a-zA-Z0-9_]*)\b'), function_format))
         
         # Class format
         class_format = QTextCharFormat()
         class_format.setForeground(QColor("#4EC9B0"))
         class_format.setFontWeight(QFont.Bold)
-        self.highlight_rules.append((re.compile(r'\bclass\s+([a-zA-Z_][a-zA-Z0-9_]*)\b'), class_format))
         
         # Decorator format
         decorator_format = QTextCharFormat()
         decorator_format.setForeground(QColor("#C586C0"))
-        self.highlight_rules.append((re.compile(r'@[a-zA-Z_][a-zA-Z0-9_\.]*'), decorator_format))
         
         # Number format
         number_format = QTextCharFormat()
         number_format.setForeground(QColor("#B5CEA8"))
-        self.highlight_rules.append((re.compile(r'\b[0-9]+\b'), number_format))
-        self.highlight_rules.append((re.compile(r'\b0[xX][0-9a-fA-F]+\b'), number_format))
-        self.highlight_rules.append((re.compile(r'\b[0-9]+\.[0-9]*\b'), number_format))
-        self.highlight_rules.append((re.compile(r'\b\.[0-9]+\b'), number_format))
         
         # Built-in functions format
         builtin_format = QTextCharFormat()
@@ -112,12 +262,41 @@ class PythonSyntaxHighlighter(SyntaxHighlighter):
             "slice", "sorted", "staticmethod", "str", "sum", "super", "tuple", "type",
             "vars", "zip", "__import__"
         ]
-        builtin_pattern = r'\b(' + '|'.join(builtins) + r')\b'
-        self.highlight_rules.append((re.compile(builtin_pattern), builtin_format))
+        
+        prefix = r'(?:\b[rRbBuUfF]{1,2})?'
+        token_pattern = compile_tokens([
+            r'(?P<comment>#.*)',
+            r'(?P<triple_double>' + prefix + r'""")',
+            r"(?P<triple_single>" + prefix + r"''')",
+            r'(?P<string>' + prefix + r'''(?:"[^"\\]*(?:\\.[^"\\]*)*"?|'[^'\\]*(?:\\.[^'\\]*)*'?))''',
+            r'(?P<define>\b(?P<deftype>def|class)\s+(?P<defname>[a-zA-Z_][a-zA-Z0-9_]*))',
+            r'(?P<decorator>@[a-zA-Z_][a-zA-Z0-9_\.]*)',
+            r'(?P<keyword>\b(?:' + '|'.join(keywords) + r')\b)',
+            r'(?P<builtin>\b(?:' + '|'.join(builtins) + r')\b)',
+            r'(?P<number>\b0[xX][0-9a-fA-F]+\b|\b[0-9]+(?:\.[0-9]*)?(?:[eE][+-]?[0-9]+)?[jJ]?(?!\w)|(?<![\w.])\.[0-9]+\b)',
+        ], r'#"\'@\w.')
+        return {
+            "token_pattern": token_pattern,
+            "formats": {
+                "comment": comment_format,
+                "string": string_format,
+                "decorator": decorator_format,
+                "keyword": keyword_format,
+                "builtin": builtin_format,
+                "number": number_format,
+            },
+            "define_formats": {"def": function_format, "class": class_format},
+            "multiline": {"triple_double": 1, "triple_single": 2},
+            "multiline_states": {
+                1: (re.compile(r'(?:[^"\\]|\\.|"(?!""))*"""'), string_format),
+                2: (re.compile(r"(?:[^'\\]|\\.|'(?!''))*'''"), string_format),
+            },
+        }
 
 class JavaScriptSyntaxHighlighter(SyntaxHighlighter):
     """Syntaxmarkering för JavaScript-kod"""
-    def setup_rules(self):
+    @classmethod
+    def setup_rules(cls):
         # Keyword format
         keyword_format = QTextCharFormat()
         keyword_format.setForeground(QColor("#569CD6"))
@@ -130,45 +309,66 @@ class JavaScriptSyntaxHighlighter(SyntaxHighlighter):
             "try", "typeof", "var", "void", "while", "with", "yield", "let",
             "static", "get", "set", "async", "await"
         ]
-        for word in keywords:
-            pattern = r'\b' + word + r'\b'
-            self.highlight_rules.append((re.compile(pattern), keyword_format))
         
         # String format
         string_format = QTextCharFormat()
         string_format.setForeground(QColor("#CE9178"))
-        self.highlight_rules.append((re.compile(r'"[^"\\]*(\\.[^"\\]*)*"'), string_format))
-        self.highlight_rules.append((re.compile(r"'[^'\\]*(\\.[^'\\]*)*'"), string_format))
-        self.highlight_rules.append((re.compile(r'`[^`\\]*(\\.[^`\\]*)*`'), string_format))
         
         # Comment format
         comment_format = QTextCharFormat()
         comment_format.setForeground(QColor("#6A9955"))
-        self.highlight_rules.append((re.compile(r'//[^\n]*'), comment_format))
-        self.highlight_rules.append((re.compile(r'/\*.*?\*/', re.DOTALL), comment_format))
         
         # Function format
         function_format = QTextCharFormat()
         function_format.setForeground(QColor("#DCDCAA"))
         function_format.setFontWeight(QFont.Bold)
-        self.highlight_rules.append((re.compile(r'\bfunction\s+([a-zA-Z_$][a-zA-Z0-9_$]*)\b'), function_format))
-        self.highlight_rules.append((re.compile(r'\b([a-zA-Z_$][a-zA-Z0-9_$]*)\s*\('), function_format))
-        self.highlight_rules.append((re.compile(r'\b([a-zA-Z_$][a-zA-Z0-9_$]*)\s*=\s*function\b'), function_format))
-        self.highlight_rules.append((re.compile(r'\b([a-zA-Z_$][a-zA-Z0-9_$]*)\s*=\s*\(.*?\)\s*=>\s*', re.DOTALL), function_format))
         
         # Number format
         number_format = QTextCharFormat()
         number_format.setForeground(QColor("#B5CEA8"))
-        self.highlight_rules.append((re.compile(r'\b[0-9]+\b'), number_format))
-        self.highlight_rules.append((re.compile(r'\b0[xX][0-9a-fA-F]+\b'), number_format))
-        self.highlight_rules.append((re.compile(r'\b[0-9]+\.[0-9]*\b'), number_format))
-        self.highlight_rules.append((re.compile(r'\b\.[0-9]+\b'), number_format))
+        
+        identifier = r'[a-zA-Z_$][a-zA-Z0-9_$]*'
+        token_pattern = compile_tokens([
+            r'(?P<comment>//.*)',
+            r'(?P<block_comment>/\*)',
+            r'(?P<template>`)',
+            r'''(?P<string>"[^"\\]*(?:\\.[^"\\]*)*"?|'[^'\\]*(?:\\.[^'\\]*)*'?)''',
+            r'(?P<define>\b(?P<deftype>function)\s+(?P<defname>' + identifier + r'))',
+            r'(?P<keyword>\b(?:' + '|'.join(keywords) + r')\b)',
+            # Namn som anropas eller tilldelas en funktion
+            r'(?P<function>\b' + identifier + r'(?=\s*\(|\s*=\s*(?:function\b|\([^)]*\)\s*=>|' + identifier + r'\s*=>)))',
+            r'(?P<number>\b0[xX][0-9a-fA-F]+\b|\b[0-9]+(?:\.[0-9]*)?(?:[eE][+-]?[0-9]+)?(?!\w)|(?<![\w.])\.[0-9]+\b)',
+        ], r'/`"\'\w$.')
+        return {
+            "token_pattern": token_pattern,
+            "formats": {
+                "comment": comment_format,
+                "string": string_format,
+                "keyword": keyword_format,
+                "function": function_format,
+                "number": number_format,
+            },
+            "define_formats": {"function": function_format},
+            "multiline": {"block_comment": 1, "template": 2},
+            "multiline_states": {
+                1: (re.compile(r'.*?\*/'), comment_format),
+                2: (re.compile(r'(?:[^`\\]|\\.)*`'), string_format),
+            },
+        }
+
+def highlighter_for_extension(extension):
+    """Syntaxmarkerarens klass för en filändelse; Python används som standard"""
+    if extension.lower().endswith('.js'):
+        return JavaScriptSyntaxHighlighter
+    return PythonSyntaxHighlighter
 
 class CodeEditor(QPlainTextEdit):
     """
     Avancerad kodredigerare med radnumrering och syntaxmarkering
     """
     contentChanged = Signal()
+    loadProgress = Signal(int, int)   # inlästa tecken, totalt
+    loadFinished = Signal()
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -190,27 +390,103 @@ class CodeEditor(QPlainTextEdit):
         self.setLineWrapMode(QPlainTextEdit.NoWrap)
         self.setTabStopDistance(self.fontMetrics().horizontalAdvance(' ') * 4)
         
-        # Autospara-timer
-        self.last_saved_content = ""
-        self.save_timer = QTimer(self)
-        self.save_timer.setInterval(2000)  # 2 sekunder
-        self.save_timer.timeout.connect(self.check_for_changes)
-        self.save_timer.start()
-        
         # Markera aktuell rad
         self.highlightCurrentLine()
         
         # Aktivera stödlinjer för indentering
         self.setIndentationGuides(True)
+        
+        self.large_file_mode = False
+        
+        # Text som återstår att läsa in i läget för stora filer
+        self.pending_text = None
+        self.pending_position = 0
+        self.load_timer = QTimer(self)
+        self.load_timer.setSingleShot(True)
+        self.load_timer.setInterval(0)
+        self.load_timer.timeout.connect(self.load_next_chunk)
+    
+    def set_large_file_mode(self, enabled):
+        """
+        Läget för stora filer: skrivskyddat utan ångrahistorik, ingen
+        markering av aktuell rad och ingen automatisk indentering. En
+        pågående inläsning fortsätter; den som stänger av läget för en fil
+        som läses in avslutar inläsningen själv.
+        """
+        self.large_file_mode = enabled
+        self.setReadOnly(enabled)
+        self.setUndoRedoEnabled(not enabled)
+        self.highlightCurrentLine()
+    
+    def cancel_loading(self):
+        """Avbryt en pågående inläsning utan att lägga till resten av texten"""
+        self.load_timer.stop()
+        self.pending_text = None
+    
+    def clear(self):
+        # En inläsning som pågår ska inte fortsätta fylla en tömd editor
+        self.cancel_loading()
+        super().clear()
+    
+    def load_text(self, text):
+        """
+        Sätt editorns text. I läget för stora filer läses den in i hela rader
+        om ungefär LOAD_CHUNK_CHARS tecken per händelseloopvarv, så att början
+        syns direkt och gränssnittet svarar medan resten läses in.
+        """
+        self.pending_text = None
+        self.load_timer.stop()
+        if not self.large_file_mode or len(text) <= LOAD_CHUNK_CHARS:
+            self.setPlainText(text)
+            return
+        
+        end = self._chunk_end(text, 0)
+        # Inläsningen är ingen ändring; contentChanged skickas inte förrän den är klar
+        self.pending_text = text
+        self.pending_position = end
+        self.setPlainText(text[:end])
+        self.load_timer.start()
+    
+    def _chunk_end(self, text, start):
+        end = text.find("\n", start + LOAD_CHUNK_CHARS)
+        return len(text) if end < 0 else end + 1
+    
+    def is_loading(self):
+        return self.pending_text is not None
+    
+    def load_next_chunk(self, end=None):
+        """Lägg till nästa del av texten, eller resten om end är len(text)"""
+        text = self.pending_text
+        if text is None:
+            return
+        start = self.pending_position
+        if end is None:
+            end = self._chunk_end(text, start)
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text[start:end])
+        self.pending_position = end
+        if end < len(text):
+            self.loadProgress.emit(end, len(text))
+            self.load_timer.start()
+            return
+        self.pending_text = None
+        self.loadFinished.emit()
+    
+    def finish_loading(self):
+        """Läs in det som återstår direkt"""
+        if self.pending_text is not None:
+            self.load_timer.stop()
+            self.load_next_chunk(len(self.pending_text))
+    
+    def toPlainText(self):
+        # Den som läser texten ska få hela, även medan den läses in
+        self.finish_loading()
+        return super().toPlainText()
     
     def on_text_changed(self):
         """Anropas när texten ändras"""
-        self.contentChanged.emit()
-    
-    def check_for_changes(self):
-        """Kontrollerar om innehållet har ändrats sedan senaste sparningen"""
-        current_content = self.toPlainText()
-        if current_content != self.last_saved_content:
+        if self.pending_text is None:
             self.contentChanged.emit()
     
     def lineNumberAreaWidth(self):
@@ -289,6 +565,10 @@ class CodeEditor(QPlainTextEdit):
     
     def keyPressEvent(self, event):
         """Hantera tangentbordshändelser för särskilda kodningsfunktioner"""
+        if self.large_file_mode:
+            # Ingen automatisk formatering i stora filer
+            super().keyPressEvent(event)
+            return
         if event.key() == Qt.Key_Tab:
             # Indentera med mellanslag istället för tabbar
             cursor = self.textCursor()
@@ -449,6 +729,11 @@ class CodeModuleWidget(QFrame):
         self.class_cache = {}
         self.variable_cache = {}
         
+        # Läget för stora filer; användaren kan stänga av det per modul
+        self.large_file_mode = False
+        self.large_file_override = False
+        self.viewport_highlighter = None
+        
         # Initiera UI - detta kommer att skapa code_editor
         self.initUI()
         
@@ -459,18 +744,26 @@ class CodeModuleWidget(QFrame):
         # Anslut ändringar till uppdateringsfunktion - nu EFTER code_editor skapats
         self.code_editor.contentChanged.connect(self.on_content_changed)
         
-        # Autospara-timer
-        self.auto_save_timer = QTimer(self)
-        self.auto_save_timer.setInterval(2000)  # 2 sekunder
-        self.auto_save_timer.timeout.connect(self.auto_save_if_needed)
-        if self.auto_save:
-            self.auto_save_timer.start()
-        
-        # Uppdatera UI från moduldata
+        # Ändringar hanteras av den gemensamma schemaläggaren i stället för egna timers
+        self.change_scheduler = ChangeScheduler.instance()
+        
+        # Kodstrukturen parsas i bakgrunden när skrivandet gjort en paus
+        self.structure_parser = StructureParser(self)
+        self.structure_parser.structureParsed.connect(self.on_structure_parsed)
+        self.structure_source = None
+        self.structure_module_id = None
+        # Texten som cacharnas rader och spann gäller för, och om spannen
+        # flyttats efter en redigering i stället för att parsas fram
+        self.structure_text = None
+        self.structure_partial = False
+        self.structure_timer = QTimer(self)
+        self.structure_timer.setSingleShot(True)
+        self.structure_timer.setInterval(400)
+        self.structure_timer.timeout.connect(self.request_structure_update)
+        
+        # Uppdatera UI från moduldata; koden parsas där för funktioner, klasser och variabler
         self.refresh_from_data()
-        
-        # Parsera koden för att hitta funktioner, klasser och variabler
-        self.update_code_structure_cache()
+        self.mark_changes_handled()
     
     def _ensure_module_data_fields(self):
         """Säkerställ att alla nödvändiga fält finns i module_data"""
@@ -615,11 +908,11 @@ class CodeModuleWidget(QFrame):
         
         # Kodredigeringsfliken
         self.code_editor = CodeEditor()
-        if self.module_data["extension"].lower().endswith('.py'):
-            self.highlighter = PythonSyntaxHighlighter(self.code_editor.document())
-        elif self.module_data["extension"].lower().endswith('.js'):
-            self.highlighter = JavaScriptSyntaxHighlighter(self.code_editor.document())
-        
+        self.code_editor.loadProgress.connect(self.on_load_progress)
+        self.code_editor.loadFinished.connect(self.on_load_finished)
+        # Syntaxmarkeraren skapas i refresh_from_data utifrån filändelsen
+        self.highlighter = None
+
         self.tab_widget.addTab(self.code_editor, "Kod")
         
         # Fliken för dokumentation/metadata
@@ -803,6 +1096,7 @@ class CodeModuleWidget(QFrame):
         
         self.tab_widget.addTab(self.llm_widget, "AI Integration")
         
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
         main_layout.addWidget(self.tab_widget)
         
         # Nederst: Statusinformation och sökruta
@@ -814,6 +1108,17 @@ class CodeModuleWidget(QFrame):
         self.status_bar.setStyleSheet("QStatusBar { border: none; }")
         self.status_bar.showMessage("Redo")
         
+        # Indikator för läget för stora filer; klick växlar till full redigering
+        self.large_file_button = QPushButton("📄 Stor fil")
+        self.large_file_button.setCheckable(True)
+        self.large_file_button.setToolTip(
+            "Stora filer öppnas skrivskyddade, markeras bara där de syns och "
+            "analyseras först när Struktur öppnas. Klicka för full redigering."
+        )
+        self.large_file_button.setVisible(False)
+        self.large_file_button.toggled.connect(self.on_large_file_toggled)
+        self.status_bar.addPermanentWidget(self.large_file_button)
+        
         # Sökfält
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Sök eller lägg till funktion...")
@@ -983,10 +1288,8 @@ class CodeModuleWidget(QFrame):
         self.auto_save = (state == Qt.Checked)
         self.module_data["auto_save"] = self.auto_save
         
-        if self.auto_save:
-            self.auto_save_timer.start()
-        else:
-            self.auto_save_timer.stop()
+        if self.auto_save and self.is_dirty:
+            self.change_scheduler.schedule(self)
         
         self.moduleUpdated.emit(self.module_id, "auto_save", self.module_data)
 
@@ -1356,7 +1659,33 @@ class CodeModuleWidget(QFrame):
     def on_content_changed(self):
         """Anropas när textinnehållet i editorn ändras"""
         self.is_dirty = True
+        self.change_scheduler.schedule(self)
+        # Startas om vid varje ändring, så parsningen väntar tills skrivandet pausar
+        self.structure_timer.start()
+
+    def flush_pending_changes(self):
+        """Anropas av schemaläggaren; meddela ändringar och autospara en gång per dokumentrevision"""
+        revision = self.code_editor.document().revision()
+        if revision == self.handled_revision:
+            return
+        self.handled_revision = revision
+        # Syntaxmarkering räknar också upp revisionen, så jämför texten innan något meddelas
+        text = self.code_editor.toPlainText()
+        if text == self.handled_text:
+            return
+        self.handled_text = text
         self.moduleUpdated.emit(self.module_id, "content", self.module_data)
+        self.auto_save_if_needed()
+
+    def mark_changes_handled(self):
+        """Betrakta aktuell dokumentrevision som hanterad, t.ex. efter inläsning"""
+        if self.code_editor.is_loading():
+            # Görs när hela texten lästs in
+            self.change_scheduler.cancel(self)
+            return
+        self.handled_revision = self.code_editor.document().revision()
+        self.handled_text = self.code_editor.toPlainText()
+        self.change_scheduler.cancel(self)
 
     def auto_save_if_needed(self):
         """Spara automatiskt om det finns osparade ändringar"""
@@ -1498,13 +1827,25 @@ class CodeModuleWidget(QFrame):
 
     def refresh_from_data(self):
         """Uppdatera UI-element från moduldata"""
+        # Resten av en tidigare moduls inläsning ska inte läsas in nu
+        self.code_editor.cancel_loading()
+        
         # Uppdatera namn och filändelse
         self.name_label.setText(self.module_data["name"])
+        # Utan signaler; annars autosparas föregående moduls text in i den nya
+        self.extension_input.blockSignals(True)
         self.extension_input.setText(self.module_data["extension"])
+        self.extension_input.blockSignals(False)
+        
+        # Läget väljs innan texten sätts, så att en stor fil aldrig markeras i sin helhet
+        large = is_large_text(self.module_data.get("code", ""))
+        self.large_file_button.setVisible(large)
+        if (large and not self.large_file_override) != self.large_file_mode:
+            self.set_large_file_mode(not self.large_file_mode)
         
         # Uppdatera kod
         if "code" in self.module_data:
-            self.code_editor.setPlainText(self.module_data["code"])
+            self.code_editor.load_text(self.module_data["code"])
             self.last_saved_code = self.module_data["code"]
         
         # Uppdatera syntax highlighter baserat på filändelse
@@ -1513,239 +1854,251 @@ class CodeModuleWidget(QFrame):
         # Uppdatera metadata
         self.description_edit.setText(self.module_data.get("description", ""))
         
+        # Signalerna blockeras så att en återanvänd editor inte flyttar modulens fil
         current_category = self.module_data.get("category", "other")
         index = self.category_combo.findText(current_category)
         if index >= 0:
+            self.category_combo.blockSignals(True)
             self.category_combo.setCurrentIndex(index)
+            self.category_combo.blockSignals(False)
         
         self.tags_edit.setText(", ".join(self.module_data.get("tags", [])))
         self.file_path_label.setText(str(self.module_data.get("file_path", "Ingen fil sparad")))
         
-        # Uppdatera struktur-trädet
-        self.update_structure_tree()
-        
-        # Uppdatera LLM-målkombo
+        # Kodstrukturen parsas i bakgrunden; trädet uppdateras när resultatet kommer
         self.update_llm_target_combo()
+        if self.structure_module_id != self.module_id:
+            # Strukturen från en tidigare modul ska inte synas tills analysen körts
+            self.update_structure_tree()
+        if self.large_file_mode:
+            self.status_bar.showMessage("Stor fil: skrivskyddad, strukturen analyseras när fliken Struktur öppnas")
+        self.request_structure_update()
     
+    def bind_module(self, module_id, module_data):
+        """Återanvänd widgeten för en annan modul utan att bygga om UI:t"""
+        self.module_id = module_id
+        self.module_data = module_data
+        self._ensure_module_data_fields()
+        self.module_hash = self._generate_module_hash()
+
+        # Nollställ cachar och ändringsflaggor från föregående modul
+        self.history = []
+        self.history_index = -1
+        self.function_cache = {}
+        self.class_cache = {}
+        self.variable_cache = {}
+        self.structure_text = None
+        self.llm_code_edit.clear()
+        self.llm_result_edit.clear()
+
+        self.large_file_override = False
+        self.auto_save = self.module_data.get("auto_save", True)
+        self.auto_save_checkbox.blockSignals(True)
+        self.auto_save_checkbox.setChecked(self.auto_save)
+        self.auto_save_checkbox.blockSignals(False)
+
+        self.refresh_from_data()
+        self.is_dirty = False
+        self.mark_changes_handled()
+
     def update_syntax_highlighter(self):
         """Uppdatera syntaxmarkeringen baserat på filändelse"""
-        extension = self.extension_input.text().lower()
+        highlighter_class = highlighter_for_extension(self.extension_input.text())
+        if self.large_file_mode:
+            # Stora filer markeras bara där de syns
+            self.remove_highlighter()
+            if self.viewport_highlighter is None or self.viewport_highlighter.highlighter_class is not highlighter_class:
+                self.remove_viewport_highlighter()
+                self.viewport_highlighter = ViewportHighlighter(self.code_editor, highlighter_class)
+            return
         
-        if hasattr(self, 'highlighter'):
-            # Ta bort tidigare syntaxmarkerare
+        self.remove_viewport_highlighter()
+        # Samma språk behåller markeraren; den markerar själv om när texten byts
+        if type(self.highlighter) is highlighter_class:
+            return
+        self.remove_highlighter()
+        self.highlighter = highlighter_class(self.code_editor.document())
+    
+    def remove_highlighter(self):
+        """Ta bort syntaxmarkeraren från dokumentet"""
+        if self.highlighter is not None:
             self.highlighter.setDocument(None)
-        
-        if extension.endswith('.py'):
-            self.highlighter = PythonSyntaxHighlighter(self.code_editor.document())
-        elif extension.endswith('.js'):
-            self.highlighter = JavaScriptSyntaxHighlighter(self.code_editor.document())
+            self.highlighter.deleteLater()
+            self.highlighter = None
+    
+    def remove_viewport_highlighter(self):
+        """Ta bort markeringen av synliga rader för stora filer"""
+        if self.viewport_highlighter is not None:
+            self.viewport_highlighter.stop()
+            self.viewport_highlighter.deleteLater()
+            self.viewport_highlighter = None
+    
+    def set_large_file_mode(self, enabled):
+        """Växla läget för stora filer och byt syntaxmarkering därefter"""
+        self.large_file_mode = enabled
+        self.code_editor.set_large_file_mode(enabled)
+        self.large_file_button.blockSignals(True)
+        self.large_file_button.setChecked(enabled)
+        self.large_file_button.blockSignals(False)
+        self.update_syntax_highlighter()
+    
+    def on_large_file_toggled(self, checked):
+        """Användaren slår på eller av läget för stora filer för den här modulen"""
+        self.large_file_override = not checked
+        if not checked:
+            # Full redigering kräver hela texten
+            self.code_editor.finish_loading()
+        self.set_large_file_mode(checked)
+        if checked:
+            self.status_bar.showMessage("Stor fil: skrivskyddad, strukturen analyseras när fliken Struktur öppnas")
         else:
-            # Använd Python-syntax som standard
-            self.highlighter = PythonSyntaxHighlighter(self.code_editor.document())
+            self.status_bar.showMessage("Full redigering av stor fil", 3000)
+            self.request_structure_update()
+    
+    def on_load_progress(self, loaded, total):
+        self.status_bar.showMessage(f"Läser in stor fil... {loaded * 100 // total} %")
+    
+    def on_load_finished(self):
+        self.mark_changes_handled()
+        self.status_bar.showMessage(
+            f"Stor fil inläst ({self.code_editor.blockCount()} rader): skrivskyddad, "
+            "strukturen analyseras när fliken Struktur öppnas"
+        )
+    
+    def on_tab_changed(self, index):
+        """Stora filer analyseras först när strukturen behövs"""
+        if self.large_file_mode and self.tab_widget.widget(index) in (self.structure_widget, self.llm_widget):
+            self.status_bar.showMessage("Analyserar strukturen...", 3000)
+            self.request_structure_update(force=True)
     
     def update_structure_tree(self):
-        """Uppdatera struktur-trädet med funktioner, klasser och variabler"""
-        self.structure_tree.clear()
-        
-        # Skapa översta nivåelement
-        functions_item = QTreeWidgetItem(self.structure_tree, ["Funktioner", "", ""])
-        functions_item.setExpanded(True)
-        
-        classes_item = QTreeWidgetItem(self.structure_tree, ["Klasser", "", ""])
-        classes_item.setExpanded(True)
+        """
+        Uppdatera struktur-trädet med funktioner, klasser och variabler från
+        kodstrukturcachen. Anroparen uppdaterar cachen först; trädet stäms
+        av mot befintliga objekt så att expansion och markering behålls.
+        """
+        functions = [
+            node([func_name, "Funktion", str(func_info.get("lineno", ""))],
+                 [node([param, "Parameter", ""]) for param in func_info.get("params", [])])
+            for func_name, func_info in self.function_cache.items()
+        ]
         
-        variables_item = QTreeWidgetItem(self.structure_tree, ["Variabler", "", ""])
-        variables_item.setExpanded(True)
+        classes = []
+        for class_name, class_info in self.class_cache.items():
+            # Metoder med parametrar, sedan egenskaper
+            members = [
+                node([method_name, "Metod", str(method_info.get("lineno", ""))],
+                     [node([param, "Parameter", ""]) for param in method_info.get("params", [])])
+                for method_name, method_info in class_info.get("methods", {}).items()
+            ]
+            members.extend(
+                node([prop_name, "Egenskap", str(prop_info.get("lineno", ""))])
+                for prop_name, prop_info in class_info.get("properties", {}).items()
+            )
+            classes.append(node([class_name, "Klass", str(class_info.get("lineno", ""))], members))
         
-        # Uppdatera kodstrukturcachen och populera trädet
-        self.update_code_structure_cache()
+        variables = [
+            node([var_name, "Variabel", str(var_info.get("lineno", ""))])
+            for var_name, var_info in self.variable_cache.items()
+        ]
         
-        # Lägg till funktioner
-        for func_name, func_info in self.function_cache.items():
-            func_item = QTreeWidgetItem(functions_item, [
-                func_name, 
-                "Funktion", 
-                str(func_info.get("lineno", ""))
-            ])
-            
-            # Lägg till parametrar som underträd
-            if "params" in func_info:
-                for param in func_info["params"]:
-                    param_item = QTreeWidgetItem(func_item, [
-                        param, 
-                        "Parameter", 
-                        ""
-                    ])
-        
-        # Lägg till klasser
-        for class_name, class_info in self.class_cache.items():
-            class_item = QTreeWidgetItem(classes_item, [
-                class_name, 
-                "Klass", 
-                str(class_info.get("lineno", ""))
-            ])
-            
-            # Lägg till metoder som underträd
-            if "methods" in class_info:
-                for method_name, method_info in class_info["methods"].items():
-                    method_item = QTreeWidgetItem(class_item, [
-                        method_name, 
-                        "Metod", 
-                        str(method_info.get("lineno", ""))
-                    ])
-                    
-                    # Lägg till parametrar
-                    if "params" in method_info:
-                        for param in method_info["params"]:
-                            param_item = QTreeWidgetItem(method_item, [
-                                param, 
-                                "Parameter", 
-                                ""
-                            ])
-            
-            # Lägg till egenskaper
-            if "properties" in class_info:
-                for prop_name, prop_info in class_info["properties"].items():
-                    prop_item = QTreeWidgetItem(class_item, [
-                        prop_name, 
-                        "Egenskap", 
-                        str(prop_info.get("lineno", ""))
-                    ])
-        
-        # Lägg till globala variabler
-        for var_name, var_info in self.variable_cache.items():
-            var_item = QTreeWidgetItem(variables_item, [
-                var_name, 
-                "Variabel", 
-                str(var_info.get("lineno", ""))
-            ])
+        reconcile_tree(self.structure_tree, [
+            node(["Funktioner", "", ""], functions, expanded=True),
+            node(["Klasser", "", ""], classes, expanded=True),
+            node(["Variabler", "", ""], variables, expanded=True),
+        ])
     
     def update_llm_target_combo(self):
         """Uppdatera målkombofältet för LLM-integration med tillgängliga funktioner/klasser"""
-        self.llm_target_combo.clear()
-        
-        # Lägg till funktioner
-        for func_name in self.function_cache.keys():
-            self.llm_target_combo.addItem(f"funktion:{func_name}")
-        
-        # Lägg till klasser
-        for class_name in self.class_cache.keys():
-            self.llm_target_combo.addItem(f"klass:{class_name}")
-            
+        items = [f"funktion:{func_name}" for func_name in self.function_cache]
+        for class_name, class_info in self.class_cache.items():
+            items.append(f"klass:{class_name}")
             # Lägg också till klassmetoder
-            if "methods" in self.class_cache[class_name]:
-                for method_name in self.class_cache[class_name]["methods"].keys():
-                    self.llm_target_combo.addItem(f"metod:{class_name}.{method_name}")
+            items.extend(f"metod:{class_name}.{method_name}" for method_name in class_info.get("methods", {}))
+        items.extend(f"variabel:{var_name}" for var_name in self.variable_cache)
         
-        # Lägg till globala variabler
-        for var_name in self.variable_cache.keys():
-            self.llm_target_combo.addItem(f"variabel:{var_name}")
+        if items == [self.llm_target_combo.itemText(i) for i in range(self.llm_target_combo.count())]:
+            return
+        # Behåll valt mål när listan byggs om medan användaren skriver
+        current = self.llm_target_combo.currentText()
+        self.llm_target_combo.clear()
+        self.llm_target_combo.addItems(items)
+        index = self.llm_target_combo.findText(current)
+        if index >= 0:
+            self.llm_target_combo.setCurrentIndex(index)
     
     def update_code_structure_cache(self):
-        """Analysera koden och uppdatera cache för funktioner, klasser och variabler"""
+        """Analysera koden direkt och uppdatera cache för funktioner, klasser och variabler"""
         code = self.code_editor.toPlainText()
         extension = self.extension_input.text().lower()
         
-        # Rensa cacheerna
-        self.function_cache = {}
-        self.class_cache = {}
-        self.variable_cache = {}
-        
-        if extension.endswith('.py'):
-            self.parse_python_structure(code)
-        elif extension.endswith('.js'):
-            self.parse_javascript_structure(code)
+        # Bakgrundsparsningar som pågår är äldre än detta resultat
+        self.structure_parser.cancel()
+        self.structure_timer.stop()
+        self.structure_source = (code, extension)
+        self.structure_module_id = self.module_id
+        self.structure_text = code
+        self.structure_partial = False
+        self.set_structure(parse_structure(code, extension))
+    
+    def ensure_structure_current(self, complete=False):
+        """
+        Parsa om direkt om cacharna inte gäller editorns text, t.ex. inför en
+        redigering via spannen. Med complete parsas även flyttade spann om,
+        så att kod som lagts in sedan senaste parsningen finns med.
+        """
+        if self.structure_text != self.code_editor.toPlainText() or (complete and self.structure_partial):
+            self.update_code_structure_cache()
     
-    def parse_python_structure(self, code):
-        """Parsea Pythonstruktur från kod"""
-        try:
-            import ast
-            tree = ast.parse(code)
-            
-            # Extrahera funktioner
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    params = []
-                    for arg in node.args.args:
-                        if hasattr(arg, 'annotation') and arg.annotation:
-                            # Om det finns typannotering
-                            if isinstance(arg.annotation, ast.Name):
-                                params.append(f"{arg.arg}: {arg.annotation.id}")
-                            else:
-                                params.append(arg.arg)
-                        else:
-                            params.append(arg.arg)
-                    
-                    # Funktion direkt i modulscope är en global funktion
-                    self.function_cache[node.name] = {
-                        "lineno": node.lineno,
-                        "params": params,
-                        "ast_node": node
-                    }
-                
-                elif isinstance(node, ast.ClassDef):
-                    # Extrahera klassdetaljer
-                    class_info = {
-                        "lineno": node.lineno,
-                        "bases": [base.id for base in node.bases if isinstance(base, ast.Name)],
-                        "methods": {},
-                        "properties": {},
-                        "ast_node": node
-                    }
-                    
-                    # Hitta metoder och klassvariabler
-                    for item in node.body:
-                        if isinstance(item, ast.FunctionDef):
-                            # Extrahera metod med parametrar
-                            params = []
-                            
-                            # Hoppa över 'self' i parameterlistan
-                            skip_first = False
-                            if item.args.args and item.args.args[0].arg == 'self':
-                                skip_first = True
-                            
-                            for i, arg in enumerate(item.args.args):
-                                if skip_first and i == 0:
-                                    continue
-                                    
-                                if hasattr(arg, 'annotation') and arg.annotation:
-                                    if isinstance(arg.annotation, ast.Name):
-                                        params.append(f"{arg.arg}: {arg.annotation.id}")
-                                    else:
-                                        params.append(arg.arg)
-                                else:
-                                    params.append(arg.arg)
-                            
-                            class_info["methods"][item.name] = {
-                                "lineno": item.lineno,
-                                "params": params,
-                                "ast_node": item
-                            }
-                        
-                        elif isinstance(item, ast.Assign):
-                            # Hitta klassattribut
-                            for target in item.targets:
-                                if isinstance(target, ast.Name):
-                                    class_info["properties"][target.id] = {
-                                        "lineno": item.lineno,
-                                        "ast_node": item
-                                    }
-                    
-                    self.class_cache[node.name] = class_info
-                
-                elif isinstance(node, ast.Assign) and all(isinstance(target, ast.Name) for target in node.targets):
-                    # Globala variabler
-                    for target in node.targets:
-                        self.variable_cache[target.id] = {
-                            "lineno": node.lineno,
-                            "ast_node": node
-                        }
-        
-        except SyntaxError:
-            # Ignorera syntaxfel under parsning
-            pass
+    def lookup_symbol(self, lookup):
+        """
+        Slå upp en post i strukturcacharna med lookup(). Efter redigeringar
+        saknas ny kod i de flyttade spannen, så då parsas koden om en gång
+        innan symbolen räknas som saknad.
+        """
+        self.ensure_structure_current()
+        info = lookup()
+        if info is None and self.structure_partial:
+            self.ensure_structure_current(complete=True)
+            info = lookup()
+        return info
+    
+    def set_structure(self, structure):
+        """Sätt cacharna från parse_structure(); None (syntaxfel) ger tom struktur"""
+        if structure is None:
+            structure = ({}, {}, {})
+        self.function_cache, self.class_cache, self.variable_cache = structure
+    
+    def request_structure_update(self, force=False):
+        """
+        Parsa kodstrukturen på en arbetstråd om koden ändrats sedan förra
+        parsningen. Stora filer parsas bara på begäran (force).
+        """
+        self.structure_timer.stop()
+        if self.large_file_mode and not force:
+            return
+        source = (self.code_editor.toPlainText(), self.extension_input.text().lower())
+        if source == self.structure_source and self.structure_module_id == self.module_id:
+            return
+        self.structure_source = source
+        self.structure_parser.submit(*source)
+    
+    def on_structure_parsed(self, generation, structure):
+        """Ta emot en bakgrundsparsning; inaktuella resultat kastas"""
+        if generation != self.structure_parser.generation:
+            return
+        if structure is None and self.structure_module_id == self.module_id:
+            # Koden går inte att parsa mitt i skrivandet; behåll senaste trädet
+            return
+        self.structure_module_id = self.module_id
+        self.structure_text = self.structure_source[0]
+        self.structure_partial = False
+        self.set_structure(structure)
+        self.update_structure_tree()
+        self.update_llm_target_combo()
+
 
-    # ===== SLUT PÅ parse_python_structure ====
+    # ===== SLUT PÅ on_structure_parsed ====
 
     # ===== BÖRJAN PÅ add_new_function =====
     def add_new_function(self, function_name):
@@ -1792,6 +2145,7 @@ class CodeModuleWidget(QFrame):
                 
                 elif item == "Klassmetod":
                     # Välj vilken klass metoden ska tillhöra
+                    self.ensure_structure_current(complete=True)
                     class_names = list(self.class_cache.keys())
                     if class_names:
                         class_name, ok = QInputDialog.getItem(
@@ -1810,28 +2164,8 @@ class CodeModuleWidget(QFrame):
                                 method_template = self.generate_python_method(function_name, param_list)
                             
                             # Hitta slutet av klassen
-                            if class_name in self.class_cache:
-                                class_info = self.class_cache[class_name]
-                                if hasattr(class_info, 'ast_node') and hasattr(class_info.ast_node, 'end_lineno'):
-                                    end_line = class_info.ast_node.end_lineno
-                                else:
-                                    # Hitta klassdefinitionen manuellt
-                                    code = self.code_editor.toPlainText()
-                                    lines = code.split('\n')
-                                    class_line = class_info.get("lineno", 1) - 1
-                                    
-                                    # Hitta slutet av klassen genom att räkna indrag
-                                    class_indent = len(lines[class_line]) - len(lines[class_line].lstrip())
-                                    end_line = class_line
-                                    
-                                    for i in range(class_line + 1, len(lines)):
-                                        line = lines[i]
-                                        if line.strip() and len(line) - len(line.lstrip()) <= class_indent:
-                                            # Hittade en rad med samma eller mindre indrag
-                                            end_line = i - 1
-                                            break
-                                        end_line = i
-                                
+                            start_line, end_line = self.get_class_code_bounds(class_name)
+                            if start_line >= 0:
                                 # Indentera metoden korrekt
                                 if self.module_data["extension"].lower().endswith('.py'):
                                     # Python använder 4 mellanslag för indentering
@@ -1840,11 +2174,9 @@ class CodeModuleWidget(QFrame):
                                     # JavaScript använder två mellanslag
                                     indented_method = "\n".join("  " + line for line in method_template.split('\n'))
                                 
-                                # Infoga metoden på rätt plats
-                                cursor = self.code_editor.textCursor()
-                                block = self.code_editor.document().findBlockByLineNumber(end_line)
-                                cursor.setPosition(block.position() + block.length() - 1)
-                                cursor.insertText("\n" + indented_method)
+                                # Infoga metoden efter klassens sista rad, i JavaScript före den avslutande klammern
+                                insert_line = end_line + 1 if self.module_data["extension"].lower().endswith('.py') else end_line
+                                self.replace_lines(insert_line, insert_line, [indented_method])
                                 
                                 self.status_bar.showMessage(f"Metod '{function_name}' tillagd till klass '{class_name}'", 3000)
                             else:
@@ -1852,9 +2184,8 @@ class CodeModuleWidget(QFrame):
                     else:
                         QMessageBox.warning(self, "Inga klasser", "Det finns inga klasser i modulen att lägga till metoden i.")
             
-            # Uppdatera strukturträdet
-            self.update_code_structure_cache()
-            self.update_structure_tree()
+            # Strukturträdet uppdateras i bakgrunden när redigeringarna gjort en paus
+            self.structure_timer.start()
     
     def generate_python_function(self, name, params):
         """Generera en Python-funktionsmall"""
@@ -1994,22 +2325,11 @@ class CodeModuleWidget(QFrame):
         # Validera och formatera koden
         formatted_code = self.format_code(code)
         
-        # Lägg till i slutet av filen
-        current_code = self.code_editor.toPlainText()
-        
-        if current_code.strip():
-            # Det finns redan kod, lägg till två tomma rader
-            new_code = current_code + "\n\n" + formatted_code
-        else:
-            # Filen är tom
-            new_code = formatted_code
+        # Lägg till i slutet av filen, efter två tomma rader om där redan finns kod
+        self.append_code(formatted_code)
         
-        # Uppdatera koden
-        self.code_editor.setPlainText(new_code)
-        
-        # Uppdatera strukturen
-        self.update_code_structure_cache()
-        self.update_structure_tree()
+        # Strukturen parsas om i bakgrunden när redigeringarna gjort en paus
+        self.structure_timer.start()
         
         # Visa resultat
         if is_function:
@@ -2035,7 +2355,8 @@ class CodeModuleWidget(QFrame):
             class_name = None
             method_name = None
         
-        # Hitta koden för målentiteten
+        # Hitta koden för målentiteten; cacharnas rader och spann ska gälla den
+        self.ensure_structure_current(complete=True)
         current_code = self.code_editor.toPlainText()
         
         # Validera och formatera koden
@@ -2047,26 +2368,15 @@ class CodeModuleWidget(QFrame):
             if target_type == "funktion" or (target_type == "metod" and not class_name):
                 # Hitta funktionen i cachen
                 if target_name in self.function_cache:
-                    func_info = self.function_cache[target_name]
-                    if hasattr(func_info, 'ast_node'):
-                        # Hitta funktionens kodsegment
-                        start_line = func_info.ast_node.lineno - 1
-                        end_line = func_info.ast_node.end_lineno if hasattr(func_info.ast_node, 'end_lineno') else start_line
-                        
-                        # Dela koden i rader
-                        lines = current_code.split('\n')
-                        
-                        # Ersätt funktionen
-                        new_lines = lines[:start_line] + formatted_code.split('\n') + lines[end_line:]
-                        new_code = '\n'.join(new_lines)
-                        
-                        # Uppdatera koden
-                        self.code_editor.setPlainText(new_code)
+                    start_line, end_line = self.get_function_code_bounds(target_name)
+                    if start_line >= 0:
+                        # Ersätt bara funktionens rader
+                        self.replace_lines(start_line, end_line + 1, formatted_code.split('\n'))
                         
                         # Visa resultat
                         self.llm_result_edit.setPlainText(f"Uppdaterade funktionen '{target_name}'.\n\nResultat:\n{formatted_code}")
                     else:
-                        # Funktionen hittades inte i AST (ovanligt)
+                        # Funktionen hittades inte i strukturcachen (ovanligt)
                         raise Exception(f"Kunde inte hitta funktionskroppen för '{target_name}'")
                 else:
                     # Funktionen hittades inte, erbjud att lägga till den
@@ -2084,26 +2394,15 @@ class CodeModuleWidget(QFrame):
             elif target_type == "klass":
                 # Hitta klassen i cachen
                 if target_name in self.class_cache:
-                    class_info = self.class_cache[target_name]
-                    if hasattr(class_info, 'ast_node'):
-                        # Hitta klassens kodsegment
-                        start_line = class_info.ast_node.lineno - 1
-                        end_line = class_info.ast_node.end_lineno if hasattr(class_info.ast_node, 'end_lineno') else start_line
-                        
-                        # Dela koden i rader
-                        lines = current_code.split('\n')
-                        
-                        # Ersätt klassen
-                        new_lines = lines[:start_line] + formatted_code.split('\n') + lines[end_line:]
-                        new_code = '\n'.join(new_lines)
-                        
-                        # Uppdatera koden
-                        self.code_editor.setPlainText(new_code)
+                    start_line, end_line = self.get_class_code_bounds(target_name)
+                    if start_line >= 0:
+                        # Ersätt bara klassens rader
+                        self.replace_lines(start_line, end_line + 1, formatted_code.split('\n'))
                         
                         # Visa resultat
                         self.llm_result_edit.setPlainText(f"Uppdaterade klassen '{target_name}'.\n\nResultat:\n{formatted_code}")
                     else:
-                        # Klassen hittades inte i AST (ovanligt)
+                        # Klassen hittades inte i strukturcachen (ovanligt)
                         raise Exception(f"Kunde inte hitta klasskroppen för '{target_name}'")
                 else:
                     # Klassen hittades inte, erbjud att lägga till den
@@ -2125,14 +2424,9 @@ class CodeModuleWidget(QFrame):
                     
                     # Kontrollera om metoden finns
                     if method_name in class_info.get("methods", {}):
-                        method_info = class_info["methods"][method_name]
+                        start_line, end_line = self.get_method_code_bounds(class_name, method_name)
                         
-                        if hasattr(method_info, 'ast_node'):
-                            # Hitta metodens kodsegment
-                            start_line = method_info.ast_node.lineno - 1
-                            end_line = method_info.ast_node.end_lineno if hasattr(method_info.ast_node, 'end_lineno') else start_line
-                            
-                            # Dela koden i rader
+                        if start_line >= 0:
                             lines = current_code.split('\n')
                             
                             # Kontrollera indentering för metoden
@@ -2153,18 +2447,14 @@ class CodeModuleWidget(QFrame):
                                     # Andra rader behöver mer indentering
                                     indented_lines.append(" " * indent + line)
                             
-                            # Ersätt metoden
-                            new_lines = lines[:start_line] + indented_lines + lines[end_line:]
-                            new_code = '\n'.join(new_lines)
-                            
-                            # Uppdatera koden
-                            self.code_editor.setPlainText(new_code)
+                            # Ersätt bara metodens rader
+                            self.replace_lines(start_line, end_line + 1, indented_lines)
                             
                             # Visa resultat
                             indented_code = '\n'.join(indented_lines)
                             self.llm_result_edit.setPlainText(f"Uppdaterade metoden '{class_name}.{method_name}'.\n\nResultat:\n{indented_code}")
                         else:
-                            # Metoden hittades inte i AST (ovanligt)
+                            # Metoden hittades inte i strukturcachen (ovanligt)
                             raise Exception(f"Kunde inte hitta metodkroppen för '{class_name}.{method_name}'")
                     else:
                         # Metoden hittades inte, erbjud att lägga till den
@@ -2176,16 +2466,15 @@ class CodeModuleWidget(QFrame):
                         
                         if reply == QMessageBox.Yes:
                             # Lägg till metoden i klassen
-                            if hasattr(class_info, 'ast_node'):
-                                # Hitta klassens slut
-                                class_end_line = class_info.ast_node.end_lineno if hasattr(class_info.ast_node, 'end_lineno') else -1
+                            class_start_line, class_end_line = self.get_class_code_bounds(class_name)
+                            if class_start_line >= 0:
+                                # Raden efter klassens sista rad
+                                class_end_line += 1
                                 
-                                if class_end_line > 0:
-                                    # Dela koden i rader
+                                if class_end_line > class_start_line + 1:
                                     lines = current_code.split('\n')
                                     
                                     # Kontrollera indentering för klassen
-                                    class_start_line = class_info.ast_node.lineno - 1
                                     indent = len(lines[class_start_line + 1]) - len(lines[class_start_line + 1].lstrip())
                                     
                                     # Indentera metoden korrekt
@@ -2196,19 +2485,15 @@ class CodeModuleWidget(QFrame):
                                     
                                     indented_code = '\n'.join(indented_method)
                                     
-                                    # Lägg till metoden
-                                    new_lines = lines[:class_end_line] + [indented_code] + lines[class_end_line:]
-                                    new_code = '\n'.join(new_lines)
-                                    
-                                    # Uppdatera koden
-                                    self.code_editor.setPlainText(new_code)
+                                    # Lägg till metoden efter klassens sista rad
+                                    self.replace_lines(class_end_line, class_end_line, [indented_code])
                                     
                                     # Visa resultat
                                     self.llm_result_edit.setPlainText(f"Lade till metoden '{method_name}' i klassen '{class_name}'.\n\nResultat:\n{indented_code}")
                                 else:
                                     raise Exception(f"Kunde inte hitta slutet på klassen '{class_name}'")
                             else:
-                                raise Exception(f"Kunde inte hitta klassen '{class_name}' i AST")
+                                raise Exception(f"Kunde inte hitta klassen '{class_name}' i kodstrukturen")
                         else:
                             self.llm_result_edit.setPlainText(f"Operationen avbröts: Metoden '{method_name}' i klassen '{class_name}' hittades inte.")
                 else:
@@ -2225,14 +2510,14 @@ class CodeModuleWidget(QFrame):
                     rf'(?:const|let|var)\s+{re.escape(target_name)}\s*=\s*function\s*\([^)]*\)\s*\{{[\s\S]*?\}}'  # Function expression
                 ]
                 
+                # Spannet från strukturcachen följer klamrarna; mönstren är reserv
+                span = self.function_cache.get(target_name, {}).get("span")
                 for pattern in patterns:
-                    match = re.search(pattern, current_code)
-                    if match:
-                        # Hittade funktionen
-                        new_code = current_code[:match.start()] + formatted_code + current_code[match.end():]
-                        
-                        # Uppdatera koden
-                        self.code_editor.setPlainText(new_code)
+                    match = re.search(pattern, current_code) if span is None else None
+                    if span or match:
+                        # Hittade funktionen; ersätt bara dess tecken
+                        start, end = span or match.span()
+                        self.replace_code_range(current_code, start, end, formatted_code)
                         
                         # Visa resultat
                         self.llm_result_edit.setPlainText(f"Uppdaterade funktionen '{target_name}'.\n\nResultat:\n{formatted_code}")
@@ -2253,14 +2538,13 @@ class CodeModuleWidget(QFrame):
             elif target_type == "klass":
                 # Leta efter klassdeklarationen med regex
                 pattern = rf'class\s+{re.escape(target_name)}\s*(?:extends\s+[a-zA-Z_$][a-zA-Z0-9_$]*)?\s*\{{[\s\S]*?\}}'
-                match = re.search(pattern, current_code)
+                span = self.class_cache.get(target_name, {}).get("span")
+                match = re.search(pattern, current_code) if span is None else None
                 
-                if match:
-                    # Hittade klassen
-                    new_code = current_code[:match.start()] + formatted_code + current_code[match.end():]
-                    
-                    # Uppdatera koden
-                    self.code_editor.setPlainText(new_code)
+                if span or match:
+                    # Hittade klassen; ersätt bara dess tecken
+                    start, end = span or match.span()
+                    self.replace_code_range(current_code, start, end, formatted_code)
                     
                     # Visa resultat
                     self.llm_result_edit.setPlainText(f"Uppdaterade klassen '{target_name}'.\n\nResultat:\n{formatted_code}")
@@ -2277,9 +2561,8 @@ class CodeModuleWidget(QFrame):
                     else:
                         self.llm_result_edit.setPlainText(f"Operationen avbröts: Klassen '{target_name}' hittades inte.")
         
-        # Uppdatera strukturen
-        self.update_code_structure_cache()
-        self.update_structure_tree()
+        # Strukturen parsas om i bakgrunden när redigeringarna gjort en paus
+        self.structure_timer.start()
     
     def llm_update_variable(self, target, code):
         """Uppdatera en variabel med nytt värde"""
@@ -2295,7 +2578,8 @@ class CodeModuleWidget(QFrame):
             class_name = None
             property_name = None
         
-        # Hitta variabeln och uppdatera den
+        # Hitta variabeln och uppdatera den; cacharnas rader ska gälla koden
+        self.ensure_structure_current(complete=True)
         current_code = self.code_editor.toPlainText()
         
         # Validera och formatera koden (kan vara bara värdet eller hela deklarationen)
@@ -2308,10 +2592,10 @@ class CodeModuleWidget(QFrame):
                 if target_name in self.variable_cache:
                     var_info = self.variable_cache[target_name]
                     
-                    # Hittar vi variabeln via AST eller behöver vi använda regex?
-                    if hasattr(var_info, 'ast_node'):
-                        # Via AST
-                        start_line = var_info.ast_node.lineno - 1
+                    # Hittar vi variabeln via strukturcachen eller behöver vi använda regex?
+                    if "lineno" in var_info:
+                        # Via strukturcachen
+                        start_line = var_info["lineno"] - 1
                         
                         # Dela koden i rader
                         lines = current_code.split('\n')
@@ -2329,10 +2613,8 @@ class CodeModuleWidget(QFrame):
                             else:
                                 lines[start_line] = f"{target_name} = {formatted_code}"
                         
-                        new_code = '\n'.join(lines)
-                        
-                        # Uppdatera koden
-                        self.code_editor.setPlainText(new_code)
+                        # Uppdatera bara den ändrade raden
+                        self.replace_lines(start_line, start_line + 1, [lines[start_line]])
                         
                         # Visa resultat
                         self.llm_result_edit.setPlainText(f"Uppdaterade variabeln '{target_name}'.")
@@ -2349,10 +2631,8 @@ class CodeModuleWidget(QFrame):
                                 # Bara värdet
                                 replacement = f"{target_name} = {formatted_code}"
                             
-                            new_code = current_code[:match.start()] + replacement + current_code[match.end():]
-                            
-                            # Uppdatera koden
-                            self.code_editor.setPlainText(new_code)
+                            # Uppdatera bara tilldelningen
+                            self.replace_code_range(current_code, match.start(), match.end(), replacement)
                             
                             # Visa resultat
                             self.llm_result_edit.setPlainText(f"Uppdaterade variabeln '{target_name}'.")
@@ -2371,12 +2651,10 @@ class CodeModuleWidget(QFrame):
                                 else:
                                     new_var = f"{target_name} = {formatted_code}"
                                 
-                                new_code = new_var + "\n\n" + current_code
-                                
                                 # Uppdatera koden
                                 
 ## =======    PART - 4    ======= ##
-                                self.code_editor.setPlainText(new_code)
+                                self.replace_code_range(current_code, 0, 0, new_var + "\n\n")
                                 
                                 # Visa resultat
                                 self.llm_result_edit.setPlainText(f"Lade till variabeln '{target_name}'.")
@@ -2397,10 +2675,8 @@ class CodeModuleWidget(QFrame):
                         else:
                             new_var = f"{target_name} = {formatted_code}"
                         
-                        new_code = new_var + "\n\n" + current_code
-                        
                         # Uppdatera koden
-                        self.code_editor.setPlainText(new_code)
+                        self.replace_code_range(current_code, 0, 0, new_var + "\n\n")
                         
                         # Visa resultat
                         self.llm_result_edit.setPlainText(f"Lade till variabeln '{target_name}'.")
@@ -2416,9 +2692,9 @@ class CodeModuleWidget(QFrame):
                     if property_name in class_info.get("properties", {}):
                         property_info = class_info["properties"][property_name]
                         
-                        if hasattr(property_info, 'ast_node'):
-                            # Via AST
-                            start_line = property_info.ast_node.lineno - 1
+                        if "lineno" in property_info:
+                            # Via strukturcachen
+                            start_line = property_info["lineno"] - 1
                             
                             # Dela koden i rader
                             lines = current_code.split('\n')
@@ -2437,10 +2713,8 @@ class CodeModuleWidget(QFrame):
                                 else:
                                     lines[start_line] = " " * indent + f"self.{property_name} = {formatted_code.strip()}"
                             
-                            new_code = '\n'.join(lines)
-                            
-                            # Uppdatera koden
-                            self.code_editor.setPlainText(new_code)
+                            # Uppdatera bara den ändrade raden
+                            self.replace_lines(start_line, start_line + 1, [lines[start_line]])
                             
                             # Visa resultat
                             self.llm_result_edit.setPlainText(f"Uppdaterade egenskapen '{class_name}.{property_name}'.")
@@ -2469,10 +2743,8 @@ class CodeModuleWidget(QFrame):
                                 if line_end < 0:
                                     line_end = len(current_code)
                                 
-                                new_code = current_code[:line_start] + replacement + current_code[line_end:]
-                                
-                                # Uppdatera koden
-                                self.code_editor.setPlainText(new_code)
+                                # Uppdatera bara raden
+                                self.replace_code_range(current_code, line_start, line_end, replacement)
                                 
                                 # Visa resultat
                                 self.llm_result_edit.setPlainText(f"Uppdaterade egenskapen '{class_name}.{property_name}'.")
@@ -2489,9 +2761,9 @@ class CodeModuleWidget(QFrame):
                                     if "methods" in class_info and "__init__" in class_info["methods"]:
                                         init_info = class_info["methods"]["__init__"]
                                         
-                                        if hasattr(init_info, 'ast_node'):
-                                            # Via AST
-                                            init_start_line = init_info.ast_node.lineno - 1
+                                        if "lineno" in init_info:
+                                            # Via strukturcachen
+                                            init_start_line = init_info["lineno"] - 1
                                             
                                             # Hitta första raden i funktionskroppen
                                             lines = current_code.split('\n')
@@ -2507,11 +2779,7 @@ class CodeModuleWidget(QFrame):
                                                 new_property = " " * indent + f"self.{property_name} = {formatted_code.strip()}"
                                             
                                             # Lägg till efter första raden i init
-                                            new_lines = lines[:first_body_line+1] + [new_property] + lines[first_body_line+1:]
-                                            new_code = '\n'.join(new_lines)
-                                            
-                                            # Uppdatera koden
-                                            self.code_editor.setPlainText(new_code)
+                                            self.replace_lines(first_body_line + 1, first_body_line + 1, [new_property])
                                             
                                             # Visa resultat
                                             self.llm_result_edit.setPlainText(f"Lade till egenskapen '{property_name}' i klassen '{class_name}'.")
@@ -2520,9 +2788,9 @@ class CodeModuleWidget(QFrame):
                                             self.llm_result_edit.setPlainText(f"Kunde inte hitta __init__-metodens kropp i klassen '{class_name}'.")
                                     else:
                                         # Hitta slutet av klassen för att lägga till __init__
-                                        if hasattr(class_info, 'ast_node'):
-                                            # Via AST
-                                            class_start_line = class_info.ast_node.lineno - 1
+                                        if "lineno" in class_info:
+                                            # Via strukturcachen
+                                            class_start_line = class_info["lineno"] - 1
                                             
                                             # Dela koden i rader
                                             lines = current_code.split('\n')
@@ -2539,11 +2807,7 @@ class CodeModuleWidget(QFrame):
                                             ]
                                             
                                             # Lägg till efter klassdeklarationen
-                                            new_lines = lines[:first_body_line] + new_init + lines[first_body_line:]
-                                            new_code = '\n'.join(new_lines)
-                                            
-                                            # Uppdatera koden
-                                            self.code_editor.setPlainText(new_code)
+                                            self.replace_lines(first_body_line, first_body_line, new_init)
                                             
                                             # Visa resultat
                                             self.llm_result_edit.setPlainText(f"Lade till __init__-metod med egenskapen '{property_name}' i klassen '{class_name}'.")
@@ -2598,10 +2862,8 @@ class CodeModuleWidget(QFrame):
                             if not replacement.endswith(';'):
                                 replacement += ';'
                         
-                        new_code = current_code[:match.start()] + replacement + current_code[match.end():]
-                        
-                        # Uppdatera koden
-                        self.code_editor.setPlainText(new_code)
+                        # Uppdatera bara tilldelningen
+                        self.replace_code_range(current_code, match.start(), match.end(), replacement)
                         
                         # Visa resultat
                         self.llm_result_edit.setPlainText(f"Uppdaterade variabeln '{target_name}'.")
@@ -2624,19 +2886,16 @@ class CodeModuleWidget(QFrame):
                         if not new_var.endswith(';'):
                             new_var += ';'
                         
-                        new_code = new_var + "\n\n" + current_code
-                        
                         # Uppdatera koden
-                        self.code_editor.setPlainText(new_code)
+                        self.replace_code_range(current_code, 0, 0, new_var + "\n\n")
                         
                         # Visa resultat
                         self.llm_result_edit.setPlainText(f"Lade till variabeln '{target_name}'.")
                     else:
                         self.llm_result_edit.setPlainText(f"Operationen avbröts: Variabeln '{target_name}' hittades inte.")
         
-        # Uppdatera strukturen
-        self.update_code_structure_cache()
-        self.update_structure_tree()
+        # Strukturen parsas om i bakgrunden när redigeringarna gjort en paus
+        self.structure_timer.start()
     
     def llm_suggest_structure(self, code):
         """Föreslå strukturella förbättringar baserat på den aktuella koden"""
@@ -2949,149 +3208,157 @@ Modulen innehåller:
         return prompt
     
     # Hjälpfunktioner för att hitta positioner i koden
-    def get_function_code_bounds(self, function_name):
-        """Hitta gränserna (start- och slutposition) för en funktion i koden"""
-        if function_name in self.function_cache:
-            func_info = self.function_cache[function_name]
-            
-            if hasattr(func_info, 'ast_node'):
-                # Via AST
-                start_line = func_info.ast_node.lineno - 1
-                end_line = func_info.ast_node.end_lineno if hasattr(func_info.ast_node, 'end_lineno') else -1
-                
-                # Om end_line inte är tillgänglig, försök hitta den manuellt
-                if end_line < 0:
-                    code = self.code_editor.toPlainText()
-                    lines = code.split('\n')
-                    
-                    # Hitta indentering för funktionsdefinitionen
-                    func_indent = len(lines[start_line]) - len(lines[start_line].lstrip())
-                    
-                    # Sök framåt för att hitta första raden med mindre indentering
-                    end_line = start_line
-                    for i in range(start_line + 1, len(lines)):
-                        line = lines[i]
-                        if line.strip() and len(line) - len(line.lstrip()) <= func_indent:
-                            # Hittade en rad med samma eller mindre indentering
-                            end_line = i - 1
-                            break
-                        end_line = i
-                
-                return start_line, end_line
+    def get_symbol_code_bounds(self, info):
+        """
+        Första och sista raden (0-baserade) för en post i strukturcachen.
+        Saknas slutraden, t.ex. för JavaScript-metoder, räknas den fram från
+        indraget. Ger (-1, -1) om posten saknas.
+        """
+        if not info or "lineno" not in info:
+            return -1, -1
+        start_line = info["lineno"] - 1
+        if "end_lineno" in info:
+            return start_line, info["end_lineno"] - 1
         
-        # Om funktionen inte hittades eller bounds inte kunde fastställas
-        return -1, -1
+        lines = self.code_editor.toPlainText().split('\n')
+        if start_line >= len(lines):
+            return -1, -1
+        
+        # Sök framåt efter första raden med samma eller mindre indentering
+        indent = len(lines[start_line]) - len(lines[start_line].lstrip())
+        end_line = start_line
+        for i in range(start_line + 1, len(lines)):
+            line = lines[i]
+            if line.strip() and len(line) - len(line.lstrip()) <= indent:
+                break
+            end_line = i
+        return start_line, end_line
+    
+    def get_function_code_bounds(self, function_name):
+        """Hitta gränserna (start- och slutrad) för en funktion i koden"""
+        return self.get_symbol_code_bounds(self.lookup_symbol(lambda: self.function_cache.get(function_name)))
     
     def get_class_code_bounds(self, class_name):
-        """Hitta gränserna (start- och slutposition) för en klass i koden"""
-        if class_name in self.class_cache:
-            class_info = self.class_cache[class_name]
-            
-            if hasattr(class_info, 'ast_node'):
-                # Via AST
-                start_line = class_info.ast_node.lineno - 1
+        """Hitta gränserna (start- och slutrad) för en klass i koden"""
+        info = self.lookup_symbol(lambda: self.class_cache.get(class_name))
 
 ## =======    PART - 5    ======= ##
-                end_line = class_info.ast_node.end_lineno if hasattr(class_info.ast_node, 'end_lineno') else -1
-                
-                # Om end_line inte är tillgänglig, försök hitta den manuellt
-                if end_line < 0:
-                    code = self.code_editor.toPlainText()
-                    lines = code.split('\n')
-                    
-                    # Hitta indentering för klassdefinitionen
-                    class_indent = len(lines[start_line]) - len(lines[start_line].lstrip())
-                    
-                    # Sök framåt för att hitta första raden med mindre indentering
-                    end_line = start_line
-                    for i in range(start_line + 1, len(lines)):
-                        line = lines[i]
-                        if line.strip() and len(line) - len(line.lstrip()) <= class_indent:
-                            # Hittade en rad med samma eller mindre indentering
-                            end_line = i - 1
-                            break
-                        end_line = i
-                
-                return start_line, end_line
-        
-        # Om klassen inte hittades eller bounds inte kunde fastställas
-        return -1, -1
+        return self.get_symbol_code_bounds(info)
     
     def get_method_code_bounds(self, class_name, method_name):
-        """Hitta gränserna (start- och slutposition) för en metod i en klass"""
-        if class_name in self.class_cache:
-            class_info = self.class_cache[class_name]
-            
-            if "methods" in class_info and method_name in class_info["methods"]:
-                method_info = class_info["methods"][method_name]
-                
-                if hasattr(method_info, 'ast_node'):
-                    # Via AST
-                    start_line = method_info.ast_node.lineno - 1
-                    end_line = method_info.ast_node.end_lineno if hasattr(method_info.ast_node, 'end_lineno') else -1
-                    
-                    # Om end_line inte är tillgänglig, försök hitta den manuellt
-                    if end_line < 0:
-                        code = self.code_editor.toPlainText()
-                        lines = code.split('\n')
-                        
-                        # Hitta indentering för metoddefinitionen
-                        method_indent = len(lines[start_line]) - len(lines[start_line].lstrip())
-                        
-                        # Sök framåt för att hitta första raden med samma eller mindre indentering
-                        end_line = start_line
-                        for i in range(start_line + 1, len(lines)):
-                            line = lines[i]
-                            if line.strip() and len(line) - len(line.lstrip()) <= method_indent:
-                                # Hittade en rad med samma eller mindre indentering
-                                end_line = i - 1
-                                break
-                            end_line = i
-                    
-                    return start_line, end_line
-        
-        # Om metoden inte hittades eller bounds inte kunde fastställas
-        return -1, -1
+        """Hitta gränserna (start- och slutrad) för en metod i en klass"""
+        return self.get_symbol_code_bounds(self.lookup_symbol(
+            lambda: self.class_cache.get(class_name, {}).get("methods", {}).get(method_name)
+        ))
     
     def get_variable_code_bounds(self, variable_name):
-        """Hitta gränserna (start- och slutposition) för en variabel i koden"""
-        if variable_name in self.variable_cache:
-            var_info = self.variable_cache[variable_name]
-            
-            if hasattr(var_info, 'ast_node'):
-                # Via AST
-                start_line = var_info.ast_node.lineno - 1
-                
-                # Variabler är normalt på en rad, men vi kontrollerar om det finns flerradiga värden
-                code = self.code_editor.toPlainText()
-                lines = code.split('\n')
-                
-                # Kolla om tilldelningen fortsätter på nästa rad
-                if lines[start_line].rstrip().endswith(('\\', '(', '[', '{')):
-                    # Tilldelningen kan fortsätta på flera rader
-                    open_brackets = lines[start_line].count('(') - lines[start_line].count(')') \
-                                  + lines[start_line].count('[') - lines[start_line].count(']') \
-                                  + lines[start_line].count('{') - lines[start_line].count('}')
-                    
-                    end_line = start_line
-                    for i in range(start_line + 1, len(lines)):
-                        line = lines[i]
-                        open_brackets += line.count('(') - line.count(')') \
-                                      + line.count('[') - line.count(']') \
-                                      + line.count('{') - line.count('}')
-                        end_line = i
-                        
-                        if open_brackets <= 0 and not line.rstrip().endswith('\\'):
-                            # Slutet på flerradig tilldelning
-                            break
-                else:
-                    # En-radstilldelning
-                    end_line = start_line
-                
-                return start_line, end_line
+        """Hitta gränserna (start- och slutrad) för en variabel i koden"""
+        var_info = self.lookup_symbol(lambda: self.variable_cache.get(variable_name))
+        if not var_info or "end_lineno" in var_info:
+            return self.get_symbol_code_bounds(var_info)
+        
+        # Utan slutrad: en tilldelning kan fortsätta över flera rader
+        start_line = var_info["lineno"] - 1
+        lines = self.code_editor.toPlainText().split('\n')
+        if start_line >= len(lines):
+            return -1, -1
+        if lines[start_line].rstrip().endswith(('\\', '(', '[', '{')):
+            open_brackets = lines[start_line].count('(') - lines[start_line].count(')') \
+                          + lines[start_line].count('[') - lines[start_line].count(']') \
+                          + lines[start_line].count('{') - lines[start_line].count('}')
+            
+            end_line = start_line
+            for i in range(start_line + 1, len(lines)):
+                line = lines[i]
+                open_brackets += line.count('(') - line.count(')') \
+                              + line.count('[') - line.count(']') \
+                              + line.count('{') - line.count('}')
+                end_line = i
+                
+                if open_brackets <= 0 and not line.rstrip().endswith('\\'):
+                    # Slutet på flerradig tilldelning
+                    break
+        else:
+            # En-radstilldelning
+            end_line = start_line
         
-        # Om variabeln inte hittades eller bounds inte kunde fastställas
-        return -1, -1
+        return start_line, end_line
+    
+    def get_symbol_code(self, info):
+        """Källtexten för en post i strukturcachen (från lookup_symbol), via spannet när det finns"""
+        if info and "span" in info:
+            start, end = info["span"]
+            return self.structure_text[start:end]
+        start, end = self.get_symbol_code_bounds(info)
+        if start >= 0 and end >= start:
+            lines = self.code_editor.toPlainText().split('\n')
+            return '\n'.join(lines[start:end+1])
+        return None
+    
+    def replace_range(self, start, end, text):
+        """
+        Ersätt dokumentets tecken mellan positionerna start och end med text
+        via en markör, som ett enda steg att ångra. Resten av dokumentet,
+        scrollpositionen och syntaxmarkeringen utanför ändringen lämnas orörda.
+        """
+        cursor = QTextCursor(self.code_editor.document())
+        cursor.beginEditBlock()
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(text)
+        cursor.endEditBlock()
+    
+    def replace_code_range(self, code, start, end, text):
+        """
+        Ersätt code[start:end] med text, där code är editorns nuvarande text.
+        Gäller cacharna för code flyttas deras spann direkt, så att nästa
+        redigering inte behöver vänta på en ny parsning.
+        """
+        self.replace_range(document_position(code, start), document_position(code, end), text)
+        if self.structure_text == code:
+            shift_structure((self.function_cache, self.class_cache, self.variable_cache), code, start, end, text)
+            self.structure_text = code[:start] + text + code[end:]
+            self.structure_partial = True
+    
+    def replace_lines(self, start, end, new_lines):
+        """
+        Ersätt raderna start..end-1 (0-baserade) med new_lines. Resultatet
+        blir detsamma som '\\n'.join(lines[:start] + new_lines + lines[end:]),
+        men bara de berörda raderna skrivs om.
+        """
+        code = self.code_editor.toPlainText()
+        offsets = line_offsets(code)
+        count = len(offsets)
+        start = max(0, min(start, count))
+        end = max(start, min(end, count))
+        text = '\n'.join(new_lines)
+        
+        if start < end:
+            if new_lines:
+                line_end = offsets[end] - 1 if end < count else len(code)
+                self.replace_code_range(code, offsets[start], line_end, text)
+            elif end < count:
+                # Raderna tas bort tillsammans med radbrytningen efter dem
+                self.replace_code_range(code, offsets[start], offsets[end], "")
+            elif start > 0:
+                self.replace_code_range(code, offsets[start] - 1, len(code), "")
+            else:
+                self.replace_code_range(code, 0, len(code), "")
+        elif new_lines:
+            if start < count:
+                self.replace_code_range(code, offsets[start], offsets[start], text + '\n')
+            else:
+                self.replace_code_range(code, len(code), len(code), '\n' + text)
+            # Infogade rader kan höra till symbolen ovanför; nästa redigering parsar om
+            self.structure_text = None
+    
+    def append_code(self, code):
+        """Lägg till kod sist i modulen, efter två radbrytningar om där redan finns kod"""
+        current_code = self.code_editor.toPlainText()
+        if current_code.strip():
+            self.replace_code_range(current_code, len(current_code), len(current_code), "\n\n" + code)
+        else:
+            self.replace_code_range(current_code, 0, len(current_code), code)
     
     def apply_automatic_formatting(self, code):
         """Tillämpa automatisk formatering och indentering på kod"""
@@ -3378,11 +3645,7 @@ Modulen innehåller:
     
     def get_function(self, function_name):
         """Hämta koden för en specifik funktion"""
-        start, end = self.get_function_code_bounds(function_name)
-        if start >= 0 and end >= start:
-            lines = self.code_editor.toPlainText().split('\n')
-            return '\n'.join(lines[start:end+1])
-        return None
+        return self.get_symbol_code(self.lookup_symbol(lambda: self.function_cache.get(function_name)))
     
     def update_function(self, function_name, new_code):
         """Uppdatera en befintlig funktion"""
@@ -3391,45 +3654,27 @@ Modulen innehåller:
             # Formatera den nya koden
             formatted_code = self.format_code(new_code)
             
-            # Uppdatera koden
-            lines = self.code_editor.toPlainText().split('\n')
-            new_lines = lines[:start] + formatted_code.split('\n') + lines[end+1:]
-            
-            self.code_editor.setPlainText('\n'.join(new_lines))
-            self.update_code_structure_cache()
-            self.update_structure_tree()
+            # Ersätt bara funktionens rader i dokumentet
+            self.replace_lines(start, end + 1, formatted_code.split('\n'))
+            self.structure_timer.start()
             return True
         return False
     
     def add_function(self, function_name, code):
         """Lägg till en ny funktion i modulen"""
         # Kontrollera om funktionen redan finns
+        self.ensure_structure_current(complete=True)
         if function_name in self.function_cache:
             return False
         
-        # Formatera koden
-        formatted_code = self.format_code(code)
-        
-        # Lägg till i slutet av filen
-        current_code = self.code_editor.toPlainText()
-        
-        if current_code.strip():
-            new_code = current_code + "\n\n" + formatted_code
-        else:
-            new_code = formatted_code
-        
-        self.code_editor.setPlainText(new_code)
-        self.update_code_structure_cache()
-        self.update_structure_tree()
+        # Formatera koden och lägg till den i slutet av filen
+        self.append_code(self.format_code(code))
+        self.structure_timer.start()
         return True
     
     def get_class(self, class_name):
         """Hämta koden för en specifik klass"""
-        start, end = self.get_class_code_bounds(class_name)
-        if start >= 0 and end >= start:
-            lines = self.code_editor.toPlainText().split('\n')
-            return '\n'.join(lines[start:end+1])
-        return None
+        return self.get_symbol_code(self.lookup_symbol(lambda: self.class_cache.get(class_name)))
     
     def update_class(self, class_name, new_code):
         """Uppdatera en befintlig klass"""
@@ -3438,45 +3683,29 @@ Modulen innehåller:
             # Formatera den nya koden
             formatted_code = self.format_code(new_code)
             
-            # Uppdatera koden
-            lines = self.code_editor.toPlainText().split('\n')
-            new_lines = lines[:start] + formatted_code.split('\n') + lines[end+1:]
-            
-            self.code_editor.setPlainText('\n'.join(new_lines))
-            self.update_code_structure_cache()
-            self.update_structure_tree()
+            # Ersätt bara klassens rader i dokumentet
+            self.replace_lines(start, end + 1, formatted_code.split('\n'))
+            self.structure_timer.start()
             return True
         return False
     
     def add_class(self, class_name, code):
         """Lägg till en ny klass i modulen"""
         # Kontrollera om klassen redan finns
+        self.ensure_structure_current(complete=True)
         if class_name in self.class_cache:
             return False
         
-        # Formatera koden
-        formatted_code = self.format_code(code)
-        
-        # Lägg till i slutet av filen
-        current_code = self.code_editor.toPlainText()
-        
-        if current_code.strip():
-            new_code = current_code + "\n\n" + formatted_code
-        else:
-            new_code = formatted_code
-        
-        self.code_editor.setPlainText(new_code)
-        self.update_code_structure_cache()
-        self.update_structure_tree()
+        # Formatera koden och lägg till den i slutet av filen
+        self.append_code(self.format_code(code))
+        self.structure_timer.start()
         return True
     
     def get_method(self, class_name, method_name):
         """Hämta koden för en specifik metod"""
-        start, end = self.get_method_code_bounds(class_name, method_name)
-        if start >= 0 and end >= start:
-            lines = self.code_editor.toPlainText().split('\n')
-            return '\n'.join(lines[start:end+1])
-        return None
+        return self.get_symbol_code(self.lookup_symbol(
+            lambda: self.class_cache.get(class_name, {}).get("methods", {}).get(method_name)
+        ))
     
     def update_method(self, class_name, method_name, new_code):
         """Uppdatera en befintlig metod"""
@@ -3488,19 +3717,16 @@ Modulen innehåller:
                 "class_method"
             )
             
-            # Uppdatera koden
-            lines = self.code_editor.toPlainText().split('\n')
-            new_lines = lines[:start] + formatted_code.split('\n') + lines[end+1:]
-            
-            self.code_editor.setPlainText('\n'.join(new_lines))
-            self.update_code_structure_cache()
-            self.update_structure_tree()
+            # Ersätt bara metodens rader i dokumentet
+            self.replace_lines(start, end + 1, formatted_code.split('\n'))
+            self.structure_timer.start()
             return True
         return False
     
     def add_method(self, class_name, method_name, code):
         """Lägg till en ny metod i en klass"""
         # Kontrollera om klassen finns
+        self.ensure_structure_current(complete=True)
         if class_name not in self.class_cache:
             return False
         
@@ -3521,36 +3747,33 @@ Modulen innehåller:
         if start < 0 or end < start:
             return False
         
-        # Lägg till metoden i slutet av klassen
-        lines = self.code_editor.toPlainText().split('\n')
-        new_lines = lines[:end] + formatted_code.split('\n') + lines[end:]
-        
-        self.code_editor.setPlainText('\n'.join(new_lines))
-        self.update_code_structure_cache()
-        self.update_structure_tree()
+        # Lägg till metoden efter klassens sista rad, i JavaScript före den avslutande klammern
+        if self.module_data["extension"].lower().endswith('.py'):
+            self.replace_lines(end + 1, end + 1, [""] + formatted_code.split('\n'))
+        else:
+            self.replace_lines(end, end, formatted_code.split('\n'))
+        self.structure_timer.start()
         return True
     
     def get_variable(self, variable_name):
         """Hämta värdet för en global variabel"""
-        if variable_name in self.variable_cache:
-            start, end = self.get_variable_code_bounds(variable_name)
-            if start >= 0 and end >= start:
-                lines = self.code_editor.toPlainText().split('\n')
-                var_code = '\n'.join(lines[start:end+1])
-                
-                # Försök extrahera bara värdet
-                match = re.search(rf'{re.escape(variable_name)}\s*=\s*(.*)', var_code)
-                if match:
-                    return match.group(1)
-                return var_code
+        start, end = self.get_variable_code_bounds(variable_name)
+        if start >= 0 and end >= start:
+            lines = self.code_editor.toPlainText().split('\n')
+            var_code = '\n'.join(lines[start:end+1])
+            
+            # Försök extrahera bara värdet
+            match = re.search(rf'{re.escape(variable_name)}\s*=\s*(.*)', var_code)
+            if match:
+                return match.group(1)
+            return var_code
         return None
     
     def update_variable(self, variable_name, new_value):
         """Uppdatera en befintlig variabel"""
         start, end = self.get_variable_code_bounds(variable_name)
         if start >= 0 and end >= start:
-            lines = self.code_editor.toPlainText().split('\n')
-            var_line = lines[start]
+            var_line = self.code_editor.document().findBlockByNumber(start).text()
             
             # Hitta positionen för "="
             pos = var_line.find('=')
@@ -3558,18 +3781,15 @@ Modulen innehåller:
                 # Behåll variabeldeklarationen, uppdatera bara värdet
                 new_line = var_line[:pos+1] + " " + new_value
                 
-                # Uppdatera koden
-                new_lines = lines[:start] + [new_line] + lines[end+1:]
-                
-                self.code_editor.setPlainText('\n'.join(new_lines))
-                self.update_code_structure_cache()
-                self.update_structure_tree()
+                self.replace_lines(start, end + 1, [new_line])
+                self.structure_timer.start()
                 return True
         return False
     
     def add_variable(self, variable_name, value):
         """Lägg till en ny global variabel"""
         # Kontrollera om variabeln redan finns
+        self.ensure_structure_current(complete=True)
         if variable_name in self.variable_cache:
             return False
         
@@ -3583,15 +3803,11 @@ Modulen innehåller:
         
         # Lägg till i början av filen
         current_code = self.code_editor.toPlainText()
-        
         if current_code.strip():
-            new_code = var_declaration + "\n\n" + current_code
+            self.replace_code_range(current_code, 0, 0, var_declaration + "\n\n")
         else:
-            new_code = var_declaration
-        
-        self.code_editor.setPlainText(new_code)
-        self.update_code_structure_cache()
-        self.update_structure_tree()
+            self.replace_code_range(current_code, 0, len(current_code), var_declaration)
+        self.structure_timer.start()
         return True
 
     @property
@@ -0,0 +1,336 @@
+# ./ui/module_list_model.py
+from bisect import bisect_left
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize
+from PySide6.QtGui import QColor, QFont, QPainter, QPen
+from PySide6.QtWidgets import QListView, QStyle, QStyledItemDelegate
+
+from utils.facet_index import FacetIndex
+
+# Fast korthöjd gör att vyn kan använda enhetliga storlekar
+CARD_HEIGHT = 120
+CARD_MARGIN = 6
+PREVIEW_LINES = 3
+
+
+class ModuleListModel(QAbstractListModel):
+    """
+    Listmodell över en sidas moduler. Modellen delar postlistan med fliken
+    och håller bara en lista med synliga radindex, så filtrering bygger
+    aldrig om några widgets. Facettindexet för sidan hålls i modellen så
+    att det cachas tillsammans med den.
+    """
+
+    ModuleIdRole = Qt.UserRole + 1
+    ModuleDataRole = Qt.UserRole + 2
+    PreviewRole = Qt.UserRole + 3
+    MetaRole = Qt.UserRole + 4
+
+    def __init__(self, modules=None, parent=None):
+        super().__init__(parent)
+        self._modules = modules if modules is not None else []
+        self._rows = list(range(len(self._modules)))
+        self._predicate = None
+        self._allowed_ids = None
+        self._ranking = None
+        self._preview_cache = {}
+        self.facets = FacetIndex(self._modules)
+        self._row_of_id = self._index_rows()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+
+        module = self._modules[self._rows[index.row()]]
+        if role == Qt.DisplayRole:
+            return module.get("name", "")
+        if role == self.ModuleIdRole:
+            return module.get("id")
+        if role == self.ModuleDataRole:
+            return module
+        if role == self.PreviewRole:
+            return self._preview(module)
+        if role == self.MetaRole:
+            parts = [module.get("extension", ""), module.get("category", "other")]
+            tags = module.get("tags", [])
+            if tags:
+                parts.append(", ".join(tags))
+            return "  ·  ".join(part for part in parts if part)
+        if role == Qt.ToolTipRole:
+            return module.get("description") or module.get("file_path") or module.get("name", "")
+        return None
+
+    def _preview(self, module):
+        """Hämta de första kodraderna, cachade per modul och kodversion."""
+        code = module.get("code", "")
+        cached = self._preview_cache.get(module.get("id"))
+        if cached is not None and cached[0] is code:
+            return cached[1]
+
+        lines = []
+        for line in code.splitlines():
+            if line.strip():
+                lines.append(line.rstrip()[:120])
+                if len(lines) >= PREVIEW_LINES:
+                    break
+        preview = "\n".join(lines)
+        self._preview_cache[module.get("id")] = (code, preview)
+        return preview
+
+    def set_modules(self, modules):
+        """Byt postlista och applicera aktuellt filter."""
+        self.beginResetModel()
+        self._modules = modules
+        self._preview_cache.clear()
+        self.facets.rebuild(modules)
+        self._row_of_id = self._index_rows()
+        self._rows = self._filtered_rows()
+        self.endResetModel()
+
+    def set_filter(self, predicate=None, allowed_ids=None):
+        """
+        Sätt ett filter: en mängd tillåtna modul-id:n (t.ex. från
+        facettindexet) och/eller en funktion som tar en modul. None betyder
+        att den delen inte filtrerar.
+        """
+        self.beginResetModel()
+        self._predicate = predicate
+        # Egen kopia eftersom mängden utökas av extend_filter och module_added
+        self._allowed_ids = set(allowed_ids) if allowed_ids is not None else None
+        self._rows = self._filtered_rows()
+        self.endResetModel()
+
+    def set_ranking(self, scores=None):
+        """
+        Sortera synliga rader efter relevans, {modul-id: poäng}; moduler med
+        samma poäng behåller sidordningen. None återgår till sidordning.
+        """
+        if scores is None and self._ranking is None:
+            return
+        self.beginResetModel()
+        self._ranking = scores
+        self._rows = self._filtered_rows()
+        self.endResetModel()
+
+    def is_ranked(self):
+        return self._ranking is not None
+
+    def refresh(self):
+        """Läs om postlistan efter att moduler lagts till eller tagits bort."""
+        self.set_modules(self._modules)
+
+    def extend_filter(self, module_ids):
+        """Tillåt fler modul-id:n, t.ex. när sökträffar strömmar in."""
+        if self._allowed_ids is None:
+            return
+        row_of_id = self._row_of_id
+        positions = sorted(
+            row_of_id[module_id] for module_id in module_ids
+            if module_id in row_of_id and module_id not in self._allowed_ids
+        )
+        self._allowed_ids.update(module_ids)
+        if self._predicate is not None:
+            positions = [i for i in positions if self._predicate(self._modules[i])]
+        if not positions:
+            return
+
+        if self._ranking is not None or (self._rows and positions[0] < self._rows[-1]):
+            # Träffar mitt i listan eller rankad ordning: räkna om raderna
+            self.beginResetModel()
+            self._rows = self._filtered_rows()
+            self.endResetModel()
+            return
+
+        # Träffar kommer i sidordning och läggs normalt till sist
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(positions) - 1)
+        self._rows.extend(positions)
+        self.endInsertRows()
+
+    def module_added(self, module):
+        """Ta med en modul som lagts till sist i postlistan."""
+        self.modules_added([module])
+
+    def modules_added(self, modules):
+        """Ta med flera moduler som lagts till sist i postlistan, i en enda insättning."""
+        if not modules:
+            return
+        first = len(self._modules) - len(modules)
+        for offset, module in enumerate(modules):
+            self.facets.add(module)
+            self._row_of_id[module.get("id")] = first + offset
+            # En ny modul visas direkt, även om ett filter är aktivt
+            if self._allowed_ids is not None:
+                self._allowed_ids.add(module.get("id"))
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row + len(modules) - 1)
+        self._rows.extend(range(first, first + len(modules)))
+        self.endInsertRows()
+
+    def module_removed(self, module_id):
+        """Släpp en modul som tagits bort ur postlistan."""
+        self.facets.remove(module_id)
+        self._preview_cache.pop(module_id, None)
+        # Radindexen efter den borttagna modulen förskjuts
+        self.beginResetModel()
+        self._row_of_id = self._index_rows()
+        self._rows = self._filtered_rows()
+        self.endResetModel()
+
+    def _index_rows(self):
+        return {module.get("id"): position for position, module in enumerate(self._modules)}
+
+    def _filtered_rows(self):
+        if self._allowed_ids is not None:
+            # Facettfiltret ger id:n direkt; bara träffarna slås upp
+            row_of_id = self._row_of_id
+            rows = sorted(row_of_id[module_id] for module_id in self._allowed_ids if module_id in row_of_id)
+        else:
+            rows = range(len(self._modules))
+        if self._predicate is not None:
+            predicate = self._predicate
+            rows = [i for i in rows if predicate(self._modules[i])]
+        rows = list(rows)
+        if self._ranking is not None:
+            ranking = self._ranking
+            modules = self._modules
+            rows.sort(key=lambda i: -ranking.get(modules[i].get("id"), 0.0))
+        return rows
+
+    def module_changed(self, module_id):
+        """Indexera om en ändrad modul och rita om dess kort."""
+        position = self._row_of_id.get(module_id)
+        if position is not None:
+            self.facets.update(self._modules[position])
+        row = self.row_for_id(module_id)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def module_at(self, row):
+        if 0 <= row < len(self._rows):
+            return self._modules[self._rows[row]]
+        return None
+
+    def row_for_id(self, module_id):
+        position = self._row_of_id.get(module_id)
+        if position is None:
+            return -1
+        if self._ranking is not None:
+            try:
+                return self._rows.index(position)
+            except ValueError:
+                return -1
+        # Synliga rader är sorterade postindex
+        row = bisect_left(self._rows, position)
+        if row < len(self._rows) and self._rows[row] == position:
+            return row
+        return -1
+
+    def visible_count(self):
+        return len(self._rows)
+
+    def total_count(self):
+        return len(self._modules)
+
+
+class ModuleCardDelegate(QStyledItemDelegate):
+    """Ritar en modul som ett lättviktigt kort i stället för en hel widget."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.name_font = QFont()
+        self.name_font.setPointSize(11)
+        self.name_font.setBold(True)
+        self.meta_font = QFont()
+        self.meta_font.setPointSize(9)
+        self.code_font = QFont("Consolas")
+        self.code_font.setStyleHint(QFont.Monospace)
+        self.code_font.setPointSize(9)
+
+    def sizeHint(self, option, index):
+        view = self.parent()
+        if isinstance(view, QListView) and view.gridSize().isValid():
+            return view.gridSize()
+        return QSize(max(200, option.rect.width()), CARD_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        rect = option.rect.adjusted(CARD_MARGIN, CARD_MARGIN, -CARD_MARGIN, -CARD_MARGIN)
+        selected = bool(option.state & QStyle.State_Selected)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+
+        # Kortbakgrund i samma stil som create_card
+        painter.setPen(QPen(QColor("#007ACC" if selected else "#777777" if hovered else "#555555"), 1))
+        painter.setBrush(QColor("#2E2E2E"))
+        painter.drawRoundedRect(rect, 8, 8)
+
+        inner = rect.adjusted(10, 8, -10, -8)
+
+        painter.setFont(self.name_font)
+        painter.setPen(QColor("#FFFFFF"))
+        name_rect = QRect(inner.left(), inner.top(), inner.width(), 20)
+        name = painter.fontMetrics().elidedText(index.data(Qt.DisplayRole) or "", Qt.ElideRight, inner.width())
+        painter.drawText(name_rect, Qt.AlignLeft | Qt.AlignVCenter, name)
+
+        painter.setFont(self.meta_font)
+        painter.setPen(QColor("#AAAAAA"))
+        meta_rect = QRect(inner.left(), name_rect.bottom() + 2, inner.width(), 16)
+        meta = painter.fontMetrics().elidedText(index.data(ModuleListModel.MetaRole) or "", Qt.ElideRight, inner.width())
+        painter.drawText(meta_rect, Qt.AlignLeft | Qt.AlignVCenter, meta)
+
+        painter.setFont(self.code_font)
+        painter.setPen(QColor("#9CDCFE"))
+        code_rect = QRect(inner.left(), meta_rect.bottom() + 4, inner.width(), inner.bottom() - meta_rect.bottom() - 4)
+        metrics = painter.fontMetrics()
+        y = code_rect.top()
+        for line in (index.data(ModuleListModel.PreviewRole) or "").split("\n"):
+            if y + metrics.height() > code_rect.bottom() + 1:
+                break
+            painter.drawText(
+                QRect(code_rect.left(), y, code_rect.width(), metrics.height()),
+                Qt.AlignLeft | Qt.AlignVCenter,
+                metrics.elidedText(line, Qt.ElideRight, code_rect.width())
+            )
+            y += metrics.height()
+
+        painter.restore()
+
+
+class ModuleListView(QListView):
+    """Virtualiserad kortvy med två kolumner."""
+
+    def __init__(self, columns=2, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setSelectionMode(QListView.SingleSelection)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.setMouseTracking(True)
+        self.setItemDelegate(ModuleCardDelegate(self))
+        self.setStyleSheet("""
+            QListView {
+                background-color: #1E1E1E;
+                border: none;
+            }
+        """)
+
+    def resizeEvent(self, event):
+        # Korten delar bredden lika mellan kolumnerna
+        width = max(200, (self.viewport().width() - 2) // self.columns)
+        self.setGridSize(QSize(width, CARD_HEIGHT))
+        super().resizeEvent(event)
@@ -0,0 +1,123 @@
+# ./ui/quick_open.py
+import os
+
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import QFrame, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+
+from utils.symbol_index import KIND_LABELS
+
+KIND_ICONS = {"module": "📦", "file": "📄", "class": "🔷", "function": "ƒ", "method": "◇"}
+
+
+class QuickOpenPalette(QFrame):
+    """
+    Snabbval (Ctrl+P) för moduler, filer och symboler i hela biblioteket.
+    Listan filtreras direkt vid varje tangenttryckning mot indexerarens
+    ögonblicksbild; Enter eller dubbelklick skickar locationSelected.
+    """
+
+    locationSelected = Signal(object)   # post från SymbolIndex
+
+    MAX_RESULTS = 50
+
+    def __init__(self, find, parent=None):
+        super().__init__(parent, Qt.Popup)
+        self.find = find
+        self.setMinimumWidth(560)
+        self.setStyleSheet("""
+            QFrame {
+                background-color: #1e1e1e;
+                border: 1px solid #3d3d3d;
+                border-radius: 6px;
+            }
+            QLineEdit {
+                padding: 8px;
+                font-size: 14px;
+                border-radius: 5px;
+            }
+            QListWidget {
+                border: none;
+            }
+            QListWidget::item:selected {
+                background-color: #0e639c;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(6)
+
+        self.input = QLineEdit()
+        self.input.setPlaceholderText("Gå till modul, fil eller symbol...")
+        self.input.textChanged.connect(self.update_results)
+        self.input.returnPressed.connect(self.accept_current)
+        self.input.installEventFilter(self)
+        layout.addWidget(self.input)
+
+        self.results = QListWidget()
+        self.results.setUniformItemSizes(True)
+        self.results.itemActivated.connect(self.accept_item)
+        layout.addWidget(self.results)
+
+        self.hint = QLabel("")
+        self.hint.setStyleSheet("color: #8c8c8c; border: none;")
+        layout.addWidget(self.hint)
+
+    def popup(self, anchor):
+        """Visa paletten centrerad överst i anchor."""
+        self.input.clear()
+        self.update_results("")
+        width = max(self.minimumWidth(), anchor.width() // 2)
+        self.resize(width, 420)
+        top_left = anchor.mapToGlobal(anchor.rect().topLeft())
+        self.move(top_left.x() + (anchor.width() - width) // 2, top_left.y() + 40)
+        self.show()
+        self.input.setFocus()
+
+    def update_results(self, text):
+        """Fyll listan med de bäst rankade träffarna."""
+        self.results.clear()
+        if not text.strip():
+            self.hint.setText("Skriv för att söka bland moduler, filer, klasser och funktioner")
+            return
+
+        entries = self.find(text, self.MAX_RESULTS)
+        for entry in entries:
+            kind, name, line, module_name, source, module_id, doc_kind, file_path = entry
+            if kind in ("module", "file"):
+                where = file_path or os.path.basename(source)
+            else:
+                where = f"{module_name}:{line}"
+            item = QListWidgetItem(f"{KIND_ICONS.get(kind, '')}  {name}    — {where}")
+            item.setToolTip(f"{KIND_LABELS.get(kind, kind)} i {file_path or source}")
+            item.setData(Qt.UserRole, entry)
+            self.results.addItem(item)
+
+        if entries:
+            self.results.setCurrentRow(0)
+            self.hint.setText(f"{len(entries)} träffar")
+        else:
+            self.hint.setText("Inga träffar")
+
+    def eventFilter(self, obj, event):
+        # Piltangenterna i sökfältet flyttar markeringen i listan
+        if obj is self.input and event.type() == event.Type.KeyPress:
+            key = event.key()
+            if key in (Qt.Key_Down, Qt.Key_Up, Qt.Key_PageDown, Qt.Key_PageUp):
+                count = self.results.count()
+                if count:
+                    step = {Qt.Key_Down: 1, Qt.Key_Up: -1, Qt.Key_PageDown: 10, Qt.Key_PageUp: -10}[key]
+                    row = min(max(self.results.currentRow() + step, 0), count - 1)
+                    self.results.setCurrentRow(row)
+                return True
+        return super().eventFilter(obj, event)
+
+    def accept_current(self):
+        item = self.results.currentItem()
+        if item is not None:
+            self.accept_item(item)
+
+    def accept_item(self, item):
+        entry = item.data(Qt.UserRole)
+        self.hide()
+        self.locationSelected.emit(entry)
@@ -6,7 +6,7 @@ import glob
 import json
 import ast
 
-from PySide6.QtCore import Qt, Signal, QMimeData, QPoint
+from PySide6.QtCore import Qt, Signal, QMimeData, QPoint, QTimer
 from PySide6.QtGui import QFont, QAction, QKeySequence, QDrag, QIcon, QColor, QLinearGradient, QPalette
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit,
@@ -16,6 +16,8 @@ from PySide6.QtWidgets import (
 
 from utils.theme_utils import apply_dark_theme
 from utils.card_utils import create_card
+from utils.history_utils import PageHistory
+from utils import startup_profiler
 
 IS_PHONE = False  # Adjust as needed
 
@@ -312,10 +314,18 @@ class SearchTab(QWidget):
                 json.dump([], f, indent=4)
         self.current_file_index = 0
         self.search_fields = []
-        self.history = []
-        self.history_index = -1
+        # Undo history is persisted per page and read lazily from disk
+        self.page_history = PageHistory(self.json_files[self.current_file_index])
         self.initUI()
-        self.load_data(self.json_files[self.current_file_index])
+        # Fields are loaded after the first paint so the tab appears immediately
+        startup_profiler.begin_phase("search: deferred load")
+        QTimer.singleShot(0, lambda: self.initial_load())
+    
+    def initial_load(self):
+        """Load the first page once the tab has been shown."""
+        with startup_profiler.profile_phase("search: load_data"):
+            self.load_data(self.json_files[self.current_file_index])
+        startup_profiler.end_phase("search: deferred load")
     
     def ensure_directory_exists(self):
         os.makedirs(self.json_directory, exist_ok=True)
@@ -475,23 +485,21 @@ class SearchTab(QWidget):
         self.save_data()
     
     def update_history(self):
-        self.history = self.history[:self.history_index + 1]
-        self.history.append(json.loads(json.dumps(self.search_fields)))
-        self.history_index += 1
+        self.page_history.record(self.search_fields)
     
     def undo(self):
-        if self.history_index > 0:
-            self.history_index -= 1
-            self.search_fields = json.loads(json.dumps(self.history[self.history_index]))
+        state = self.page_history.undo()
+        if state is not None:
+            self.search_fields = state
             self.refresh_ui()
             self.save_data()
         else:
             QMessageBox.information(self, "Info", "Nothing to undo.")
     
     def redo(self):
-        if self.history_index < len(self.history) - 1:
-            self.history_index += 1
-            self.search_fields = json.loads(json.dumps(self.history[self.history_index]))
+        state = self.page_history.redo()
+        if state is not None:
+            self.search_fields = state
             self.refresh_ui()
             self.save_data()
         else:
@@ -542,7 +550,9 @@ class SearchTab(QWidget):
             with open(file_name, "r") as f:
                 self.search_fields = json.load(f)
             self.refresh_ui()
-            self.update_history()
+            if self.page_history.page_file != file_name:
+                self.page_history = PageHistory(file_name)
+            self.page_history.reset_baseline(self.search_fields)
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
     
@@ -583,6 +593,7 @@ class SearchTab(QWidget):
         if reply == QMessageBox.Yes:
             try:
                 os.remove(current)
+                PageHistory(current).delete()
                 self.json_files.pop(self.current_file_index)
                 if self.current_file_index >= len(self.json_files):
                     self.current_file_index = len(self.json_files) - 1
@@ -0,0 +1,87 @@
+# ./ui/tree_reconciler.py
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QTreeWidgetItem
+
+# Nyckeln som identifierar ett objekt mellan två uppdateringar
+KEY_ROLE = Qt.UserRole + 1
+
+
+def node(texts, children=(), expanded=False, key=None):
+    """
+    Beskrivning av ett trädobjekt: kolumntexter, barn och om objektet ska
+    vara expanderat när det skapas. Nyckeln är typ och namn om inget anges.
+    """
+    # Nycklar lagras som text; tupler kommer inte tillbaka oförändrade från data()
+    return (key if key is not None else f"{texts[1]}\x1f{texts[0]}", list(texts), list(children), expanded)
+
+
+def _unique(specs):
+    """Gör nycklarna unika bland syskon, t.ex. när två parametrar heter likadant."""
+    seen = {}
+    result = []
+    for key, texts, children, expanded in specs:
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        result.append((f"{key}\x1f{count}" if count else key, texts, children, expanded))
+    return result
+
+
+def reconcile_children(parent, specs, previous=None):
+    """
+    Uppdatera parent:s barn så att de motsvarar specs (från node()).
+    Befintliga objekt med samma nyckel behålls och får bara ändrade
+    texter uppdaterade, så expansion och markering finns kvar; objekt som
+    försvunnit tas bort och nya skapas där de hör hemma. previous är
+    specs från förra avstämningen; oförändrade delträd hoppas då över
+    utan att objekten ens läses. Returnerar specs att spara till nästa gång.
+    """
+    specs = _unique(specs)
+    if previous is not None and previous == specs and parent.childCount() == len(specs):
+        return previous
+    previous_by_key = {spec[0]: spec for spec in previous} if previous is not None else {}
+    wanted = {spec[0] for spec in specs}
+
+    # Ta bort objekt som inte längre finns, bakifrån så att indexen håller
+    existing = {}
+    for index in range(parent.childCount() - 1, -1, -1):
+        item = parent.child(index)
+        key = item.data(0, KEY_ROLE)
+        if key not in wanted or key in existing:
+            parent.takeChild(index)
+        else:
+            existing[key] = item
+
+    result = []
+    for index, (key, texts, children, expanded) in enumerate(specs):
+        item = parent.child(index) if index < parent.childCount() else None
+        created = False
+        if item is None or item.data(0, KEY_ROLE) != key:
+            moved = existing.get(key)
+            if moved is not None:
+                # Ordningen har ändrats; objektet flyttas i stället för att byggas om
+                item = parent.takeChild(parent.indexOfChild(moved))
+            else:
+                item = QTreeWidgetItem(texts)
+                item.setData(0, KEY_ROLE, key)
+                created = True
+            parent.insertChild(index, item)
+            if created and expanded:
+                item.setExpanded(True)
+        known = None if created else previous_by_key.get(key)
+        if not created and (known is None or known[1] != texts):
+            # Gäller även flyttade objekt, vars radnummer oftast ändrats
+            for column, text in enumerate(texts):
+                if item.text(column) != text:
+                    item.setText(column, text)
+        result.append((key, texts, reconcile_children(item, children, known[2] if known else None), expanded))
+    return result
+
+
+def reconcile_tree(tree, specs):
+    """Stäm av ett helt QTreeWidget mot specs utan att rita om under tiden."""
+    previous = getattr(tree, "_reconciled_specs", None)
+    tree.setUpdatesEnabled(False)
+    try:
+        tree._reconciled_specs = reconcile_children(tree.invisibleRootItem(), specs, previous)
+    finally:
+        tree.setUpdatesEnabled(True)
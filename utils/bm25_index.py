@@ -0,0 +1,300 @@
+# ./utils/bm25_index.py
+import os
+import re
+import sys
+import math
+import json
+import zlib
+import base64
+import heapq
+from array import array
+from bisect import bisect_left
+
+BM25_VERSION = 1
+BM25_MAGIC = b"CMB1"
+
+# Fält i samma ordning som i postlistornas frekvenser
+FIELDS = ("name", "tags", "description", "code")
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.5, "description": 1.5, "code": 1.0}
+# Längdnormalisering per fält; korta fält som namn och taggar normaliseras knappt
+FIELD_B = {"name": 0.3, "tags": 0.3, "description": 0.75, "code": 0.75}
+K1 = 1.2
+
+MAX_TF = 0xFFFF
+
+# Nyckelord som inte säger något om vad en modul gör
+STOPWORDS = {
+    "and", "as", "assert", "async", "await", "break", "case", "catch", "class", "const", "continue",
+    "def", "default", "del", "do", "elif", "else", "except", "export", "false", "finally", "for",
+    "from", "function", "if", "import", "in", "is", "let", "new", "none", "not", "null", "or",
+    "pass", "raise", "return", "self", "switch", "this", "throw", "true", "try", "var", "while",
+    "with", "yield", "the", "of", "to", "a", "an", "och", "att", "som", "en", "ett", "för", "med",
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]\w*", re.UNICODE)
+_PART_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[^\W\d_]+")
+
+
+def tokenize(text):
+    """
+    Dela upp text i termer i gemener. Identifierare delas också på
+    snake_case och camelCase, så att parseConfig ger parseconfig,
+    parse och config.
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        lower = word.lower()
+        if len(lower) > 1 and lower not in STOPWORDS:
+            tokens.append(lower)
+        parts = _PART_RE.findall(word)
+        if len(parts) > 1:
+            for part in parts:
+                part = part.lower()
+                if len(part) > 1 and part not in STOPWORDS:
+                    tokens.append(part)
+    return tokens
+
+
+def field_texts(fields):
+    """Fälttexterna för ett dokument i trigramindexet."""
+    return [fields.get(field, "") or "" for field in FIELDS]
+
+
+class Bm25Index:
+    """
+    Fältviktat BM25 (BM25F) över modulernas namn, taggar, beskrivning och
+    identifierare i koden. Varje term har en sorterad array med
+    dokument-id:n och en parallell array med frekvens per fält. Dokument-id:n
+    delas ut av trigramindexet, så postlistorna växer bara i slutet och
+    ändrade dokument lämnas som döda id:n tills indexet komprimeras.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.ids = {}        # term -> array("I") med dokument-id:n
+        self.tfs = {}        # term -> array("H") med len(FIELDS) frekvenser per post
+        self.lengths = {}    # dokument-id -> (längd per fält)
+        self.totals = [0] * len(FIELDS)
+        self.dead = 0
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id, fields):
+        """Indexera ett dokument; doc_id måste vara större än alla tidigare."""
+        counts = {}
+        lengths = []
+        for position, text in enumerate(field_texts(fields)):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for token in tokens:
+                frequencies = counts.get(token)
+                if frequencies is None:
+                    frequencies = counts[token] = [0] * len(FIELDS)
+                frequencies[position] += 1
+
+        for term, frequencies in counts.items():
+            ids = self.ids.get(term)
+            if ids is None:
+                self.ids[term] = array("I", (doc_id,))
+                self.tfs[term] = array("H", (min(tf, MAX_TF) for tf in frequencies))
+            else:
+                ids.append(doc_id)
+                self.tfs[term].extend(min(tf, MAX_TF) for tf in frequencies)
+
+        self.lengths[doc_id] = tuple(lengths)
+        for position, length in enumerate(lengths):
+            self.totals[position] += length
+        self.dirty = True
+
+    def remove(self, doc_id):
+        """Ta bort ett dokument; postningarna filtreras bort vid sökning."""
+        lengths = self.lengths.pop(doc_id, None)
+        if lengths is None:
+            return
+        for position, length in enumerate(lengths):
+            self.totals[position] -= length
+        self.dead += 1
+        self.dirty = True
+
+    def compact(self, docs):
+        """Bygg om postlistorna när de döda id:na blivit fler än de levande."""
+        if self.dead <= max(1000, len(self.lengths)):
+            return False
+        self.rebuild(docs)
+        return True
+
+    def rebuild(self, docs):
+        """Bygg om hela indexet från trigramindexets dokument."""
+        self.clear()
+        for doc_id in sorted(docs):
+            self.add(doc_id, docs[doc_id]["fields"])
+        self.dirty = True
+
+    def _idf(self, term):
+        # Dokumentfrekvensen räknar även döda id:n; komprimeringen håller felet litet
+        count = len(self.lengths)
+        df = len(self.ids.get(term, ()))
+        return math.log(1.0 + (count - df + 0.5) / (df + 0.5))
+
+    def _normalizers(self):
+        """Konstanter per fält: vikt, 1 - b och b / medellängd."""
+        count = max(len(self.lengths), 1)
+        constants = []
+        for position, field in enumerate(FIELDS):
+            average = max(self.totals[position] / count, 1.0)
+            constants.extend((FIELD_WEIGHTS[field], 1.0 - FIELD_B[field], FIELD_B[field] / average))
+        return constants
+
+    def _accumulate(self, term, idf, scores, normalizers, only=None):
+        """
+        Lägg termens BM25F-bidrag till scores. Med only slås bara de
+        dokumenten upp, i stället för att hela postlistan läses.
+        """
+        ids = self.ids[term]
+        tfs = self.tfs[term]
+        lengths = self.lengths
+        w0, c0, d0, w1, c1, d1, w2, c2, d2, w3, c3, d3 = normalizers
+        factor = idf * (K1 + 1.0)
+        width = len(FIELDS)
+
+        if only is None or len(only) * 8 > len(ids):
+            # Frekvenserna läses fyra och fyra parallellt med id:na
+            postings = zip(ids, zip(*[iter(tfs)] * width))
+            if only is not None:
+                wanted = set(only)
+                postings = [posting for posting in postings if posting[0] in wanted]
+        else:
+            postings = []
+            for doc_id in only:
+                position = bisect_left(ids, doc_id)
+                if position < len(ids) and ids[position] == doc_id:
+                    postings.append((doc_id, tfs[position * width:position * width + width]))
+
+        for doc_id, (t0, t1, t2, t3) in postings:
+            doc_lengths = lengths.get(doc_id)
+            if doc_lengths is None:
+                continue
+            pseudo_tf = 0.0
+            if t0:
+                pseudo_tf += w0 * t0 / (c0 + d0 * doc_lengths[0])
+            if t1:
+                pseudo_tf += w1 * t1 / (c1 + d1 * doc_lengths[1])
+            if t2:
+                pseudo_tf += w2 * t2 / (c2 + d2 * doc_lengths[2])
+            if t3:
+                pseudo_tf += w3 * t3 / (c3 + d3 * doc_lengths[3])
+            scores[doc_id] = scores.get(doc_id, 0.0) + factor * pseudo_tf / (pseudo_tf + K1)
+
+    def query_terms(self, query):
+        """Unika termer i en fråga, i den ordning de förekommer."""
+        return list(dict.fromkeys(tokenize(query)))
+
+    def top_k(self, query, k=200):
+        """
+        Returnera de k bäst rankade dokumenten som [(poäng, doc_id)].
+        Termerna behandlas i fallande idf-ordning; när den k:te bästa
+        poängen redan är högre än vad de återstående termerna tillsammans
+        kan ge, läggs inga nya dokument till och bara kvarvarande
+        kandidater slås upp. Långa postlistor för vanliga termer läses då
+        aldrig i sin helhet.
+        """
+        terms = [term for term in self.query_terms(query) if term in self.ids]
+        if not terms or k <= 0:
+            return []
+
+        normalizers = self._normalizers()
+        weighted = sorted(((self._idf(term), term) for term in terms), reverse=True)
+        # Övre gräns per term: mättnadsdelen är alltid mindre än K1 + 1
+        bounds = [idf * (K1 + 1.0) for idf, _ in weighted]
+        remaining = [sum(bounds[i:]) for i in range(len(bounds))]
+
+        scores = {}
+        for i, (idf, term) in enumerate(weighted):
+            if len(scores) >= k:
+                threshold = heapq.nlargest(k, scores.values())[-1]
+                if threshold >= remaining[i]:
+                    # Inga nya dokument kan nå topplistan; släpp kandidater som inte heller kan det
+                    scores = {
+                        doc_id: score for doc_id, score in scores.items()
+                        if score + remaining[i] >= threshold
+                    }
+                    for idf, term in weighted[i:]:
+                        self._accumulate(term, idf, scores, normalizers, only=sorted(scores))
+                    break
+            self._accumulate(term, idf, scores, normalizers)
+
+        # Vid lika poäng kommer äldre dokument (lägre id) först
+        return heapq.nlargest(k, ((score, doc_id) for doc_id, score in scores.items()), key=lambda item: (item[0], -item[1]))
+
+    def score_documents(self, query, doc_ids):
+        """Poängsätt givna dokument, t.ex. sökträffarna på en sida."""
+        normalizers = self._normalizers()
+        doc_ids = sorted(doc_ids)
+        scores = {}
+        for term in self.query_terms(query):
+            if term in self.ids:
+                self._accumulate(term, self._idf(term), scores, normalizers, only=doc_ids)
+        return scores
+
+    def save(self, path):
+        """Spara indexet komprimerat; skrivs till en temporär fil först."""
+        data = {
+            "version": BM25_VERSION,
+            "byteorder": sys.byteorder,
+            "dead": self.dead,
+            "lengths": {str(doc_id): lengths for doc_id, lengths in self.lengths.items()},
+            "postings": {
+                term: [
+                    base64.b64encode(ids.tobytes()).decode("ascii"),
+                    base64.b64encode(self.tfs[term].tobytes()).decode("ascii"),
+                ]
+                for term, ids in self.ids.items()
+            },
+        }
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), 6)
+        self.dirty = False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_name = f"{path}.tmp"
+        with open(temp_name, "wb") as f:
+            f.write(BM25_MAGIC)
+            f.write(payload)
+        os.replace(temp_name, path)
+
+    def load(self, path, doc_ids):
+        """
+        Läs ett sparat index. Returnerar False om filen saknas, är ogiltig
+        eller inte täcker exakt dokumenten doc_ids i trigramindexet.
+        """
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(BM25_MAGIC)) != BM25_MAGIC:
+                    return False
+                data = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        except (OSError, ValueError, zlib.error):
+            return False
+        if data.get("version") != BM25_VERSION or data.get("byteorder") != sys.byteorder:
+            return False
+
+        lengths = {int(doc_id): tuple(value) for doc_id, value in data["lengths"].items()}
+        if lengths.keys() != set(doc_ids):
+            return False
+
+        self.clear()
+        self.lengths = lengths
+        self.dead = data.get("dead", 0)
+        for value in lengths.values():
+            for position, length in enumerate(value):
+                self.totals[position] += length
+        for term, (encoded_ids, encoded_tfs) in data["postings"].items():
+            ids = array("I")
+            ids.frombytes(base64.b64decode(encoded_ids))
+            tfs = array("H")
+            tfs.frombytes(base64.b64decode(encoded_tfs))
+            self.ids[term] = ids
+            self.tfs[term] = tfs
+        return True
@@ -243,6 +243,34 @@ class CodeAnalyzer:
         
         return classes
     
+    @staticmethod
+    def extract_python_outline(code):
+        """
+        Extrahera en översikt av Python-klasser, metoder och funktioner.
+        Returnerar bara namn och radnummer, utan kodsegment, så att den
+        går snabbt även för stora filer.
+        """
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            return []
+        
+        outline = []
+        methods = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                outline.append({'type': 'class', 'name': node.name, 'lineno': node.lineno})
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        methods.add(item)
+                        outline.append({'type': 'method', 'name': f"{node.name}.{item.name}", 'lineno': item.lineno})
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node not in methods:
+                outline.append({'type': 'function', 'name': node.name, 'lineno': node.lineno})
+        
+        outline.sort(key=lambda item: item['lineno'])
+        return outline
+    
     @staticmethod
     def extract_imports(code, language="python"):
         """
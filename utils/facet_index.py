@@ -0,0 +1,143 @@
+# ./utils/facet_index.py
+
+# Språk härleds från filändelsen, samma indelning som CodeModuleManager
+LANGUAGE_BY_EXTENSION = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".html": "html",
+    ".htm": "html",
+    ".css": "css",
+    ".java": "java",
+    ".cpp": "cpp",
+    ".c": "cpp",
+    ".h": "cpp",
+    ".hpp": "cpp",
+}
+
+FACETS = ("category", "language", "tag")
+
+
+def language_for_extension(extension):
+    """Returnera språket för en filändelse, "other" om det är okänt."""
+    return LANGUAGE_BY_EXTENSION.get((extension or "").lower(), "other")
+
+
+def module_facet_values(module):
+    """Returnera modulens värden per facett som mängder."""
+    return {
+        "category": {module.get("category") or "other"},
+        "language": {language_for_extension(module.get("extension", ""))},
+        "tag": {tag.strip().lower() for tag in module.get("tags", []) if tag.strip()},
+    }
+
+
+class FacetIndex:
+    """
+    Index över kategori, språk och taggar. Varje facettvärde pekar på en
+    mängd modul-id:n och uppdateras stegvis när moduler läggs till, tas
+    bort eller ändras. Filter besvaras med mängdsnitt, så kostnaden beror
+    på antalet träffar och facettvärden, inte på antalet moduler.
+    """
+
+    def __init__(self, modules=()):
+        self._ids = {facet: {} for facet in FACETS}   # facett -> värde -> {id}
+        self._values_by_id = {}                       # id -> facett -> {värde}
+        self._tag_matches = {}                        # sökord -> {id}, töms vid ändring
+        self.rebuild(modules)
+
+    def __len__(self):
+        return len(self._values_by_id)
+
+    def rebuild(self, modules):
+        """Bygg om indexet från en lista med moduler."""
+        self._ids = {facet: {} for facet in FACETS}
+        self._values_by_id = {}
+        self._tag_matches = {}
+        for module in modules:
+            self.add(module)
+
+    def add(self, module):
+        """Indexera en modul; en redan indexerad modul ersätts."""
+        module_id = module.get("id")
+        if module_id in self._values_by_id:
+            self.remove(module_id)
+
+        values = module_facet_values(module)
+        self._values_by_id[module_id] = values
+        self._tag_matches = {}
+        for facet, facet_values in values.items():
+            for value in facet_values:
+                self._ids[facet].setdefault(value, set()).add(module_id)
+
+    def remove(self, module_id):
+        """Ta bort en modul ur indexet."""
+        values = self._values_by_id.pop(module_id, None)
+        if values is None:
+            return
+        self._tag_matches = {}
+        for facet, facet_values in values.items():
+            for value in facet_values:
+                ids = self._ids[facet].get(value)
+                if ids is not None:
+                    ids.discard(module_id)
+                    if not ids:
+                        del self._ids[facet][value]
+
+    def update(self, module):
+        """Indexera om en modul vars kategori, filändelse eller taggar ändrats."""
+        self.add(module)
+
+    def values(self, facet):
+        """Returnera alla värden som förekommer för en facett."""
+        return sorted(self._ids[facet])
+
+    def ids_for(self, facet, value):
+        """Returnera mängden modul-id:n för ett facettvärde."""
+        if facet == "tag":
+            # Taggfiltret matchar delsträngar, som tidigare; unionen tas över taggvärdena
+            needle = value.strip().lower()
+            matched = self._tag_matches.get(needle)
+            if matched is None:
+                matched = set()
+                for tag, ids in self._ids["tag"].items():
+                    if needle in tag:
+                        matched |= ids
+                self._tag_matches[needle] = matched
+            return matched
+        return self._ids[facet].get(value, set())
+
+    def match(self, selection, exclude=None, within=None):
+        """
+        Returnera mängden id:n som matchar alla valda facetter, eller None
+        om inget filter är valt. selection är en dict facett -> värde;
+        within är en valfri mängd id:n (t.ex. sökträffar) att begränsa till.
+        """
+        sets = [
+            self.ids_for(facet, value)
+            for facet, value in selection.items()
+            if value and facet != exclude
+        ]
+        if within is not None:
+            sets.append(within)
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = set(sets[0])
+        for ids in sets[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def counts(self, facet, selection, within=None):
+        """
+        Räkna träffar per värde i en facett givet de övriga valda
+        facetterna. Returnerar (antal utan facetten, {värde: antal}).
+        """
+        others = self.match(selection, exclude=facet, within=within)
+        if others is None:
+            return len(self._values_by_id), {value: len(ids) for value, ids in self._ids[facet].items()}
+        return len(others), {value: len(ids & others) for value, ids in self._ids[facet].items()}
@@ -0,0 +1,249 @@
+# ./utils/history_utils.py
+import os
+import json
+import zlib
+import struct
+from pathlib import Path
+
+# Filhuvud: magiska bytes + byteposition för aktuell historikmarkör
+HISTORY_MAGIC = b"CMH1"
+HEADER_FORMAT = "<4sQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+FRAME_LENGTH_FORMAT = "<I"
+FRAME_LENGTH_SIZE = struct.calcsize(FRAME_LENGTH_FORMAT)
+
+
+def compute_state_diff(before, after):
+    """
+    Beräkna en reversibel diff mellan två listor med poster (dict med "id").
+    Returnerar None om listorna är identiska.
+    """
+    if before == after:
+        return None
+
+    before_ids = [record.get("id") for record in before]
+    after_ids = [record.get("id") for record in after]
+
+    # Dubblett-id:n går inte att diffa per post, spara då hela tillstånden
+    if len(set(before_ids)) != len(before_ids) or len(set(after_ids)) != len(after_ids):
+        return {"fb": before, "fa": after}
+
+    before_map = dict(zip(before_ids, before))
+    after_map = dict(zip(after_ids, after))
+
+    diff = {"b": {}, "a": {}}
+    for record_id, record in before_map.items():
+        if after_map.get(record_id) != record:
+            diff["b"][record_id] = record
+    for record_id, record in after_map.items():
+        if before_map.get(record_id) != record:
+            diff["a"][record_id] = record
+
+    if before_ids != after_ids:
+        diff["ob"] = before_ids
+        diff["oa"] = after_ids
+
+    return diff
+
+
+def apply_state_diff(state, diff, reverse=False):
+    """
+    Applicera en diff från compute_state_diff på ett tillstånd.
+    Med reverse=True går diffen baklänges (ångra).
+    """
+    if "fb" in diff:
+        return diff["fb"] if reverse else diff["fa"]
+
+    old_key, new_key = ("a", "b") if reverse else ("b", "a")
+    new_order = diff.get("ob" if reverse else "oa")
+
+    records = {record.get("id"): record for record in state}
+    current_order = [record.get("id") for record in state]
+
+    # Ta bort poster som bara finns i "gamla" sidan, skriv sedan in de nya
+    for record_id in diff[old_key]:
+        if record_id not in diff[new_key]:
+            records.pop(record_id, None)
+    for record_id, record in diff[new_key].items():
+        records[record_id] = record
+
+    if new_order is None:
+        new_order = current_order + [rid for rid in diff[new_key] if rid not in current_order]
+
+    # Tolerant ordning: okända id:n hoppas över, övriga läggs sist
+    result = []
+    seen = set()
+    for record_id in new_order:
+        if record_id in records and record_id not in seen:
+            result.append(records[record_id])
+            seen.add(record_id)
+    for record_id in current_order:
+        if record_id in records and record_id not in seen:
+            result.append(records[record_id])
+            seen.add(record_id)
+    return result
+
+
+class PageHistory:
+    """
+    Ångra/gör om-historik för en JSON-sida, sparad på disk som en kedja av
+    komprimerade diffar. Endast det senaste tillståndet hålls i minnet och
+    filen öppnas först när historiken faktiskt används.
+    """
+
+    def __init__(self, page_file, history_directory=None, max_bytes=16 * 1024 * 1024):
+        self.page_file = str(page_file)
+        page_path = Path(page_file)
+        if history_directory is None:
+            history_directory = page_path.parent / ".history"
+        self.history_directory = Path(history_directory)
+        self.history_file = self.history_directory / f"{page_path.name}.hist"
+        self.max_bytes = max_bytes
+
+        self._snapshot = []
+        self._cursor = None  # Laddas lat från filhuvudet
+
+    def reset_baseline(self, state):
+        """Sätt det aktuella tillståndet utan att läsa historikfilen."""
+        self._snapshot = json.loads(json.dumps(state))
+
+    def record(self, state):
+        """
+        Lägg till ett nytt tillstånd i historiken.
+        Returnerar False om inget har ändrats sedan föregående tillstånd.
+        """
+        new_snapshot = json.loads(json.dumps(state))
+        diff = compute_state_diff(self._snapshot, new_snapshot)
+        if diff is None:
+            return False
+
+        self._ensure_open()
+        payload = zlib.compress(json.dumps(diff, ensure_ascii=False).encode("utf-8"))
+        length = struct.pack(FRAME_LENGTH_FORMAT, len(payload))
+
+        try:
+            with open(self.history_file, "r+b") as f:
+                # Allt efter markören (gör om-grenen) kastas
+                f.seek(self._cursor)
+                f.truncate()
+                f.write(length + payload + length)
+                self._cursor = f.tell()
+                self._write_header(f)
+        except OSError as e:
+            print(f"Kunde inte skriva historik {self.history_file}: {e}")
+
+        self._snapshot = new_snapshot
+
+        if self._cursor > self.max_bytes:
+            self._compact()
+        return True
+
+    def can_undo(self):
+        self._ensure_open()
+        return self._cursor > HEADER_SIZE
+
+    def can_redo(self):
+        self._ensure_open()
+        try:
+            return self._cursor < self.history_file.stat().st_size
+        except OSError:
+            return False
+
+    def undo(self):
+        """Gå ett steg bakåt. Returnerar det nya tillståndet eller None."""
+        if not self.can_undo():
+            return None
+
+        try:
+            with open(self.history_file, "r+b") as f:
+                f.seek(self._cursor - FRAME_LENGTH_SIZE)
+                (length,) = struct.unpack(FRAME_LENGTH_FORMAT, f.read(FRAME_LENGTH_SIZE))
+                frame_start = self._cursor - length - 2 * FRAME_LENGTH_SIZE
+                f.seek(frame_start + FRAME_LENGTH_SIZE)
+                diff = json.loads(zlib.decompress(f.read(length)).decode("utf-8"))
+                self._cursor = frame_start
+                self._write_header(f)
+        except (OSError, zlib.error, ValueError, struct.error) as e:
+            print(f"Kunde inte läsa historik {self.history_file}: {e}")
+            return None
+
+        self._snapshot = apply_state_diff(self._snapshot, diff, reverse=True)
+        return json.loads(json.dumps(self._snapshot))
+
+    def redo(self):
+        """Gå ett steg framåt. Returnerar det nya tillståndet eller None."""
+        if not self.can_redo():
+            return None
+
+        try:
+            with open(self.history_file, "r+b") as f:
+                f.seek(self._cursor)
+                (length,) = struct.unpack(FRAME_LENGTH_FORMAT, f.read(FRAME_LENGTH_SIZE))
+                diff = json.loads(zlib.decompress(f.read(length)).decode("utf-8"))
+                self._cursor += length + 2 * FRAME_LENGTH_SIZE
+                self._write_header(f)
+        except (OSError, zlib.error, ValueError, struct.error) as e:
+            print(f"Kunde inte läsa historik {self.history_file}: {e}")
+            return None
+
+        self._snapshot = apply_state_diff(self._snapshot, diff)
+        return json.loads(json.dumps(self._snapshot))
+
+    def delete(self):
+        """Ta bort historikfilen, t.ex. när sidan tas bort."""
+        try:
+            if self.history_file.exists():
+                self.history_file.unlink()
+        except OSError as e:
+            print(f"Kunde inte ta bort historik {self.history_file}: {e}")
+        self._cursor = None
+
+    def _ensure_open(self):
+        """Läs filhuvudet första gången historiken används."""
+        if self._cursor is not None:
+            return
+
+        try:
+            with open(self.history_file, "rb") as f:
+                magic, cursor = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+            size = self.history_file.stat().st_size
+            if magic == HISTORY_MAGIC and HEADER_SIZE <= cursor <= size:
+                self._cursor = cursor
+                return
+        except (OSError, struct.error):
+            pass
+
+        # Saknad eller trasig fil: börja om med en tom kedja
+        self._cursor = HEADER_SIZE
+        try:
+            os.makedirs(self.history_directory, exist_ok=True)
+            with open(self.history_file, "wb") as f:
+                self._write_header(f)
+        except OSError as e:
+            print(f"Kunde inte skapa historik {self.history_file}: {e}")
+
+    def _write_header(self, f):
+        f.seek(0)
+        f.write(struct.pack(HEADER_FORMAT, HISTORY_MAGIC, self._cursor))
+
+    def _compact(self):
+        """Släng den äldsta halvan av kedjan när filen blivit för stor."""
+        try:
+            with open(self.history_file, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+
+        # Gå bakåt från markören tills hälften av maxstorleken är behållen
+        keep_from = self._cursor
+        while keep_from > HEADER_SIZE and self._cursor - keep_from < self.max_bytes // 2:
+            (length,) = struct.unpack_from(FRAME_LENGTH_FORMAT, data, keep_from - FRAME_LENGTH_SIZE)
+            keep_from -= length + 2 * FRAME_LENGTH_SIZE
+
+        self._cursor = HEADER_SIZE + (self._cursor - keep_from)
+        try:
+            with open(self.history_file, "wb") as f:
+                self._write_header(f)
+                f.write(data[keep_from:])
+        except OSError as e:
+            print(f"Kunde inte komprimera historik {self.history_file}: {e}")
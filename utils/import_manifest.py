@@ -0,0 +1,85 @@
+# ./utils/import_manifest.py
+import os
+import json
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+# Tagg på moduler vars källfil försvunnit vid en synkronisering
+DELETED_TAG = "källa-borttagen"
+
+
+class ImportManifest:
+    """
+    Manifest över importerade källkataloger för en JSON-sida. För varje
+    katalog sparas relativ sökväg -> storlek, mtime, innehållshash och
+    modul-id, så att en ny import bara behöver läsa filer som ändrats och
+    kan uppdatera rätt modul. Filen läses först när den behövs.
+    """
+
+    def __init__(self, page_file, manifest_directory=None):
+        self.page_file = str(page_file)
+        page_path = Path(page_file)
+        if manifest_directory is None:
+            manifest_directory = page_path.parent / ".imports"
+        self.manifest_directory = Path(manifest_directory)
+        self.manifest_file = self.manifest_directory / f"{page_path.name}.manifest.json"
+        self._sources = None
+
+    @staticmethod
+    def key_for(directory):
+        return os.path.normcase(os.path.abspath(directory))
+
+    def _ensure_loaded(self):
+        if self._sources is not None:
+            return
+        self._sources = {}
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self._sources = data.get("sources", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Kunde inte läsa importmanifest {self.manifest_file}: {e}")
+
+    def entries(self, directory):
+        """Manifestets poster för en katalog, {relativ sökväg: post}, eller None."""
+        self._ensure_loaded()
+        return self._sources.get(self.key_for(directory))
+
+    def set_entries(self, directory, entries):
+        """Ersätt en katalogs poster; filen skrivs bara om något ändrats."""
+        self._ensure_loaded()
+        key = self.key_for(directory)
+        if self._sources.get(key) == entries:
+            return
+        self._sources[key] = entries
+        self.save()
+
+    def clear(self):
+        """Glöm alla källor, t.ex. när sidans moduler rensats."""
+        self._sources = {}
+        self.save()
+
+    def save(self):
+        """Skriv manifestet via en temporär fil."""
+        try:
+            self.manifest_directory.mkdir(parents=True, exist_ok=True)
+            temp_name = f"{self.manifest_file}.tmp"
+            data = json.dumps({"version": MANIFEST_VERSION, "sources": self._sources}, ensure_ascii=False, separators=(",", ":"))
+            with open(temp_name, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(temp_name, self.manifest_file)
+        except OSError as e:
+            print(f"Kunde inte spara importmanifest {self.manifest_file}: {e}")
+
+    def delete(self):
+        """Ta bort manifestfilen, t.ex. när sidan tas bort."""
+        try:
+            if self.manifest_file.exists():
+                self.manifest_file.unlink()
+        except OSError as e:
+            print(f"Kunde inte ta bort importmanifest {self.manifest_file}: {e}")
+        self._sources = None
@@ -0,0 +1,272 @@
+# ./utils/module_exporter.py
+import os
+import json
+import hashlib
+import threading
+import zipfile
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+# Manifest i exportkatalogen över filer som en tidigare export skrivit
+EXPORT_MANIFEST = ".code_modules_export.json"
+EXPORT_MANIFEST_VERSION = 1
+
+WRITE_BATCH = 64              # filer per skrivjobb
+WRITER_THREADS = 4
+
+
+def export_records(modules):
+    """
+    Ögonblicksbild av det som exporteras: (id, kategori, filnamn, kod).
+    Tomma moduler hoppas över, som tidigare.
+    """
+    records = []
+    for module in modules:
+        code = module.get("code", "")
+        if not code.strip():
+            continue
+        extension = module.get("extension", ".py")
+        if not extension.startswith('.'):
+            extension = '.' + extension
+        filename = module.get("name", f"module_{module['id']}") + extension
+        records.append((module["id"], module.get("category", "other"), filename, code))
+    return records
+
+
+def encode_code(code):
+    """Filens bytes, med samma radslut som en skrivning i textläge ger."""
+    if os.linesep != "\n":
+        code = code.replace("\n", os.linesep)
+    return code.encode("utf-8")
+
+
+def _suffixed(filename, counter):
+    base_name, extension = os.path.splitext(filename)
+    return f"{base_name}_{counter}{extension}"
+
+
+def _file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class _Job(QRunnable):
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        self.func()
+
+
+class ModuleExporter(QObject):
+    """
+    Exporterar moduler på arbetstrådar, antingen till en katalog med en
+    underkatalog per kategori eller direkt till ett zip-arkiv.
+
+    Vid katalogexport planeras alla filnamn först i en enda genomgång:
+    namnkrockar inom exporten får suffix i modulordning, så samma modul
+    hamnar i samma fil varje gång. Filer som en tidigare export skrivit
+    (enligt manifestet i katalogen) och som har samma storlek, mtime och
+    hash hoppas över utan att läsas; främmande filer skrivs aldrig över.
+    Övriga filer skrivs i omgångar av en trådpool.
+    """
+
+    progress = Signal(int, int, int)              # generation, klara, totalt
+    exportFinished = Signal(int, int, int, int)   # generation, skrivna, oförändrade, misslyckade
+    errorOccurred = Signal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        # En tråd för planeringen och resten för skrivning
+        self.pool.setMaxThreadCount(WRITER_THREADS + 1)
+        self._generation = 0
+
+    def export_directory(self, records, directory):
+        """Starta en katalogexport av export_records(...) och returnera generationen."""
+        self._generation += 1
+        generation = self._generation
+        self.pool.start(_Job(lambda: self._plan(generation, records, directory)))
+        return generation
+
+    def export_zip(self, records, archive_path):
+        """Starta en export till ett zip-arkiv och returnera generationen."""
+        self._generation += 1
+        generation = self._generation
+        self.pool.start(_Job(lambda: self._write_zip(generation, records, archive_path)))
+        return generation
+
+    def cancel(self):
+        self._generation += 1
+
+    def wait(self):
+        self.pool.waitForDone()
+
+    def _load_manifest(self, directory):
+        try:
+            with open(os.path.join(directory, EXPORT_MANIFEST), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == EXPORT_MANIFEST_VERSION:
+                return data.get("files", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Kunde inte läsa exportmanifest i {directory}: {e}")
+        return {}
+
+    def _save_manifest(self, directory, files):
+        path = os.path.join(directory, EXPORT_MANIFEST)
+        temp_name = f"{path}.tmp"
+        data = json.dumps({"version": EXPORT_MANIFEST_VERSION, "files": files}, ensure_ascii=False, separators=(",", ":"))
+        with open(temp_name, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_name, path)
+
+    def _plan(self, generation, records, directory):
+        try:
+            manifest = self._load_manifest(directory)
+            existing = {}     # kategori -> {filnamn: stat}
+            used = set()
+            to_write = []
+            unchanged = 0
+            files = dict(manifest)
+
+            for module_id, category, filename, code in records:
+                if generation != self._generation:
+                    return
+                if category not in existing:
+                    category_dir = os.path.join(directory, category)
+                    os.makedirs(category_dir, exist_ok=True)
+                    entries = {}
+                    with os.scandir(category_dir) as it:
+                        for entry in it:
+                            if entry.is_file():
+                                entries[entry.name] = entry.stat()
+                    existing[category] = entries
+
+                data = encode_code(code)
+                content_hash = hashlib.sha1(data).hexdigest()
+
+                # Första lediga namn; främmande filer med annat innehåll skrivs inte över
+                counter = 0
+                name = filename
+                while True:
+                    rel_path = f"{category}/{name}"
+                    if rel_path not in used:
+                        stat = existing[category].get(name)
+                        if stat is None or rel_path in manifest:
+                            break
+                        if _file_hash(os.path.join(directory, category, name)) == content_hash:
+                            break
+                    counter += 1
+                    name = _suffixed(filename, counter)
+                used.add(rel_path)
+
+                stat = existing[category].get(name)
+                known = manifest.get(rel_path)
+                if stat is not None and known is not None and known.get("hash") == content_hash \
+                        and known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns:
+                    unchanged += 1
+                    continue
+                to_write.append((rel_path, module_id, data, content_hash, stat is not None))
+
+            total = unchanged + len(to_write)
+            state = {
+                "remaining": (len(to_write) + WRITE_BATCH - 1) // WRITE_BATCH,
+                "done": unchanged, "written": 0, "unchanged": unchanged, "failed": 0,
+                "files": files, "lock": threading.Lock(),
+            }
+            self._emit(self.progress, generation, unchanged, total)
+            if not to_write:
+                self._finish(generation, directory, state)
+                return
+            for start in range(0, len(to_write), WRITE_BATCH):
+                batch = to_write[start:start + WRITE_BATCH]
+                self.pool.start(_Job(lambda batch=batch: self._write_batch(generation, directory, batch, state, total)))
+        except Exception as e:
+            self._emit(self.errorOccurred, generation, str(e))
+
+    def _write_batch(self, generation, directory, batch, state, total):
+        written = 0
+        unchanged = 0
+        failed = 0
+        updates = {}
+        for rel_path, module_id, data, content_hash, exists in batch:
+            if generation != self._generation:
+                break
+            path = os.path.join(directory, *rel_path.split("/"))
+            try:
+                # Filen har ändrats efter förra exporten men kan ha samma innehåll igen
+                if exists and _file_hash(path) == content_hash:
+                    unchanged += 1
+                else:
+                    with open(path, "wb") as f:
+                        f.write(data)
+                    written += 1
+                stat = os.stat(path)
+                updates[rel_path] = {
+                    "id": module_id, "hash": content_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                }
+            except OSError as e:
+                print(f"Kunde inte exportera {path}: {e}")
+                failed += 1
+
+        with state["lock"]:
+            state["files"].update(updates)
+            state["written"] += written
+            state["unchanged"] += unchanged
+            state["failed"] += failed
+            state["done"] += written + unchanged + failed
+            state["remaining"] -= 1
+            done = state["done"]
+            last = state["remaining"] == 0
+        self._emit(self.progress, generation, done, total)
+        if last:
+            self._finish(generation, directory, state)
+
+    def _finish(self, generation, directory, state):
+        # Även en avbruten export sparar manifestet för det som hann skrivas
+        try:
+            self._save_manifest(directory, state["files"])
+        except OSError as e:
+            print(f"Kunde inte spara exportmanifest i {directory}: {e}")
+        if generation == self._generation:
+            self._emit(self.exportFinished, generation, state["written"], state["unchanged"], state["failed"])
+
+    def _write_zip(self, generation, records, archive_path):
+        """Skriv alla moduler direkt till arkivet, utan temporära filer."""
+        total = len(records)
+        used = set()
+        try:
+            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for done, (module_id, category, filename, code) in enumerate(records, 1):
+                    if generation != self._generation:
+                        break
+                    counter = 0
+                    name = filename
+                    while f"{category}/{name}" in used:
+                        counter += 1
+                        name = _suffixed(filename, counter)
+                    used.add(f"{category}/{name}")
+                    archive.writestr(f"{category}/{name}", encode_code(code))
+                    if done % WRITE_BATCH == 0:
+                        self._emit(self.progress, generation, done, total)
+            if generation != self._generation:
+                # Ett halvfärdigt arkiv ska inte se ut som en lyckad export
+                os.remove(archive_path)
+                return
+            self._emit(self.progress, generation, total, total)
+            self._emit(self.exportFinished, generation, total, 0, 0)
+        except Exception as e:
+            self._emit(self.errorOccurred, generation, str(e))
+
+    def _emit(self, signal, *args):
+        """Skicka en signal från arbetstråden, även om fliken redan rivits vid avslut."""
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass
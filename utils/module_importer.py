@@ -0,0 +1,624 @@
+# ./utils/module_importer.py
+import io
+import os
+import re
+import bz2
+import gzip
+import lzma
+import hashlib
+import subprocess
+import tarfile
+import zipfile
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+# Samma filändelser som tidigare importerades
+IMPORT_EXTENSIONS = (".py", ".js", ".html", ".css", ".cpp", ".h", ".java", ".jsx")
+CATEGORIES = ("ui", "utils", "data", "network", "db", "ai", "algorithms", "other")
+
+# Kataloger som aldrig innehåller egna moduler
+DEFAULT_IGNORES = [
+    ".git/", ".hg/", ".svn/", "node_modules/", "__pycache__/", ".venv/", "venv/", "env/",
+    ".tox/", ".mypy_cache/", ".pytest_cache/", ".idea/", ".vscode/", "dist/", "build/",
+    "site-packages/", "*.egg-info/", "*.min.js",
+]
+
+MAX_FILE_SIZE = 1024 * 1024   # större filer är nästan alltid genererade eller data
+READ_BATCH = 64               # filer per läsjobb
+READER_THREADS = 4
+
+# Lägen i git-trädet som inte är vanliga filer: symboliska länkar och undermoduler
+GIT_SKIPPED_MODES = ("120000", "160000")
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.xz", ".txz", ".tar.bz2")
+
+
+class GitError(Exception):
+    """Ett git-kommando misslyckades."""
+
+
+def _translate_segment(segment):
+    """Ett sökvägssegment som reguljärt uttryck; * och ? matchar aldrig /."""
+    out = []
+    i, n = 0, len(segment)
+    while i < n:
+        char = segment[i]
+        i += 1
+        if char == "*":
+            out.append("[^/]*")
+        elif char == "?":
+            out.append("[^/]")
+        elif char == "[":
+            j = i
+            if j < n and segment[j] in "!^":
+                j += 1
+            if j < n and segment[j] == "]":
+                j += 1
+            j = segment.find("]", j)
+            if j < 0:
+                out.append(re.escape(char))
+                continue
+            chars = segment[i:j].replace("\\", "\\\\")
+            i = j + 1
+            if chars[0] in "!^":
+                chars = "^/" + chars[1:]
+            out.append(f"[{chars}]")
+        elif char == "\\" and i < n:
+            out.append(re.escape(segment[i]))
+            i += 1
+        else:
+            out.append(re.escape(char))
+    return "".join(out)
+
+
+def translate_pattern(pattern):
+    """
+    Ett gitignore-mönster (utan inledande och avslutande /) som reguljärt
+    uttryck för en relativ sökväg. ** som eget segment matchar noll eller
+    fler kataloger, så ett inledande **/ matchar på alla djup.
+    """
+    segments = pattern.split("/")
+    regex = []
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == "**":
+            regex.append(".*" if last else "(?:.*/)?")
+        else:
+            regex.append(_translate_segment(segment) + ("" if last else "/"))
+    return re.compile("(?s:" + "".join(regex) + ")\\Z")
+
+
+class IgnoreRules:
+    """
+    Uteslutningsregler i gitignore-stil: alla mönster gäller bara under
+    katalogen där de angavs. Mönster utan snedstreck matchar namnet på
+    alla nivåer därunder, mönster med snedstreck är förankrade i katalogen, avslutande / betyder bara kataloger och !
+    tar tillbaka något som uteslutits tidigare.
+    """
+
+    def __init__(self, patterns=(), base=""):
+        self.rules = []   # (regex, katalog-bara, negerad, baskatalog, förankrad)
+        self._ignored_dirs = {}
+        self.add_patterns(patterns, base)
+
+    def add_patterns(self, patterns, base=""):
+        for line in patterns:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            directory_only = line.endswith("/")
+            line = line.rstrip("/") if directory_only else line
+            # Snedstreck i början eller mitten förankrar mönstret, som i gitignore
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if not line:
+                continue
+            self.rules.append((translate_pattern(line), directory_only, negated, base, anchored))
+            self._ignored_dirs = {}
+
+    def add_file(self, path, base):
+        """Läs in en .gitignore; base är dess katalog relativt importroten."""
+        try:
+            with open(path, "r", encoding='utf-8', errors='replace') as f:
+                self.add_patterns(f.readlines(), base)
+        except OSError:
+            pass
+
+    def ignored(self, rel_path, is_dir):
+        """rel_path är relativ importroten och använder /."""
+        name = rel_path.rsplit("/", 1)[-1]
+        result = False
+        for regex, directory_only, negated, base, anchored in self.rules:
+            if directory_only and not is_dir:
+                continue
+            prefix = f"{base}/" if base else ""
+            if not rel_path.startswith(prefix):
+                continue
+            if anchored:
+                matched = regex.match(rel_path[len(prefix):]) is not None
+            else:
+                matched = regex.match(name) is not None
+            if matched:
+                result = not negated
+        return result
+
+    def directory_ignored(self, rel_dir):
+        """Om katalogen eller någon av dess föräldrar är utesluten, för sökvägslistor utan katalogvandring."""
+        if not rel_dir:
+            return False
+        cached = self._ignored_dirs.get(rel_dir)
+        if cached is None:
+            cached = self.directory_ignored(rel_dir.rpartition("/")[0]) or self.ignored(rel_dir, True)
+            self._ignored_dirs[rel_dir] = cached
+        return cached
+
+    def path_ignored(self, rel_path):
+        return self.directory_ignored(rel_path.rpartition("/")[0]) or self.ignored(rel_path, False)
+
+
+def is_archive(path):
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _member_path(name):
+    """Normalisera ett arkivnamn till en relativ sökväg med /, eller None."""
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        return None
+    return "/".join(parts)
+
+
+def _open_tar_stream(archive_path):
+    """
+    Öppna ett tar-arkiv för sekventiell läsning. Dekomprimeringen sker med
+    gzip/lzma/bz2 bakom en stor buffert; tarfiles eget strömläge läser i
+    små block och är flera gånger långsammare för arkiv med många små filer.
+    """
+    lower = archive_path.lower()
+    if lower.endswith((".gz", ".tgz")):
+        stream = gzip.open(archive_path, "rb")
+    elif lower.endswith((".xz", ".txz")):
+        stream = lzma.open(archive_path, "rb")
+    elif lower.endswith(".bz2"):
+        stream = bz2.open(archive_path, "rb")
+    else:
+        stream = open(archive_path, "rb")
+    return tarfile.open(fileobj=io.BufferedReader(stream, 1024 * 1024), mode="r|")
+
+
+def category_for(rel_dir):
+    """Kategori från första katalognivån under importroten, som tidigare."""
+    if rel_dir in ("", "."):
+        return "other"
+    first = rel_dir.split("/", 1)[0]
+    return first if first in CATEGORIES else "other"
+
+
+class _Job(QRunnable):
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        self.func()
+
+
+class ModuleImporter(QObject):
+    """
+    Importerar kodfiler från en katalogstruktur utan att blockera
+    gränssnittet. En vandrare går igenom katalogerna med scandir och
+    hoppar över uteslutna kataloger, för stora filer och fel filändelser;
+    filerna läses i omgångar av en trådpool och resultaten skickas
+    tillbaka som signaler. En ny import eller cancel() stoppar den förra.
+
+    Med ett manifest från en tidigare import (se ImportManifest) hoppas
+    filer med samma storlek och mtime över utan att läsas, filer vars hash
+    inte ändrats rapporteras som oförändrade och manifestposter som inte
+    längre finns på disk rapporteras som borttagna.
+
+    start_archive() läser zip- och tar-arkiv direkt, utan att packa upp
+    dem: medlemmarna filtreras på namn och storlek och avkodas i minnet.
+
+    start_git() läser i stället trädet för en revision i ett lokalt
+    git-förråd. Innehållet strömmas genom en enda `git cat-file --batch`
+    och arbetskatalogen rörs aldrig; blob-id:t används som hash, så en
+    synkronisering mot en ny revision bara läser blobbar som ändrats.
+    """
+
+    filesFound = Signal(int, int)              # generation, antal hittade hittills
+    walkFinished = Signal(int, int, int, int, object)   # generation, filer att läsa, för stora, oförändrade, borttagna
+    modulesRead = Signal(int, object, int)     # generation, lista med lästa filer, antal olästa
+    errorOccurred = Signal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        # En tråd för vandraren och resten för läsning
+        self.pool.setMaxThreadCount(READER_THREADS + 1)
+        self._generation = 0
+
+    def start(self, directory, extensions=IMPORT_EXTENSIONS, ignores=DEFAULT_IGNORES, max_size=MAX_FILE_SIZE, manifest=None):
+        """
+        Starta en import och returnera dess generation. manifest är
+        {relativ sökväg: post} från en tidigare import av samma katalog.
+        """
+        self._generation += 1
+        generation = self._generation
+        # Arbetstråden får en egen kopia av manifestet
+        manifest = {rel_path: dict(entry) for rel_path, entry in manifest.items()} if manifest else None
+        self.pool.start(_Job(lambda: self._walk(generation, directory, extensions, list(ignores), max_size, manifest)))
+        return generation
+
+    def start_archive(self, archive_path, extensions=IMPORT_EXTENSIONS, ignores=DEFAULT_IGNORES,
+                      max_size=MAX_FILE_SIZE, manifest=None):
+        """Starta en import från ett zip- eller tar-arkiv och returnera generationen."""
+        self._generation += 1
+        generation = self._generation
+        manifest = {rel_path: dict(entry) for rel_path, entry in manifest.items()} if manifest else None
+        self.pool.start(_Job(
+            lambda: self._read_archive(generation, archive_path, extensions, list(ignores), max_size, manifest)
+        ))
+        return generation
+
+    def start_git(self, repository, revision="HEAD", extensions=IMPORT_EXTENSIONS, ignores=DEFAULT_IGNORES,
+                  max_size=MAX_FILE_SIZE, manifest=None):
+        """Starta en import av revision i repository och returnera generationen."""
+        self._generation += 1
+        generation = self._generation
+        manifest = {rel_path: dict(entry) for rel_path, entry in manifest.items()} if manifest else None
+        self.pool.start(_Job(
+            lambda: self._walk_git(generation, repository, revision, extensions, list(ignores), max_size, manifest)
+        ))
+        return generation
+
+    def cancel(self):
+        self._generation += 1
+
+    def wait(self):
+        self.pool.waitForDone()
+
+    def _walk(self, generation, directory, extensions, ignores, max_size, manifest):
+        rules = IgnoreRules(ignores)
+        found = 0
+        skipped = 0
+        unchanged = 0
+        seen = set()
+        batch = []
+        stack = [("", directory)]
+        try:
+            while stack:
+                if generation != self._generation:
+                    return
+                rel_dir, path = stack.pop()
+                # .gitignore gäller sin katalog och allt under den
+                gitignore = os.path.join(path, ".gitignore")
+                if os.path.isfile(gitignore):
+                    rules.add_file(gitignore, rel_dir)
+                try:
+                    with os.scandir(path) as it:
+                        entries = sorted(it, key=lambda entry: entry.name)
+                except OSError:
+                    continue
+
+                subdirs = []
+                for entry in entries:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if is_dir:
+                            # Virtuella miljöer känns igen även under andra namn
+                            if not rules.ignored(rel_path, True) and not os.path.exists(os.path.join(entry.path, "pyvenv.cfg")):
+                                subdirs.append((rel_path, entry.path))
+                            continue
+                        if not entry.is_file() or not entry.name.lower().endswith(extensions):
+                            continue
+                        if rules.ignored(rel_path, False):
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    seen.add(rel_path)
+                    if stat.st_size > max_size:
+                        skipped += 1
+                        continue
+                    known = manifest.get(rel_path) if manifest else None
+                    if known is not None and not known.get("deleted"):
+                        if known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns:
+                            unchanged += 1
+                            continue
+                    # En fil som flaggats som borttagen läses alltid in igen
+                    previous_hash = known.get("hash") if known is not None and not known.get("deleted") else None
+                    batch.append((entry.path, rel_dir, rel_path, stat.st_size, stat.st_mtime_ns, previous_hash))
+                    found += 1
+                    if len(batch) >= READ_BATCH:
+                        self._queue_read(generation, batch)
+                        batch = []
+                        self._emit(self.filesFound, generation, found)
+                # Underkataloger i alfabetisk ordning
+                stack.extend(reversed(subdirs))
+            if batch:
+                self._queue_read(generation, batch)
+            deleted = []
+            if manifest:
+                deleted = sorted(
+                    rel_path for rel_path, entry in manifest.items()
+                    if rel_path not in seen and not entry.get("deleted")
+                )
+            self._emit(self.walkFinished, generation, found, skipped, unchanged, deleted)
+        except Exception as e:
+            self._emit(self.errorOccurred, generation, str(e))
+
+    def _git(self, repository, *args):
+        result = subprocess.run(
+            ["git", "-C", repository, *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        if result.returncode != 0:
+            raise GitError(result.stderr.decode("utf-8", errors="replace").strip() or f"git {args[0]} misslyckades")
+        return result.stdout
+
+    def _walk_git(self, generation, repository, revision, extensions, ignores, max_size, manifest):
+        try:
+            try:
+                commit = self._git(repository, "rev-parse", "--verify", "--quiet", f"{revision}^{{commit}}").decode().strip()
+            except GitError:
+                raise GitError(f"Hittade ingen commit '{revision}' i {repository}")
+            origin_prefix = f"{os.path.basename(os.path.normpath(repository))}@{revision}:"
+
+            # Hela trädet med storlekar i ett anrop: "<läge> <typ> <id> <storlek>\t<sökväg>"
+            listing = []
+            for record in self._git(repository, "ls-tree", "-r", "-l", "-z", "--full-tree", commit).split(b"\0"):
+                if not record:
+                    continue
+                info, _, path = record.partition(b"\t")
+                mode, kind, oid, size = info.split()
+                listing.append((mode.decode(), kind.decode(), oid.decode(), size.decode(), path.decode("utf-8", errors="replace")))
+
+            rules = IgnoreRules(ignores)
+            # Incheckade virtuella miljöer känns igen på pyvenv.cfg, som i en katalog
+            rules.add_patterns(f"/{path.rpartition('/')[0]}/" for _, _, _, _, path in listing
+                               if path.endswith("/pyvenv.cfg"))
+
+            found = 0
+            skipped = 0
+            unchanged = 0
+            seen = set()
+            wanted = []          # (sökväg, katalog, blob-id, storlek)
+            for mode, kind, oid, size, path in listing:
+                if kind != "blob" or mode in GIT_SKIPPED_MODES or not path.lower().endswith(extensions):
+                    continue
+                rel_dir = path.rpartition("/")[0]
+                if rules.path_ignored(path):
+                    continue
+                seen.add(path)
+                size = int(size)
+                if size > max_size:
+                    skipped += 1
+                    continue
+                known = manifest.get(path) if manifest else None
+                if known is not None and not known.get("deleted") and known.get("hash") == oid:
+                    unchanged += 1
+                    continue
+                wanted.append((path, rel_dir, oid, size))
+                found += 1
+
+            deleted = []
+            if manifest:
+                deleted = sorted(
+                    rel_path for rel_path, entry in manifest.items()
+                    if rel_path not in seen and not entry.get("deleted")
+                )
+            self._emit(self.filesFound, generation, found)
+            self._emit(self.walkFinished, generation, found, skipped, unchanged, deleted)
+            if wanted and generation == self._generation:
+                self._stream_blobs(generation, repository, wanted, origin_prefix)
+        except (GitError, OSError, ValueError) as e:
+            self._emit(self.errorOccurred, generation, str(e))
+
+    def _stream_blobs(self, generation, repository, wanted, origin_prefix):
+        """Läs blobbarna genom en enda cat-file-process, en omgång i taget."""
+        process = subprocess.Popen(
+            ["git", "-C", repository, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        decoded = {}     # blob-id -> kod; identiska filer avkodas bara en gång
+        try:
+            for start in range(0, len(wanted), READ_BATCH):
+                if generation != self._generation:
+                    return
+                batch = wanted[start:start + READ_BATCH]
+                # Bara id:n som inte redan lästs begärs; svaren kommer i samma ordning
+                requested = list(dict.fromkeys(oid for _, _, oid, _ in batch if oid not in decoded))
+                if requested:
+                    process.stdin.write("".join(f"{oid}\n" for oid in requested).encode("ascii"))
+                    process.stdin.flush()
+                for oid in requested:
+                    header = process.stdout.readline().split()
+                    if len(header) != 3:
+                        raise GitError(f"Oväntat svar från git cat-file: {b' '.join(header).decode(errors='replace')}")
+                    data = process.stdout.read(int(header[2]))
+                    process.stdout.read(1)
+                    try:
+                        decoded[oid] = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+                    except UnicodeDecodeError:
+                        decoded[oid] = None
+
+                modules = []
+                failed = 0
+                for path, rel_dir, oid, size in batch:
+                    code = decoded.get(oid)
+                    if code is None:
+                        print(f"Kunde inte importera {origin_prefix}{path}: inte UTF-8")
+                        failed += 1
+                        continue
+                    name, extension = os.path.splitext(path.rpartition("/")[2])
+                    modules.append({
+                        "name": name,
+                        "extension": extension,
+                        "code": code,
+                        "category": category_for(rel_dir),
+                        # Modulen knyts inte till arbetskatalogen, som kan vara på en annan revision
+                        "file_path": "",
+                        "origin": f"{origin_prefix}{path}",
+                        "rel_path": path,
+                        "size": size,
+                        "mtime_ns": 0,
+                        "hash": oid,
+                    })
+                self._emit(self.modulesRead, generation, modules, failed)
+        finally:
+            process.stdin.close()
+            process.kill()
+            process.wait()
+
+    def _read_archive(self, generation, archive_path, extensions, ignores, max_size, manifest):
+        """
+        Strömma arkivets medlemmar i den ordning de ligger. Zip-medlemmar
+        med samma CRC och storlek som i manifestet packas aldrig upp; tar
+        läses sekventiellt och jämförs med innehållshashen.
+        """
+        rules = IgnoreRules(ignores)
+        origin_prefix = f"{os.path.basename(archive_path)}:"
+        state = {"found": 0, "skipped": 0, "unchanged": 0, "seen": set(), "modules": [], "failed": 0}
+
+        def consider(path, size):
+            """Returnera True om medlemmen ska läsas."""
+            if path is None or not path.lower().endswith(extensions) or rules.path_ignored(path):
+                return False
+            state["seen"].add(path)
+            if size > max_size:
+                state["skipped"] += 1
+                return False
+            return True
+
+        def add(path, size, data, content_hash):
+            state["found"] += 1
+            known = manifest.get(path) if manifest else None
+            if known is not None and not known.get("deleted") and known.get("hash") == content_hash:
+                state["modules"].append({"rel_path": path, "size": size, "mtime_ns": 0, "hash": content_hash, "unchanged": True})
+            else:
+                try:
+                    code = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+                except UnicodeDecodeError:
+                    print(f"Kunde inte importera {origin_prefix}{path}: inte UTF-8")
+                    state["failed"] += 1
+                    code = None
+                if code is not None:
+                    rel_dir, _, filename = path.rpartition("/")
+                    name, extension = os.path.splitext(filename)
+                    state["modules"].append({
+                        "name": name,
+                        "extension": extension,
+                        "code": code,
+                        "category": category_for(rel_dir),
+                        "file_path": "",
+                        "origin": f"{origin_prefix}{path}",
+                        "rel_path": path,
+                        "size": size,
+                        "mtime_ns": 0,
+                        "hash": content_hash,
+                    })
+            if len(state["modules"]) + state["failed"] >= READ_BATCH:
+                flush()
+
+        def flush():
+            if state["modules"] or state["failed"]:
+                self._emit(self.filesFound, generation, state["found"])
+                self._emit(self.modulesRead, generation, state["modules"], state["failed"])
+                state["modules"] = []
+                state["failed"] = 0
+
+        try:
+            if archive_path.lower().endswith(".zip"):
+                with zipfile.ZipFile(archive_path) as archive:
+                    members = [info for info in archive.infolist() if not info.is_dir()]
+                    # Virtuella miljöer känns igen på pyvenv.cfg, som i en katalog
+                    paths = [_member_path(info.filename) for info in members]
+                    rules.add_patterns(f"/{path.rpartition('/')[0]}/" for path in paths if path and path.endswith("/pyvenv.cfg"))
+                    for info, path in zip(members, paths):
+                        if generation != self._generation:
+                            return
+                        if not consider(path, info.file_size):
+                            continue
+                        # CRC och storlek finns i arkivets katalog; oförändrade medlemmar packas inte upp
+                        content_hash = f"crc32:{info.CRC:08x}:{info.file_size}"
+                        known = manifest.get(path) if manifest else None
+                        if known is not None and not known.get("deleted") and known.get("hash") == content_hash:
+                            state["unchanged"] += 1
+                            continue
+                        add(path, info.file_size, archive.read(info), content_hash)
+            else:
+                # Strömmande läge: arkivet läses en gång från början till slut
+                with _open_tar_stream(archive_path) as archive:
+                    for member in archive:
+                        if generation != self._generation:
+                            return
+                        if not member.isfile():
+                            continue
+                        path = _member_path(member.name)
+                        if not consider(path, member.size):
+                            continue
+                        data = archive.extractfile(member).read()
+                        add(path, member.size, data, hashlib.sha1(data).hexdigest())
+            flush()
+
+            deleted = []
+            if manifest:
+                deleted = sorted(
+                    rel_path for rel_path, entry in manifest.items()
+                    if rel_path not in state["seen"] and not entry.get("deleted")
+                )
+            # Tar-medlemmar räknas först när de lästs, så totalen blir känd sist
+            self._emit(self.walkFinished, generation, state["found"], state["skipped"], state["unchanged"], deleted)
+        except Exception as e:
+            self._emit(self.errorOccurred, generation, f"Kunde inte läsa arkivet {archive_path}: {e}")
+
+    def _queue_read(self, generation, batch):
+        self.pool.start(_Job(lambda: self._read(generation, batch)))
+
+    def _read(self, generation, batch):
+        if generation != self._generation:
+            return
+        modules = []
+        failed = 0
+        for file_path, rel_dir, rel_path, size, mtime_ns, previous_hash in batch:
+            try:
+                with open(file_path, "rb") as f:
+                    data = f.read()
+                content_hash = hashlib.sha1(data).hexdigest()
+                # Bara mtime har ändrats; innehållet behöver inte avkodas
+                if content_hash == previous_hash:
+                    modules.append({
+                        "rel_path": rel_path, "size": size, "mtime_ns": mtime_ns,
+                        "hash": content_hash, "unchanged": True,
+                    })
+                    continue
+                # Samma radslut som vid läsning i textläge
+                code = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Kunde inte importera {file_path}: {e}")
+                failed += 1
+                continue
+            name, extension = os.path.splitext(os.path.basename(file_path))
+            modules.append({
+                "name": name,
+                "extension": extension,
+                "code": code,
+                "category": category_for(rel_dir),
+                "file_path": file_path,
+                "origin": file_path,
+                "rel_path": rel_path,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "hash": content_hash,
+            })
+        self._emit(self.modulesRead, generation, modules, failed)
+
+    def _emit(self, signal, *args):
+        """Skicka en signal från arbetstråden, även om fliken redan rivits vid avslut."""
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass
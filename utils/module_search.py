@@ -0,0 +1,111 @@
+# ./utils/module_search.py
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class SearchKeyCache:
+    """
+    Förberäknade söknycklar i gemener per modul. En nyckel räknas bara om
+    när modulens namn, kod, beskrivning eller taggar har bytts ut.
+    """
+
+    def __init__(self):
+        self._entries = {}  # modul-id -> (namn, kod, beskrivning, taggar, nyckel)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, module):
+        """Returnera modulens söknyckel, från cachen om fälten är oförändrade."""
+        module_id = module.get("id")
+        name = module.get("name", "")
+        code = module.get("code", "")
+        description = module.get("description", "")
+        tags = tuple(module.get("tags", ()))
+
+        # Strängar är oföränderliga, så samma objekt betyder samma revision
+        cached = self._entries.get(module_id)
+        if (cached is not None and cached[0] is name and cached[1] is code
+                and cached[2] is description and cached[3] == tags):
+            return cached[4]
+
+        # Fälten skiljs med ett tecken som inte kan skrivas i sökfältet
+        key = "\0".join([name.lower(), code.lower(), description.lower()] + [tag.lower() for tag in tags])
+        self._entries[module_id] = (name, code, description, tags, key)
+        return key
+
+    def clear(self):
+        self._entries.clear()
+
+
+class _SearchJob(QRunnable):
+    """Arbetsjobb som matchar en sökterm mot en sidas moduler."""
+
+    def __init__(self, searcher, generation, page_key, modules, needle):
+        super().__init__()
+        self.searcher = searcher
+        self.generation = generation
+        self.page_key = page_key
+        self.modules = modules
+        self.needle = needle
+
+    def run(self):
+        self.searcher._run(self.generation, self.page_key, self.modules, self.needle)
+
+
+class ModuleSearcher(QObject):
+    """
+    Söker i moduler på en arbetstråd. Träffar skickas i omgångar via
+    resultsReady så att vyn kan fyllas medan sökningen pågår. En ny
+    sökning avbryter alla äldre.
+    """
+
+    resultsReady = Signal(int, object)   # generation, lista med modul-id:n
+    searchFinished = Signal(int, int)    # generation, antal träffar
+
+    CHUNK_SIZE = 2000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._generation = 0
+        self._caches = {}  # sida -> SearchKeyCache, används bara på arbetstråden
+
+    def search(self, page_key, modules, term):
+        """Starta en sökning och returnera dess generation."""
+        self._generation += 1
+        # Listan kopieras så att sidan kan ändras medan sökningen pågår
+        self.pool.start(_SearchJob(self, self._generation, page_key, list(modules), term.lower()))
+        return self._generation
+
+    def cancel(self):
+        """Avbryt pågående och köade sökningar."""
+        self._generation += 1
+
+    def forget_page(self, page_key):
+        """Släpp cachade söknycklar för en sida."""
+        self._caches.pop(page_key, None)
+
+    def _run(self, generation, page_key, modules, needle):
+        cache = self._caches.setdefault(page_key, SearchKeyCache())
+        matched = 0
+        for start in range(0, len(modules), self.CHUNK_SIZE):
+            # Nyare sökningar har företräde
+            if generation != self._generation:
+                return
+            ids = [
+                module.get("id")
+                for module in modules[start:start + self.CHUNK_SIZE]
+                if needle in cache.key(module)
+            ]
+            if ids:
+                matched += len(ids)
+                self._emit(self.resultsReady, generation, ids)
+        self._emit(self.searchFinished, generation, matched)
+
+    def _emit(self, signal, *args):
+        """Skicka en signal från arbetstråden, även om fliken redan rivits vid avslut."""
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass
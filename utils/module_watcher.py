@@ -0,0 +1,157 @@
+# ./utils/module_watcher.py
+import os
+
+from PySide6.QtCore import QObject, QTimer, QFileSystemWatcher, Signal
+
+# Samma filändelser som CodeModuleManager.list_modules letar efter
+MODULE_EXTENSIONS = (".py", ".js", ".ts", ".jsx", ".tsx", ".html", ".css", ".cpp", ".c", ".h", ".hpp", ".java")
+
+
+def scan_directory(directory, extensions=MODULE_EXTENSIONS):
+    """
+    Returnera {sökväg: (mtime_ns, storlek)} för modulfiler direkt i en
+    katalog. Bara metadata läses, aldrig filinnehåll.
+    """
+    entries = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not entry.name.lower().endswith(extensions):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries[os.path.normpath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        pass
+    return entries
+
+
+class ModuleWatcher(QObject):
+    """
+    Bevakar modulkatalogerna med QFileSystemWatcher (inotify på Linux) och
+    rapporterar bara sökvägar som skapats, ändrats eller tagits bort.
+    Händelser samlas ihop en kort stund och bara de berörda katalogerna
+    gås igenom. Om bevakningen inte går att sätta upp jämförs katalogerna
+    i stället med stat() med ett intervall som växer när inget händer.
+    """
+
+    pathsChanged = Signal(object, object, object)   # skapade, ändrade, borttagna
+
+    SETTLE_MS = 200
+    MIN_POLL_MS = 2000
+    MAX_POLL_MS = 60000
+
+    def __init__(self, directories, parent=None):
+        super().__init__(parent)
+        self.directories = [os.path.normpath(str(directory)) for directory in directories]
+        self.snapshot = {}        # katalog -> {sökväg: (mtime_ns, storlek)}
+        self.dirty_directories = set()
+        self.polling = False
+        self.watcher = None
+
+        # Samlar ihop händelser, t.ex. när en editor skriver en fil i flera steg
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(self.SETTLE_MS)
+        self.settle_timer.timeout.connect(self.process_dirty)
+
+        # Reserv när bevakningen inte fungerar
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.setInterval(self.MIN_POLL_MS)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def start(self):
+        """Ta en första ögonblicksbild och börja bevaka."""
+        for directory in self.directories:
+            self.snapshot[directory] = scan_directory(directory)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watch_paths()
+
+    def known_paths(self):
+        """Alla modulfiler i senaste ögonblicksbilden."""
+        return [path for entries in self.snapshot.values() for path in entries]
+
+    def stop(self):
+        self.settle_timer.stop()
+        self.poll_timer.stop()
+        if self.watcher is not None:
+            self.watcher.deleteLater()
+            self.watcher = None
+
+    def watch_paths(self):
+        """Bevaka katalogerna och deras filer; misslyckade sökvägar ger stat-jämförelse."""
+        if self.watcher is None:
+            return
+        watched = set(self.watcher.directories()) | set(self.watcher.files())
+        # Föräldrakatalogerna bevakas så att standardkataloger som skapas senare upptäcks
+        parents = {os.path.dirname(directory) or "." for directory in self.directories}
+        wanted = [path for path in sorted(parents) if os.path.isdir(path)]
+        for directory in self.directories:
+            if os.path.isdir(directory):
+                wanted.append(directory)
+                wanted.extend(self.snapshot.get(directory, {}))
+        missing = [path for path in wanted if path not in watched]
+        failed = self.watcher.addPaths(missing) if missing else []
+        if failed and not self.polling:
+            # T.ex. när inotify-gränsen nåtts
+            print(f"Kunde inte bevaka {len(failed)} sökvägar, jämför med stat() i stället")
+            self.polling = True
+            self.poll_timer.start(self.MIN_POLL_MS)
+
+    def on_directory_changed(self, path):
+        path = os.path.normpath(path)
+        if path in self.snapshot:
+            self.dirty_directories.add(path)
+        else:
+            # En föräldrakatalog: någon av standardkatalogerna kan ha skapats eller tagits bort
+            self.dirty_directories.update(
+                directory for directory in self.directories if os.path.dirname(directory) == path
+            )
+        self.settle_timer.start()
+
+    def on_file_changed(self, path):
+        directory = os.path.dirname(os.path.normpath(path))
+        if directory in self.snapshot:
+            self.dirty_directories.add(directory)
+            self.settle_timer.start()
+
+    def process_dirty(self):
+        """Jämför de kataloger som fått händelser med ögonblicksbilden."""
+        directories, self.dirty_directories = self.dirty_directories, set()
+        changes = self.diff(directories)
+        self.watch_paths()
+        if any(changes):
+            self.pathsChanged.emit(*changes)
+
+    def poll(self):
+        """Jämför alla kataloger; intervallet växer så länge inget ändras."""
+        created, changed, deleted = self.diff(self.directories)
+        if created or changed or deleted:
+            interval = self.MIN_POLL_MS
+            self.pathsChanged.emit(created, changed, deleted)
+        else:
+            interval = min(self.poll_timer.interval() * 2, self.MAX_POLL_MS)
+        self.poll_timer.start(interval)
+
+    def diff(self, directories):
+        created, changed, deleted = [], [], []
+        for directory in directories:
+            before = self.snapshot.get(directory, {})
+            after = scan_directory(directory)
+            for path, signature in after.items():
+                previous = before.get(path)
+                if previous is None:
+                    created.append(path)
+                elif previous != signature:
+                    changed.append(path)
+            deleted.extend(path for path in before if path not in after)
+            self.snapshot[directory] = after
+        return created, changed, deleted
@@ -0,0 +1,106 @@
+# ./utils/page_cache.py
+import json
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class PageCache:
+    """
+    Liten LRU-cache för inlästa sidor. Varje post är en dict med sidans
+    poster och eventuellt en färdigbyggd vy. Utträngda poster lämnas till
+    on_evict så att ägaren kan släppa widgets och data.
+    """
+
+    def __init__(self, capacity=4, on_evict=None):
+        self.capacity = max(1, capacity)
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Hämta en post och markera den som senast använd."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        """Lägg till eller ersätt en post som senast använd."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            old_key, old_entry = self._entries.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(old_key, old_entry)
+
+    def values(self):
+        """Returnera alla poster, äldst först."""
+        return list(self._entries.values())
+
+    def touch(self, key):
+        """Markera en post som senast använd utan att hämta den."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+    def pop(self, key):
+        """Ta bort en post utan att anropa on_evict."""
+        return self._entries.pop(key, None)
+
+    def clear(self):
+        """Töm cachen och släpp alla poster."""
+        while self._entries:
+            key, entry = self._entries.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(key, entry)
+
+
+class _PrefetchJob(QRunnable):
+    """Arbetsjobb som läser och tolkar en sidfil."""
+
+    def __init__(self, prefetcher, file_name):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.file_name = file_name
+
+    def run(self):
+        try:
+            with open(self.file_name, "r", encoding='utf-8') as f:
+                records = json.load(f)
+        except Exception as e:
+            print(f"Kunde inte förladda {self.file_name}: {e}")
+            records = None
+        self.prefetcher._finish(self.file_name, records)
+
+
+class PagePrefetcher(QObject):
+    """Läser in intilliggande sidor på en arbetstråd."""
+
+    pageLoaded = Signal(str, object)  # filnamn, poster
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._in_flight = set()
+
+    def prefetch(self, file_name):
+        """Starta inläsning av en sida om den inte redan läses."""
+        if file_name in self._in_flight:
+            return
+        self._in_flight.add(file_name)
+        self.pool.start(_PrefetchJob(self, file_name))
+
+    def _finish(self, file_name, records):
+        self._in_flight.discard(file_name)
+        if records is not None:
+            try:
+                self.pageLoaded.emit(file_name, records)
+            except RuntimeError:
+                # Fliken har redan rivits vid avslut
+                pass
@@ -0,0 +1,112 @@
+# ./utils/snapshot_writer.py
+import os
+import json
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+def capture_snapshot(records):
+    """
+    Ta en oföränderlig kopia av en lista med poster på UI-tråden.
+    Strängar delas, bara dict/list-behållare kopieras.
+    """
+    snapshot = []
+    for record in records:
+        copy = dict(record)
+        for key, value in copy.items():
+            if isinstance(value, list):
+                copy[key] = list(value)
+            elif isinstance(value, dict):
+                copy[key] = dict(value)
+        snapshot.append(copy)
+    return snapshot
+
+
+class _WriteJob(QRunnable):
+    """Arbetsjobb som skriver den senaste väntande ögonblicksbilden för en fil."""
+
+    def __init__(self, writer, file_name):
+        super().__init__()
+        self.writer = writer
+        self.file_name = file_name
+
+    def run(self):
+        self.writer._drain(self.file_name)
+
+
+class SnapshotWriter(QObject):
+    """
+    Serialiserar och skriver JSON-ögonblicksbilder på en arbetstråd.
+    Nyare sparningar för samma fil ersätter sådana som ännu inte skrivits.
+    """
+
+    saveStarted = Signal(str, int)    # filnamn, generation
+    saveFinished = Signal(str, int)   # filnamn, generation
+    saveFailed = Signal(str, str)     # filnamn, felmeddelande
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = {}   # filnamn -> (generation, snapshot)
+        self._active = set()  # filer som har ett jobb igång
+
+    def submit(self, file_name, snapshot):
+        """Köa en ögonblicksbild för skrivning. Returnerar dess generation."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._pending[file_name] = (generation, snapshot)
+            start_job = file_name not in self._active
+            if start_job:
+                self._active.add(file_name)
+
+        if start_job:
+            self.pool.start(_WriteJob(self, file_name))
+        return generation
+
+    def is_busy(self, file_name=None):
+        """Returnera True om det finns väntande eller pågående skrivningar."""
+        with self._lock:
+            if file_name is None:
+                return bool(self._active)
+            return file_name in self._active
+
+    def wait(self, timeout_ms=-1):
+        """Vänta tills alla köade skrivningar är klara."""
+        return self.pool.waitForDone(timeout_ms)
+
+    def _drain(self, file_name):
+        """Skriv väntande ögonblicksbilder tills kön för filen är tom."""
+        while True:
+            with self._lock:
+                entry = self._pending.pop(file_name, None)
+                if entry is None:
+                    self._active.discard(file_name)
+                    return
+
+            generation, snapshot = entry
+            self._emit(self.saveStarted, file_name, generation)
+            try:
+                data = json.dumps(snapshot, indent=4, ensure_ascii=False)
+                # Skriv till temporär fil först så att en avbruten skrivning aldrig lämnar en halv sida
+                temp_name = f"{file_name}.tmp"
+                with open(temp_name, "w", encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp_name, file_name)
+            except Exception as e:
+                self._emit(self.saveFailed, file_name, str(e))
+                continue
+
+            self._emit(self.saveFinished, file_name, generation)
+
+    def _emit(self, signal, *args):
+        """Skicka en signal från arbetstråden, även om skrivaren redan rivits vid avslut."""
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass
@@ -0,0 +1,212 @@
+# ./utils/startup_profiler.py
+import os
+import sys
+import json
+import time
+import builtins
+import threading
+from contextlib import contextmanager
+
+# Aktiveras med --profile-startup[=rapport.json] eller miljövariabeln DASHBOARD_PROFILE_STARTUP
+PROFILE_FLAG = "--profile-startup"
+PROFILE_ENV = "DASHBOARD_PROFILE_STARTUP"
+
+_profiler = None
+
+
+class StartupProfiler:
+    """
+    Mäter uppstartens faser: importtid per modul, namngivna faser och
+    enstaka tidpunkter (t.ex. första ritningen). Tider är i millisekunder
+    räknat från att profileraren skapades.
+    """
+
+    def __init__(self, report_path=None):
+        self.report_path = report_path
+        self.start = time.perf_counter()
+        self.phases = []      # (namn, start, längd)
+        self.marks = []       # (namn, tidpunkt)
+        self.imports = []     # (modul, total, egen tid)
+        self._open = {}
+        self._import_stack = []
+        self._original_import = None
+        self._main_thread = threading.get_ident()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000.0
+
+    def begin(self, name):
+        """Starta en namngiven fas."""
+        self._open[name] = self.elapsed_ms()
+
+    def end(self, name):
+        """Avsluta en fas som startats med begin()."""
+        started = self._open.pop(name, None)
+        if started is not None:
+            self.phases.append((name, started, self.elapsed_ms() - started))
+
+    @contextmanager
+    def phase(self, name):
+        """Mät ett kodblock som en fas."""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def mark(self, name):
+        """Registrera en tidpunkt, bara första gången namnet används."""
+        if not any(existing == name for existing, _ in self.marks):
+            self.marks.append((name, self.elapsed_ms()))
+
+    def has_open_phases(self):
+        return bool(self._open)
+
+    def install_import_hook(self):
+        """Mät importer som görs på huvudtråden från och med nu."""
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def remove_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        # Redan inlästa moduler, relativa importer och andra trådar mäts inte
+        if level or name in sys.modules or threading.get_ident() != self._main_thread:
+            return original(name, globals, locals, fromlist, level)
+
+        started = time.perf_counter()
+        self._import_stack.append(0.0)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - started
+            children = self._import_stack.pop()
+            if self._import_stack:
+                self._import_stack[-1] += total
+            self.imports.append((name, total * 1000.0, (total - children) * 1000.0))
+
+    def report(self, top=25):
+        """Bygg en strukturerad rapport."""
+        packages = {}
+        for name, _, self_ms in self.imports:
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + self_ms
+
+        slowest = sorted(self.imports, key=lambda item: item[2], reverse=True)[:top]
+        return {
+            "total_ms": round(self.elapsed_ms(), 2),
+            "phases": [
+                {"name": name, "start_ms": round(start, 2), "duration_ms": round(duration, 2)}
+                for name, start, duration in sorted(self.phases, key=lambda item: item[1])
+            ],
+            "marks": [{"name": name, "at_ms": round(at, 2)} for name, at in self.marks],
+            "imports": {
+                "count": len(self.imports),
+                "total_ms": round(sum(self_ms for _, _, self_ms in self.imports), 2),
+                "by_package_ms": {
+                    package: round(ms, 2)
+                    for package, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)
+                },
+                "slowest": [
+                    {"module": name, "total_ms": round(total, 2), "self_ms": round(self_ms, 2)}
+                    for name, total, self_ms in slowest
+                ],
+            },
+        }
+
+    def format_report(self, report=None):
+        """Formatera rapporten som läsbar text."""
+        report = report or self.report()
+        lines = [f"Uppstart: {report['total_ms']:.1f} ms", "", "Faser:"]
+        for phase in report["phases"]:
+            lines.append(f"  {phase['start_ms']:9.1f}  {phase['duration_ms']:9.1f} ms  {phase['name']}")
+        lines.append("")
+        lines.append("Tidpunkter:")
+        for mark in report["marks"]:
+            lines.append(f"  {mark['at_ms']:9.1f} ms  {mark['name']}")
+        imports = report["imports"]
+        lines.append("")
+        lines.append(f"Importer: {imports['count']} moduler, {imports['total_ms']:.1f} ms")
+        for package, ms in list(imports["by_package_ms"].items())[:10]:
+            lines.append(f"  {ms:9.1f} ms  {package}")
+        lines.append("")
+        lines.append("Långsammaste modulerna (egen tid / total):")
+        for entry in imports["slowest"]:
+            lines.append(f"  {entry['self_ms']:9.1f} / {entry['total_ms']:9.1f} ms  {entry['module']}")
+        return "\n".join(lines)
+
+    def finish(self):
+        """Skriv ut rapporten och spara den som JSON om en sökväg angetts."""
+        self.remove_import_hook()
+        report = self.report()
+        print(self.format_report(report))
+        if self.report_path:
+            try:
+                with open(self.report_path, "w", encoding='utf-8') as f:
+                    json.dump(report, f, indent=4, ensure_ascii=False)
+            except Exception as e:
+                print(f"Kunde inte spara uppstartsrapporten: {e}")
+        return report
+
+
+def requested_report_path(argv=None):
+    """
+    Returnera (aktiverad, rapportsökväg) utifrån kommandoraden och miljön.
+    Sökvägen är None när rapporten bara ska skrivas ut.
+    """
+    argv = sys.argv if argv is None else argv
+    for arg in argv[1:]:
+        if arg == PROFILE_FLAG:
+            return True, None
+        if arg.startswith(PROFILE_FLAG + "="):
+            return True, arg.split("=", 1)[1] or None
+
+    value = os.environ.get(PROFILE_ENV, "")
+    if value and value != "0":
+        return True, None if value == "1" else value
+    return False, None
+
+
+def enable(report_path=None):
+    """Skapa den globala profileraren och börja mäta importer."""
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler(report_path)
+        _profiler.install_import_hook()
+    return _profiler
+
+
+def active():
+    """Returnera den aktiva profileraren eller None."""
+    return _profiler
+
+
+@contextmanager
+def profile_phase(name):
+    """Mät ett kodblock om profilering är aktiverad, annars gör ingenting."""
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.phase(name):
+            yield
+
+
+def begin_phase(name):
+    if _profiler is not None:
+        _profiler.begin(name)
+
+
+def end_phase(name):
+    if _profiler is not None:
+        _profiler.end(name)
+
+
+def mark(name):
+    if _profiler is not None:
+        _profiler.mark(name)
@@ -0,0 +1,249 @@
+# ./utils/structure_parser.py
+import ast
+import re
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtWidgets import QApplication
+
+from utils.code_utils import CodeAnalyzer
+from utils.symbol_index import JS_KEYWORDS
+
+JAVASCRIPT_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx")
+
+
+def _params(args, skip_self=False):
+    """Parameternamn, med typannotering när den är ett enkelt namn."""
+    params = []
+    for index, arg in enumerate(args.args):
+        if skip_self and index == 0 and arg.arg == 'self':
+            continue
+        if isinstance(arg.annotation, ast.Name):
+            params.append(f"{arg.arg}: {arg.annotation.id}")
+        else:
+            params.append(arg.arg)
+    return params
+
+
+def line_offsets(code):
+    """Teckenindex där varje rad i koden börjar."""
+    offsets = [0]
+    offsets.extend(match.end() for match in re.finditer("\n", code))
+    return offsets
+
+
+def _lines(offsets, code, lineno, end_lineno):
+    """Radnummer och teckenspann för hela raderna lineno..end_lineno."""
+    end = offsets[end_lineno] - 1 if end_lineno < len(offsets) else len(code)
+    return {"lineno": lineno, "end_lineno": end_lineno, "span": (offsets[lineno - 1], end)}
+
+
+def _source(offsets, code, lineno, source):
+    """Radnummer och exakt teckenspann för källtexten source som börjar på rad lineno."""
+    start = code.find(source, offsets[lineno - 1]) if source else -1
+    if start < 0:
+        return {"lineno": lineno}
+    return {"lineno": lineno, "end_lineno": lineno + source.count("\n"), "span": (start, start + len(source))}
+
+
+def parse_python_structure(code):
+    """
+    Funktioner, klasser och variabler i Pythonkod som tre dictar
+    (namn -> info). Varje info har lineno och end_lineno samt span:
+    teckenindex (start, slut) i koden för symbolens rader, utan sista
+    radbrytningen. Returnerar None om koden inte går att parsa.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+    offsets = line_offsets(code)
+
+    functions = {}
+    classes = {}
+    variables = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef):
+            functions[node.name] = {
+                **_lines(offsets, code, node.lineno, node.end_lineno),
+                "params": _params(node.args),
+            }
+
+        elif isinstance(node, ast.ClassDef):
+            class_info = {
+                **_lines(offsets, code, node.lineno, node.end_lineno),
+                "bases": [base.id for base in node.bases if isinstance(base, ast.Name)],
+                "methods": {},
+                "properties": {},
+            }
+            # Metoder och klassattribut direkt i klasskroppen
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef):
+                    class_info["methods"][item.name] = {
+                        **_lines(offsets, code, item.lineno, item.end_lineno),
+                        "params": _params(item.args, skip_self=True),
+                    }
+                elif isinstance(item, ast.Assign):
+                    for target in item.targets:
+                        if isinstance(target, ast.Name):
+                            class_info["properties"][target.id] = _lines(offsets, code, item.lineno, item.end_lineno)
+            classes[node.name] = class_info
+
+        elif isinstance(node, ast.Assign) and all(isinstance(target, ast.Name) for target in node.targets):
+            for target in node.targets:
+                variables[target.id] = _lines(offsets, code, node.lineno, node.end_lineno)
+
+    return functions, classes, variables
+
+
+def parse_javascript_structure(code):
+    """
+    Funktioner och klasser i JavaScript-kod, i samma form som för Python.
+    Spannen täcker deklarationen exakt; metoder saknar slut och spann.
+    """
+    offsets = line_offsets(code)
+    classes = {}
+    method_lines = set()
+    for cls in CodeAnalyzer.extract_javascript_classes(code):
+        methods = {}
+        for name, info in cls.get("methods", {}).items():
+            if name in JS_KEYWORDS:
+                continue
+            methods[name] = {"lineno": info["lineno"], "params": info.get("params", [])}
+            method_lines.add((name, info["lineno"]))
+        classes[cls["name"]] = {
+            **_source(offsets, code, cls["lineno"], cls.get("code", "")),
+            "bases": cls.get("bases", []),
+            "methods": methods,
+            "properties": {name: {"lineno": info["lineno"]} for name, info in cls.get("properties", {}).items()},
+        }
+
+    functions = {}
+    for func in CodeAnalyzer.extract_javascript_functions(code):
+        # Metoder fångas även som funktioner av mönstren
+        if (func["name"], func["lineno"]) not in method_lines:
+            functions[func["name"]] = {
+                **_source(offsets, code, func["lineno"], func.get("code", "")),
+                "params": func["params"],
+            }
+
+    return functions, classes, {}
+
+
+def parse_structure(code, extension):
+    """
+    Kodstrukturen för en modul utifrån filändelsen. Språk utan parser ger
+    tom struktur; None betyder att koden inte gick att parsa.
+    """
+    extension = extension.lower()
+    if extension.endswith('.py'):
+        return parse_python_structure(code)
+    if extension.endswith(JAVASCRIPT_EXTENSIONS):
+        return parse_javascript_structure(code)
+    return {}, {}, {}
+
+
+def _shift_entries(entries, start, end, start_line, end_line, char_delta, line_delta):
+    for name in list(entries):
+        info = entries[name]
+        span = info.get("span")
+        if span is None:
+            # Bara radnummer: flytta det om det ligger efter ändringen
+            if info["lineno"] - 1 > end_line:
+                info["lineno"] += line_delta
+            continue
+        if span[0] >= end:
+            info["span"] = (span[0] + char_delta, span[1] + char_delta)
+            info["lineno"] += line_delta
+            info["end_lineno"] += line_delta
+        elif span[1] <= start:
+            continue
+        elif span[0] <= start and span[1] >= end:
+            # Ändringen ligger inom symbolen, t.ex. när symbolen själv ersätts
+            info["span"] = (span[0], span[1] + char_delta)
+            info["end_lineno"] += line_delta
+        else:
+            # Symbolen skars av ändringen; nästa parsning får hitta den igen
+            del entries[name]
+            continue
+        for key in ("methods", "properties"):
+            if key in info:
+                _shift_entries(info[key], start, end, start_line, end_line, char_delta, line_delta)
+
+
+def shift_structure(structure, code, start, end, text):
+    """
+    Flytta rader och spann i en struktur från parse_structure(code) så att
+    de gäller efter att code[start:end] ersatts med text, utan att parsa om.
+    Symboler efter ändringen flyttas, symboler som omsluter den växer eller
+    krymper och symboler som ändringen skär igenom tas bort.
+    """
+    start_line = code.count("\n", 0, start)
+    end_line = start_line + code.count("\n", start, end)
+    char_delta = len(text) - (end - start)
+    line_delta = text.count("\n") - (end_line - start_line)
+    for entries in structure:
+        _shift_entries(entries, start, end, start_line, end_line, char_delta, line_delta)
+
+
+class _Job(QRunnable):
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        self.func()
+
+
+class StructureParser(QObject):
+    """
+    Parsar kodstrukturen för en editor på en delad arbetstråd. Varje
+    begäran får en generation; jobb som hunnit ersättas av en nyare
+    begäran hoppas över, och resultat skickas med sin generation så att
+    mottagaren kan kasta sådana som blivit inaktuella under parsningen.
+    """
+
+    structureParsed = Signal(int, object)   # generation, (funktioner, klasser, variabler) eller None
+
+    _pool = None
+
+    @classmethod
+    def shared_pool(cls):
+        """Trådpoolen som delas av alla editorer."""
+        if cls._pool is None:
+            cls._pool = QThreadPool(QApplication.instance())
+            cls._pool.setMaxThreadCount(2)
+        return cls._pool
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+
+    def submit(self, code, extension):
+        """Köa en parsning och returnera dess generation."""
+        self.generation += 1
+        generation = self.generation
+        self.shared_pool().start(_Job(lambda: self._parse(generation, code, extension)))
+        return generation
+
+    def cancel(self):
+        """Gör alla köade och pågående parsningar inaktuella."""
+        self.generation += 1
+
+    def _parse(self, generation, code, extension):
+        if generation != self.generation:
+            return
+        try:
+            result = parse_structure(code, extension)
+        except Exception as e:
+            print(f"Kunde inte analysera kodstrukturen: {e}")
+            return
+        if generation == self.generation:
+            self._emit(self.structureParsed, generation, result)
+
+    def _emit(self, signal, *args):
+        """Skicka en signal från arbetstråden, även om editorn redan rivits."""
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass
@@ -0,0 +1,198 @@
+# ./utils/symbol_index.py
+import re
+import bisect
+import threading
+
+from utils.code_utils import CodeAnalyzer
+from utils.facet_index import language_for_extension
+
+# Ord som metodmönstret för JavaScript-klasser även fångar
+JS_KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return", "with", "super"}
+
+KIND_LABELS = {"module": "modul", "file": "fil", "function": "funktion", "class": "klass", "method": "metod"}
+
+# Högst så många kandidater poängsätts per sökning
+MAX_CANDIDATES = 2000
+
+
+def extract_symbols(module, extension=None):
+    """
+    Returnera modulens symboler som listor [typ, namn, rad] utifrån
+    CodeAnalyzer. Metoder får klassnamnet som prefix.
+    """
+    code = module.get("code", "") or ""
+    if extension is None:
+        extension = module.get("extension", "")
+    language = language_for_extension(extension)
+    if not code or language not in ("python", "javascript", "typescript"):
+        return []
+
+    if language == "python":
+        # Översikten hoppar över kodsegmenten, som är dyra att plocka ut för varje funktion
+        return [[item["type"], item["name"], item["lineno"]] for item in CodeAnalyzer.extract_python_outline(code)]
+
+    symbols = []
+    classes = CodeAnalyzer.extract_javascript_classes(code)
+    functions = CodeAnalyzer.extract_javascript_functions(code)
+
+    method_lines = set()
+    for cls in classes:
+        symbols.append(["class", cls["name"], cls["lineno"]])
+        for name, info in cls.get("methods", {}).items():
+            if name in JS_KEYWORDS:
+                continue
+            symbols.append(["method", f"{cls['name']}.{name}", info["lineno"]])
+            method_lines.add((name, info["lineno"]))
+    for func in functions:
+        if (func["name"], func["lineno"]) not in method_lines:
+            symbols.append(["function", func["name"], func["lineno"]])
+    symbols.sort(key=lambda symbol: symbol[2])
+    return symbols
+
+
+def fuzzy_score(query, text):
+    """
+    Poängsätt hur väl query (gemener) matchar text som en delsekvens.
+    Returnerar None om alla tecken inte finns i ordning. Träffar i början,
+    efter _ . - / eller på en versal ger bonus, liksom tecken i följd.
+    """
+    lower = text.lower()
+    start = lower.find(query)
+    if start >= 0:
+        # Sammanhängande träff: bäst i början eller vid en ordgräns
+        score = 100 + 10 * len(query)
+        if start == 0:
+            score += 60
+        elif not lower[start - 1].isalnum() or text[start].isupper():
+            score += 30
+        return score - len(text) // 4
+
+    score = 0
+    position = 0
+    previous = -2
+    for char in query:
+        index = lower.find(char, position)
+        if index < 0:
+            return None
+        if index == previous + 1:
+            score += 8
+        if index == 0 or not lower[index - 1].isalnum() or (text[index].isupper() and not text[index - 1].isupper()):
+            score += 10
+        score -= min(index - position, 5)
+        previous = index
+        position = index + 1
+    return score - len(text) // 4
+
+
+class _Snapshot:
+    """Oföränderlig vy över alla poster, byggd på arbetstråden."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        # Alla namn i gemener på egna rader; reguljära uttryck söker i C i stället för en Python-loop
+        names = [entry[1].lower() for entry in entries]
+        self.blob = "\n" + "\n".join(names)
+        self.offsets = []
+        offset = 1
+        for name in names:
+            self.offsets.append(offset)
+            offset += len(name) + 1
+
+
+class SymbolIndex:
+    """
+    Index över modulnamn, filnamn och symboler (klasser, funktioner,
+    metoder) i hela biblioteket. Posterna uppdateras per dokument när
+    trigramindexet ändras; frågor besvaras från en ögonblicksbild som
+    byggs om på arbetstråden, så huvudtråden aldrig väntar på låset.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_doc = {}      # dokument-id -> lista med poster
+        self._changed = False
+        self._snapshot = _Snapshot([])
+
+    def __len__(self):
+        return len(self._snapshot.entries)
+
+    def clear(self):
+        with self._lock:
+            self._by_doc = {}
+            self._changed = True
+
+    def set_document(self, doc_id, doc):
+        """Lägg till eller ersätt posterna för ett dokument i trigramindexet."""
+        if doc["kind"] == "page":
+            head = ["module", doc["fields"]["name"] or doc["module_id"], 1]
+        else:
+            head = ["file", doc["fields"]["name"], 1]
+        # Post: (typ, namn, rad, modulnamn, källa, modul-id, dokumenttyp, filsökväg)
+        location = (doc["fields"]["name"], doc["source"], doc["module_id"], doc["kind"], doc.get("file_path", ""))
+        entries = [tuple(head) + location]
+        entries.extend(tuple(symbol) + location for symbol in doc.get("symbols", ()))
+        with self._lock:
+            self._by_doc[doc_id] = entries
+            self._changed = True
+
+    def remove_document(self, doc_id):
+        with self._lock:
+            if self._by_doc.pop(doc_id, None) is not None:
+                self._changed = True
+
+    def publish(self, covered_paths=()):
+        """
+        Bygg en ny ögonblicksbild om något ändrats sedan förra gången.
+        Filer på disk som redan finns som sidmodul (covered_paths) utelämnas.
+        """
+        with self._lock:
+            if not self._changed:
+                return False
+            entries = [
+                entry
+                for doc_id in sorted(self._by_doc)
+                for entry in self._by_doc[doc_id]
+                if entry[6] != "file" or entry[7] not in covered_paths
+            ]
+            self._changed = False
+        self._snapshot = _Snapshot(entries)
+        return True
+
+    def query(self, text, limit=50):
+        """Returnera de bäst rankade posterna för en fuzzy-sökning."""
+        query = text.strip().lower()
+        snapshot = self._snapshot
+        if not query:
+            return []
+
+        # Delsekvensmönster, t.ex. "abc" -> a[^\nb]*b[^\nc]*c; varje teckenklass
+        # utesluter nästa tecken så att mönstret aldrig behöver backa
+        chars = [char for char in query if char != "\n"]
+        pattern = re.compile(
+            re.escape(chars[0]) + "".join(f"[^\\n{re.escape(char)}]*{re.escape(char)}" for char in chars[1:])
+        )
+        candidates = []
+        seen = set()
+        # Namn som börjar med frågan och sammanhängande träffar letas först så att
+        # de inte trängs undan av takets gräns; blobben börjar med en radbrytning,
+        # och den ligger i en lookbehind så att träffen börjar på namnets egen rad
+        for finder in (re.compile("(?<=\n)" + re.escape(query)), re.compile(re.escape(query)), pattern):
+            for match in finder.finditer(snapshot.blob):
+                row = bisect.bisect_right(snapshot.offsets, match.start()) - 1
+                if row not in seen:
+                    seen.add(row)
+                    candidates.append(row)
+                    if len(candidates) >= MAX_CANDIDATES:
+                        break
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+
+        scored = []
+        for row in candidates:
+            entry = snapshot.entries[row]
+            score = fuzzy_score(query, entry[1])
+            if score is not None:
+                # Moduler och klasser före metoder vid lika poäng
+                scored.append((score, entry[0] in ("module", "file", "class"), -len(entry[1]), row))
+        scored.sort(reverse=True)
+        return [snapshot.entries[row] for _, _, _, row in scored[:limit]]
@@ -0,0 +1,670 @@
+# ./utils/trigram_index.py
+import os
+import re
+import sys
+import glob
+import base64
+import json
+import zlib
+import threading
+from array import array
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from utils.symbol_index import SymbolIndex, extract_symbols
+from utils.bm25_index import Bm25Index
+
+INDEX_VERSION = 2
+INDEX_MAGIC = b"CMT1"
+
+# Samma filändelser som CodeModuleManager letar efter på disk
+SOURCE_EXTENSIONS = (".py", ".js", ".ts", ".jsx", ".tsx", ".html", ".css", ".cpp", ".c", ".h", ".hpp", ".java")
+
+FIELDS = ("name", "code", "description", "tags")
+FIELD_LABELS = {"name": "namn", "description": "beskrivning", "tags": "taggar"}
+
+
+def trigrams(text):
+    """Returnera mängden trigram i en text (förväntas redan vara i gemener)."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def document_fields(module):
+    """Plocka ut de sökbara fälten ur en modul."""
+    return {
+        "name": module.get("name", "") or "",
+        "code": module.get("code", "") or "",
+        "description": module.get("description", "") or "",
+        "tags": " ".join(module.get("tags", []) or []),
+    }
+
+
+def file_signature(path):
+    """Returnera [mtime_ns, storlek] för en fil, eller None om den saknas."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def ranking_path(index_path):
+    """BM25-indexet sparas bredvid trigramindexet."""
+    return os.path.join(os.path.dirname(index_path), "bm25.idx")
+
+
+def required_literals(pattern, flags=0):
+    """
+    Plocka ut bokstavliga delsträngar (minst tre tecken) som varje träff
+    för ett reguljärt uttryck måste innehålla. Tom lista betyder att
+    uttrycket inte går att avgränsa med trigram.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return []
+
+    literals = []
+
+    def walk(items):
+        current = []
+
+        def flush():
+            if len(current) >= 3:
+                literals.append("".join(current))
+            current.clear()
+
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                current.append(chr(av))
+            elif op is sre_parse.SUBPATTERN:
+                flush()
+                walk(av[-1])
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                flush()
+                minimum, _, item = av
+                # Bara upprepningar som måste förekomma minst en gång är obligatoriska
+                if minimum >= 1:
+                    walk(item)
+            else:
+                # Alternativ, teckenklasser, ankare m.m. bryter en bokstavlig följd
+                flush()
+        flush()
+
+    walk(parsed)
+    return literals
+
+
+class TrigramIndex:
+    """
+    Inverterat trigramindex över modulernas namn, kod, beskrivning och
+    taggar. Dokument-id:n delas ut i stigande ordning så att varje
+    postlista förblir sorterad när den bara läggs till i slutet; ändrade
+    och borttagna dokument lämnas som döda id:n tills indexet komprimeras.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.symbols = SymbolIndex()
+        self.ranking = Bm25Index()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.docs = {}          # dokument-id -> dokument
+            self.doc_by_key = {}    # (källa, modul-id) -> dokument-id
+            self.by_source = {}     # källa -> {modul-id}
+            self.postings = {}      # trigram -> array med dokument-id:n
+            self.sources = {}       # källa -> signatur vid senaste indexering
+            self.page_paths = {}    # filsökväg som en sidmodul pekar på -> antal
+            self.next_doc = 0
+            self.dead = 0
+            self.dirty = False
+            self.symbols.clear()
+            self.ranking.clear()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def index_module(self, source, module, kind="page"):
+        """Indexera en modul. Returnerar True om indexet ändrades."""
+        module_id = str(module.get("id"))
+        fields = document_fields(module)
+        key = (source, module_id)
+        with self._lock:
+            doc_id = self.doc_by_key.get(key)
+            if doc_id is not None:
+                doc = self.docs[doc_id]
+                if doc["fields"] == fields:
+                    file_path = self._track_path(doc, module.get("file_path", ""))
+                    if file_path != doc["file_path"]:
+                        doc["file_path"] = file_path
+                        self.symbols.set_document(doc_id, doc)
+                    return False
+                self._remove_doc(doc_id)
+
+            doc_id = self.next_doc
+            self.next_doc += 1
+            doc = {"kind": kind, "source": source, "module_id": module_id, "file_path": "", "fields": fields}
+            doc["file_path"] = self._track_path(doc, module.get("file_path", ""))
+            # Analysen sparas med dokumentet och görs bara om när fälten ändrats
+            extension = module.get("extension") if kind == "page" else os.path.splitext(source)[1]
+            doc["symbols"] = extract_symbols(module, extension)
+            self.docs[doc_id] = doc
+            self.symbols.set_document(doc_id, doc)
+            self.doc_by_key[key] = doc_id
+            self.by_source.setdefault(source, set()).add(module_id)
+            self._add_postings(doc_id, fields)
+            self.ranking.add(doc_id, fields)
+            self.dirty = True
+            return True
+
+    def replace_source(self, source, modules, kind="page", signature=None):
+        """Indexera en hel sida eller fil; moduler som inte längre finns tas bort."""
+        with self._lock:
+            seen = set()
+            for module in modules:
+                self.index_module(source, module, kind)
+                seen.add(str(module.get("id")))
+            for module_id in list(self.by_source.get(source, ())):
+                if module_id not in seen:
+                    self._remove_doc(self.doc_by_key[(source, module_id)])
+            if signature is not None:
+                self.sources[source] = signature
+                self.dirty = True
+            self._maybe_compact()
+
+    def remove_source(self, source):
+        """Ta bort alla dokument från en sida eller fil."""
+        with self._lock:
+            for module_id in list(self.by_source.get(source, ())):
+                self._remove_doc(self.doc_by_key[(source, module_id)])
+            self.by_source.pop(source, None)
+            if self.sources.pop(source, None) is not None:
+                self.dirty = True
+            self._maybe_compact()
+
+    def set_signature(self, source, signature):
+        with self._lock:
+            if signature is not None and self.sources.get(source) != signature:
+                self.sources[source] = signature
+                self.dirty = True
+
+    def publish_symbols(self):
+        """Gör ändrade symboler sökbara för snabbvalet."""
+        with self._lock:
+            covered_paths = set(self.page_paths)
+        self.symbols.publish(covered_paths)
+
+    def _track_path(self, doc, file_path):
+        """Håll reda på vilka filer på disk som redan täcks av en sidmodul."""
+        file_path = os.path.normpath(file_path) if file_path else ""
+        if doc["kind"] == "page" and doc.get("file_path") != file_path:
+            self._count_path(doc.get("file_path"), -1)
+            self._count_path(file_path, 1)
+        return file_path
+
+    def _count_path(self, path, delta):
+        if not path:
+            return
+        count = self.page_paths.get(path, 0) + delta
+        if count > 0:
+            self.page_paths[path] = count
+        else:
+            self.page_paths.pop(path, None)
+
+    def _add_postings(self, doc_id, fields):
+        text = "\0".join(fields[field] for field in FIELDS).lower()
+        postings = self.postings
+        for trigram in trigrams(text):
+            ids = postings.get(trigram)
+            if ids is None:
+                postings[trigram] = array("I", (doc_id,))
+            else:
+                ids.append(doc_id)
+
+    def _remove_doc(self, doc_id):
+        doc = self.docs.pop(doc_id)
+        self.symbols.remove_document(doc_id)
+        self.ranking.remove(doc_id)
+        self.doc_by_key.pop((doc["source"], doc["module_id"]), None)
+        module_ids = self.by_source.get(doc["source"])
+        if module_ids is not None:
+            module_ids.discard(doc["module_id"])
+        if doc["kind"] == "page":
+            self._count_path(doc.get("file_path"), -1)
+        # Postlistorna rörs inte; döda id:n filtreras bort vid sökning
+        self.dead += 1
+        self.dirty = True
+
+    def _maybe_compact(self):
+        """Bygg om postlistorna när de döda id:na blivit fler än de levande."""
+        if self.ranking.compact(self.docs):
+            self.dirty = True
+        if self.dead <= max(1000, len(self.docs)):
+            return
+        self.postings = {}
+        for doc_id in sorted(self.docs):
+            self._add_postings(doc_id, self.docs[doc_id]["fields"])
+        self.dead = 0
+        self.dirty = True
+
+    def candidates(self, literals):
+        """
+        Returnera dokument-id:n som innehåller alla trigram i literalerna,
+        eller None om literalerna är för korta för att avgränsa något.
+        """
+        with self._lock:
+            lists = []
+            for literal in literals:
+                for trigram in trigrams(literal.lower()):
+                    ids = self.postings.get(trigram)
+                    if ids is None:
+                        return set()
+                    lists.append(ids)
+            if not lists:
+                return None
+            lists.sort(key=len)
+            result = set(lists[0])
+            for ids in lists[1:]:
+                result.intersection_update(ids)
+                if not result:
+                    break
+            docs = self.docs
+            return {doc_id for doc_id in result if doc_id in docs}
+
+    def search(self, query, regex=False, case_sensitive=False, limit=200, context=2, max_lines=20):
+        """
+        Sök efter en delsträng eller ett reguljärt uttryck. Returnerar en
+        lista med träffar per modul, med radnummer och omgivande rader.
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if regex:
+            pattern = re.compile(query, flags)
+            literals = required_literals(query, flags)
+        else:
+            pattern = re.compile(re.escape(query), flags)
+            literals = [query]
+
+        candidate_ids = self.candidates(literals)
+        with self._lock:
+            if candidate_ids is None:
+                candidate_ids = self.docs.keys()
+            # Dokumenten byts ut i stället för att ändras, så en kopia av referenserna räcker
+            docs = [(doc_id, self.docs[doc_id]) for doc_id in sorted(candidate_ids) if doc_id in self.docs]
+            covered_paths = set(self.page_paths)
+
+        results = []
+        for _, doc in docs:
+            # Filer som redan finns som sidmoduler visas bara en gång
+            if doc["kind"] == "file" and doc["file_path"] in covered_paths:
+                continue
+            matches = self._match_document(doc, pattern, context, max_lines)
+            if matches:
+                results.append({
+                    "kind": doc["kind"],
+                    "source": doc["source"],
+                    "module_id": doc["module_id"],
+                    "name": doc["fields"]["name"],
+                    "file_path": doc["file_path"],
+                    "matches": matches,
+                })
+                if len(results) >= limit:
+                    break
+        return results
+
+    def ranked_search(self, query, limit=200, context=2, max_lines=20):
+        """
+        Sök med BM25-rankning. Moduler som innehåller frågan ordagrant kommer
+        först, sorterade efter relevans; därefter moduler som bara matchar
+        några av frågans termer, i fallande relevans.
+        """
+        exact = self.search(query, limit=limit, context=context, max_lines=max_lines)
+        terms = self.ranking.query_terms(query)
+        with self._lock:
+            exact_ids = [self.doc_by_key.get((result["source"], result["module_id"])) for result in exact]
+            exact_scores = self.ranking.score_documents(query, [doc_id for doc_id in exact_ids if doc_id is not None])
+            ranked = self.ranking.top_k(query, limit)
+            docs = [(score, self.docs[doc_id]) for score, doc_id in ranked if doc_id in self.docs]
+            covered_paths = set(self.page_paths)
+
+        for result, doc_id in zip(exact, exact_ids):
+            result["score"] = exact_scores.get(doc_id, 0.0)
+        # Sorteringen är stabil, så lika poäng behåller indexordningen
+        results = sorted(exact, key=lambda result: -result["score"])
+        seen = {(result["source"], result["module_id"]) for result in results}
+
+        alternatives = [re.escape(term) for term in terms]
+        pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        for score, doc in docs:
+            if len(results) >= limit:
+                break
+            key = (doc["source"], doc["module_id"])
+            if key in seen or (doc["kind"] == "file" and doc["file_path"] in covered_paths):
+                continue
+            seen.add(key)
+            results.append({
+                "kind": doc["kind"],
+                "source": doc["source"],
+                "module_id": doc["module_id"],
+                "name": doc["fields"]["name"],
+                "file_path": doc["file_path"],
+                "score": score,
+                "matches": self._match_document(doc, pattern, context, max_lines),
+            })
+        return results
+
+    def rank_documents(self, source, query, module_ids):
+        """Returnera BM25-poäng per modul-id för moduler från en sida."""
+        with self._lock:
+            doc_ids = {}
+            for module_id in module_ids:
+                doc_id = self.doc_by_key.get((source, str(module_id)))
+                if doc_id is not None:
+                    doc_ids[doc_id] = module_id
+            scores = self.ranking.score_documents(query, sorted(doc_ids))
+        return {doc_ids[doc_id]: score for doc_id, score in scores.items()}
+
+    def _match_document(self, doc, pattern, context, max_lines):
+        matches = []
+        for field in FIELDS:
+            text = doc["fields"][field]
+            if field != "code":
+                if pattern.search(text):
+                    matches.append({"field": field, "line": None, "text": text, "before": [], "after": []})
+                continue
+
+            lines = None
+            last_line = -1
+            line_number = 0
+            line_scan_pos = 0
+            for match in pattern.finditer(text):
+                # Radnumret räknas fram stegvis mellan träffarna
+                line_number += text.count("\n", line_scan_pos, match.start())
+                line_scan_pos = match.start()
+                if line_number == last_line:
+                    continue
+                last_line = line_number
+                if lines is None:
+                    lines = text.split("\n")
+                matches.append({
+                    "field": field,
+                    "line": line_number + 1,
+                    "text": lines[line_number],
+                    "before": lines[max(0, line_number - context):line_number],
+                    "after": lines[line_number + 1:line_number + 1 + context],
+                })
+                if len(matches) >= max_lines:
+                    break
+        return matches
+
+    def save(self, path):
+        """Spara indexet komprimerat; skrivs till en temporär fil först."""
+        with self._lock:
+            data = {
+                "version": INDEX_VERSION,
+                "next_doc": self.next_doc,
+                "dead": self.dead,
+                "sources": self.sources,
+                "byteorder": sys.byteorder,
+                "docs": {str(doc_id): doc for doc_id, doc in self.docs.items()},
+                # Postlistorna sparas som råa arrayer; det går mycket fortare att läsa in än JSON-listor
+                "postings": {
+                    trigram: base64.b64encode(ids.tobytes()).decode("ascii")
+                    for trigram, ids in self.postings.items()
+                },
+            }
+            payload = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), 6)
+            self.dirty = False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_name = f"{path}.tmp"
+        with open(temp_name, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(payload)
+        os.replace(temp_name, path)
+        # Sparas bara från arbetstråden, där inga uppdateringar pågår samtidigt
+        self.ranking.save(ranking_path(path))
+
+    def load(self, path):
+        """Läs ett sparat index. Returnerar False om filen saknas eller är ogiltig."""
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                    return False
+                data = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        except (OSError, ValueError, zlib.error):
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("byteorder") != sys.byteorder:
+            return False
+
+        with self._lock:
+            self.clear()
+            self.next_doc = data["next_doc"]
+            self.dead = data.get("dead", 0)
+            self.sources = data["sources"]
+            for doc_id, doc in data["docs"].items():
+                doc_id = int(doc_id)
+                self.docs[doc_id] = doc
+                self.doc_by_key[(doc["source"], doc["module_id"])] = doc_id
+                self.by_source.setdefault(doc["source"], set()).add(doc["module_id"])
+                self.symbols.set_document(doc_id, doc)
+                if doc["kind"] == "page":
+                    self._count_path(doc.get("file_path"), 1)
+            self.postings = {}
+            for trigram, encoded in data["postings"].items():
+                ids = array("I")
+                ids.frombytes(base64.b64decode(encoded))
+                self.postings[trigram] = ids
+            self.dirty = False
+            # Rankningsindexet ligger i en egen fil; byggs om från dokumenten om det inte stämmer
+            if not self.ranking.load(ranking_path(path), self.docs.keys()):
+                self.ranking.rebuild(self.docs)
+                self.dirty = True
+        return True
+
+
+class _IndexJob(QRunnable):
+    """Arbetsjobb som kör en funktion på indexerarens tråd."""
+
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        self.func()
+
+
+class LibraryIndexer(QObject):
+    """
+    Håller ett trigramindex och ett BM25-index över alla sidor
+    (code_modules*.json) och modulfiler på disk. Uppdateringar körs i ordning på en arbetstråd,
+    sökningar på en egen så att de inte väntar på en pågående indexering.
+    """
+
+    indexUpdated = Signal(int)              # antal indexerade moduler
+    searchFinished = Signal(int, object)    # generation, träffar
+    rankingReady = Signal(int, object)      # generation, {modul-id: poäng}
+
+    def __init__(self, json_directory, modules_directory, parent=None):
+        super().__init__(parent)
+        self.json_directory = json_directory
+        self.modules_directory = str(modules_directory)
+        self.index_path = os.path.join(json_directory, ".index", "trigrams.idx")
+        self.index = TrigramIndex()
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.search_pool = QThreadPool(self)
+        self.search_pool.setMaxThreadCount(1)
+        self._generation = 0
+        self._loaded = False
+
+        # Indexet sparas samlat en stund efter senaste ändringen
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(5000)
+        self.save_timer.timeout.connect(lambda: self.pool.start(_IndexJob(self._save)))
+
+    def refresh(self):
+        """Läs in sparat index och indexera om sidor och filer som ändrats på disk."""
+        self.pool.start(_IndexJob(self._refresh))
+
+    def update_page(self, file_name, records):
+        """Indexera om en sida från en ögonblicksbild av dess poster."""
+        self.pool.start(_IndexJob(lambda: self._run_update(lambda: self.index.replace_source(file_name, records, "page"))))
+        self.save_timer.start()
+
+    def page_saved(self, file_name):
+        """Notera att sidan på disk nu motsvarar indexet."""
+        self.pool.start(_IndexJob(lambda: self._run_update(lambda: self.index.set_signature(file_name, file_signature(file_name)))))
+        self.save_timer.start()
+
+    def remove_page(self, file_name):
+        self.pool.start(_IndexJob(lambda: self._run_update(lambda: self.index.remove_source(file_name))))
+        self.save_timer.start()
+
+    def files_changed(self, changed, deleted):
+        """Indexera om enstaka modulfiler som skapats, ändrats eller tagits bort på disk."""
+        changed = [os.path.normpath(path) for path in changed]
+        deleted = [os.path.normpath(path) for path in deleted]
+
+        def update():
+            for path in changed:
+                self._index_file(path)
+            for path in deleted:
+                self.index.remove_source(path)
+
+        self.pool.start(_IndexJob(lambda: self._run_update(update)))
+        self.save_timer.start()
+
+    def search(self, query, regex=False, limit=200):
+        """Starta en sökning i hela biblioteket och returnera dess generation."""
+        self._generation += 1
+        generation = self._generation
+
+        def run():
+            # Sökningar som hunnit ersättas hoppas över
+            if generation != self._generation:
+                return
+            try:
+                if regex:
+                    results = self.index.search(query, regex=True, limit=limit)
+                else:
+                    results = self.index.ranked_search(query, limit=limit)
+            except re.error as e:
+                results = {"error": str(e)}
+            self._emit(self.searchFinished, generation, results)
+
+        self.search_pool.start(_IndexJob(run))
+        return generation
+
+    def rank_page(self, file_name, query, module_ids):
+        """Starta BM25-rankning av sökträffar på en sida och returnera generationen."""
+        self._generation += 1
+        generation = self._generation
+        module_ids = list(module_ids)
+
+        def run():
+            if generation != self._generation:
+                return
+            self._emit(self.rankingReady, generation, self.index.rank_documents(file_name, query, module_ids))
+
+        self.search_pool.start(_IndexJob(run))
+        return generation
+
+    def find_symbols(self, text, limit=50):
+        """Fuzzy-sök bland modul-, fil- och symbolnamn; körs direkt på anropande tråd."""
+        return self.index.symbols.query(text, limit)
+
+    def cancel(self):
+        """Släpp resultat från sökningar som redan startats."""
+        self._generation += 1
+
+    def flush(self):
+        """Vänta in köade uppdateringar och spara indexet direkt."""
+        self.save_timer.stop()
+        self.pool.waitForDone()
+        self._save()
+
+    def _save(self):
+        if not self.index.dirty:
+            return
+        try:
+            self.index.save(self.index_path)
+        except Exception as e:
+            print(f"Kunde inte spara sökindexet: {e}")
+
+    def _ensure_loaded(self):
+        """Läs det sparade indexet innan första ändringen, på arbetstråden."""
+        if not self._loaded:
+            self.index.load(self.index_path)
+            self._loaded = True
+
+    def _run_update(self, func):
+        self._ensure_loaded()
+        func()
+        self.index.publish_symbols()
+
+    def _refresh(self):
+        self._ensure_loaded()
+        # Det sparade indexets symboler blir sökbara direkt, före omindexeringen
+        self.index.publish_symbols()
+
+        # Sidor
+        pages = sorted(glob.glob(os.path.join(self.json_directory, "code_modules*.json")))
+        for file_name in pages:
+            signature = file_signature(file_name)
+            if signature is None or self.index.sources.get(file_name) == signature:
+                continue
+            try:
+                with open(file_name, "r", encoding='utf-8') as f:
+                    records = json.load(f)
+                self.index.replace_source(file_name, records, "page", signature)
+            except Exception as e:
+                print(f"Kunde inte indexera {file_name}: {e}")
+
+        # Modulfiler på disk
+        files = set()
+        for root, dirs, names in os.walk(self.modules_directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d != "json"]
+            for name in names:
+                if name.lower().endswith(SOURCE_EXTENSIONS):
+                    path = os.path.normpath(os.path.join(root, name))
+                    files.add(path)
+                    self._index_file(path)
+
+        # Källor som försvunnit
+        page_set = set(pages)
+        for source in list(self.index.sources):
+            if source not in page_set and source not in files:
+                self.index.remove_source(source)
+
+        self.index.publish_symbols()
+        self._save()
+        self._emit(self.indexUpdated, len(self.index))
+
+    def _index_file(self, path):
+        """Indexera om en modulfil om den ändrats sedan förra gången."""
+        signature = file_signature(path)
+        if signature is None or self.index.sources.get(path) == signature:
+            return
+        try:
+            with open(path, "r", encoding='utf-8') as f:
+                code = f.read()
+        except (OSError, UnicodeDecodeError):
+            return
+        module = {"id": path, "name": os.path.basename(path), "code": code, "file_path": path}
+        self.index.replace_source(path, [module], "file", signature)
+
+    def _emit(self, signal, *args):
+        """Skicka en signal från arbetstråden, även om fliken redan rivits vid avslut."""
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass